@@ -0,0 +1,29 @@
+"""
+build_scope_graph: batched scope lookup vs one ScopeIndex lookup per capture
+
+    python -m benchmarks.build_scope_graph [file]
+"""
+
+from pathlib import Path
+import sys
+
+from scope_graph.build_scopes import build_scope_graph
+
+from tests.scope_graph.per_capture_oracle import build_scope_graph_per_capture
+
+from .utils import bench, report
+
+
+def main(file: str):
+    src = bytearray(Path(file).read_bytes())
+    print(f"{file}: {len(src)} bytes")
+
+    per_capture = bench(lambda: build_scope_graph_per_capture(src), repeat=5)
+    batched = bench(lambda: build_scope_graph(src), repeat=5)
+
+    report("per capture", per_capture)
+    report("batched", batched, baseline=per_capture)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else "tests/repos/test-import-ref/parser.py")
@@ -0,0 +1,37 @@
+"""
+Capture to graph throughput of build_scope_graph, over every source file in a
+directory
+
+    python -m benchmarks.capture_throughput [dir]
+"""
+
+from pathlib import Path
+import sys
+
+from scope_graph.build_scopes import build_scope_graph
+from scope_graph.languages import LANG_PARSER
+
+from .utils import bench, report_throughput
+
+
+def capture_only(srcs):
+    parser = LANG_PARSER["python"]
+    for src in srcs:
+        query, root = parser._build_query(src)
+        query.captures(root)
+
+
+def main(dir: str):
+    srcs = [path.read_bytes() for path in sorted(Path(dir).rglob("*.py"))]
+    num_bytes = sum(len(src) for src in srcs)
+    print(f"{len(srcs)} files, {num_bytes / 1e6:.2f} MB")
+
+    captures = bench(lambda: capture_only(srcs), repeat=3)
+    graphs = bench(lambda: [build_scope_graph(src) for src in srcs], repeat=3)
+
+    report_throughput("parse + captures", captures, num_bytes)
+    report_throughput("build_scope_graph", graphs, num_bytes)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else "tests/repos")
@@ -0,0 +1,94 @@
+"""
+Import part association on a synthetic file with 5k imports: ordered sweep vs
+the old statements x parts scan
+
+    python -m benchmarks.import_parts [num_imports]
+"""
+
+import sys
+
+from scope_graph.build_scopes import build_scope_graph, group_import_parts
+from scope_graph.languages import LANG_PARSER
+from scope_graph.scope_resolution.imports import (
+    LocalImportStmt,
+    parse_alias,
+    parse_from,
+    parse_name,
+)
+from scope_graph.ts.capture_types import ImportPartType, LocalImportPartCapture
+from scope_graph.utils import RawRange
+
+from .utils import bench, report
+
+
+def synthetic_imports(num_imports: int) -> bytes:
+    lines = []
+    for i in range(num_imports):
+        match i % 4:
+            case 0:
+                lines.append(f"import pkg{i}.mod{i}")
+            case 1:
+                lines.append(f"import pkg{i} as alias{i}")
+            case 2:
+                lines.append(f"from pkg{i}.mod import name{i}, other{i}")
+            case 3:
+                lines.append(f"from pkg{i} import (name{i} as alias{i}, other{i})")
+
+    return "\n".join(lines).encode()
+
+
+def import_captures(src: bytes):
+    query, root = LANG_PARSER["python"]._build_query(src)
+
+    capture_map, stmts, parts = {}, [], []
+    for i, (node, capture_name) in enumerate(query.captures(root)):
+        capture_map[i] = RawRange.from_node(node)
+        match capture_name.split("."):
+            case ["local", "import", "statement"]:
+                stmts.append(i)
+            case ["local", "import", part]:
+                parts.append(LocalImportPartCapture(index=i, part=part))
+
+    return capture_map, stmts, parts
+
+
+def scan_import_parts(src, capture_map, stmt_indices, part_captures):
+    """
+    The old association, every statement checks every part
+    """
+    stmts = []
+    for i in stmt_indices:
+        range = capture_map[i]
+        from_name, aliases, names = "", [], []
+        for part in part_captures:
+            part_range = capture_map[part.index]
+            if range.contains(part_range):
+                match part.part:
+                    case ImportPartType.MODULE:
+                        from_name = parse_from(src, part_range)
+                    case ImportPartType.ALIAS:
+                        aliases.append(parse_alias(src, part_range))
+                    case ImportPartType.NAME:
+                        names.append(parse_name(src, part_range))
+
+        stmts.append(LocalImportStmt(range, names, from_name, aliases))
+
+    return stmts
+
+
+def main(num_imports: int):
+    src = synthetic_imports(num_imports)
+    captures = import_captures(src)
+    print(f"{num_imports} imports, {len(captures[2])} import parts")
+
+    scan = bench(lambda: scan_import_parts(src, *captures), repeat=1)
+    sweep = bench(lambda: group_import_parts(src, *captures), repeat=5)
+    build = bench(lambda: build_scope_graph(src), repeat=3)
+
+    report("statements x parts scan", scan)
+    report("ordered sweep", sweep, baseline=scan)
+    report("build_scope_graph", build)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
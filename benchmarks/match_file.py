@@ -0,0 +1,34 @@
+"""
+Module lookup in RepoFs.match_file: suffix index vs the old linear scan
+
+    python -m benchmarks.match_file [repo_path]
+"""
+
+from pathlib import Path
+import sys
+
+from scope_graph.fs import RepoFs
+
+from tests.repo_graph.match_file_oracle import linear_match_file, module_paths
+
+from .utils import bench, report
+
+
+def main(repo_path: str):
+    fs = RepoFs(Path(repo_path))
+    queries = module_paths(fs)
+    print(f"{len(fs._all_paths)} paths, {len(queries)} lookups")
+
+    linear = bench(lambda: [linear_match_file(fs, q) for q in queries], repeat=3)
+    # clear the memoized matches so every run hits the index
+    indexed = bench(
+        lambda: (fs._match_cache.clear(), [fs.match_file(q) for q in queries]),
+        repeat=3,
+    )
+
+    report("linear scan", linear)
+    report("suffix index", indexed, baseline=linear)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else "tests/repos/codecov-cli-neuteured")
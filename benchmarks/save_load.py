@@ -0,0 +1,53 @@
+"""
+Startup cost of a RepoGraph: building it from source vs loading a saved graph,
+either mapped as CompactScopeGraphs or rebuilt as ScopeGraphs, and the query
+cost of the read only MappedRepoGraph
+
+    python -m benchmarks.save_load [repo_path]
+"""
+
+from pathlib import Path
+import sys
+import tempfile
+
+from scope_graph.repo_resolution.repo_graph import RepoGraph
+from scope_graph.repo_resolution.mapped_graph import MappedRepoGraph
+from scope_graph.scope_resolution.graph import ScopeGraph
+
+from .utils import bench, report
+
+
+def main(repo_path: str):
+    repo = Path(repo_path)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        saved = Path(tmp) / "repo.bin"
+
+        g = RepoGraph(repo)
+        g.save(saved)
+        print(f"{len(g.scopes_map)} files, {saved.stat().st_size / 1e6:.2f} MB saved")
+
+        build = bench(lambda: RepoGraph(repo), repeat=3)
+        load = bench(lambda: RepoGraph.load(saved), repeat=3)
+        report("build from source", build)
+        report("load", load, baseline=build)
+        report("open MappedRepoGraph", bench(lambda: MappedRepoGraph(saved)))
+
+        mapped = MappedRepoGraph(saved)
+        node_ids = [node.repo_id for node in g.nodes()]
+        networkx = bench(lambda: [g.import_to_export_scope(n) for n in node_ids])
+        report(f"import_to_export_scope x{len(node_ids)}", networkx)
+        report(
+            "  mapped",
+            bench(lambda: [mapped.import_to_export_scope(n) for n in node_ids]),
+            baseline=networkx,
+        )
+
+        # a single large file: ScopeGraph.load rebuilds the networkx graph
+        path = max(g.scopes_map, key=lambda p: len(g.scopes_map[p]._graph))
+        g.scopes_map[path].save(Path(tmp) / "file.bin")
+        report("ScopeGraph.load", bench(lambda: ScopeGraph.load(Path(tmp) / "file.bin")))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else "tests/repos/codecov-cli-neuteured")
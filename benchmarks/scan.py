@@ -0,0 +1,40 @@
+"""
+Repo scanning: Path.rglob vs the pruned os.scandir walk, and serial vs pooled
+reads of the source files
+
+    python -m benchmarks.scan [repo_path]
+"""
+
+from pathlib import Path
+import sys
+
+from scope_graph.fs import RepoFs, SRC_EXT
+
+from .utils import bench, report, report_throughput
+
+
+def rglob_paths(repo: Path):
+    return [p for p in repo.rglob("*") if p.suffix == SRC_EXT or p.is_dir()]
+
+
+def main(repo_path: str):
+    repo = Path(repo_path)
+    fs = RepoFs(repo)
+    num_paths = len(fs._all_paths)
+    num_bytes = sum(entry.size for entry in fs.scan())
+    print(f"{num_paths} paths, {num_bytes / 1e6:.2f} MB of source")
+
+    rglob = bench(lambda: rglob_paths(repo), repeat=3)
+    walk = bench(lambda: fs._get_all_paths(), repeat=3)
+    report("rglob", rglob)
+    report("scandir walk", walk, baseline=rglob)
+    print(f"{'':<40} {num_paths / walk:>10.0f} paths/s")
+
+    serial = bench(lambda: list(fs.get_files_content(workers=1)), repeat=3)
+    pooled = bench(lambda: list(fs.get_files_content(workers=8)), repeat=3)
+    report_throughput("serial reads", serial, num_bytes)
+    report_throughput("pooled reads, 8 threads", pooled, num_bytes)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else "tests/repos/codecov-cli-neuteured")
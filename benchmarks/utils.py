@@ -0,0 +1,26 @@
+from typing import Callable
+import time
+
+
+def bench(fn: Callable, repeat: int = 5) -> float:
+    """
+    Returns the best wall time of fn over repeat runs, in seconds
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def report(name: str, seconds: float, baseline: float = None):
+    line = f"{name:<40} {seconds * 1000:>10.3f} ms"
+    if baseline:
+        line += f"  ({baseline / seconds:.1f}x)"
+    print(line)
+
+
+def report_throughput(name: str, seconds: float, num_bytes: int):
+    print(f"{name:<40} {seconds * 1000:>10.3f} ms  {num_bytes / seconds / 1e6:.2f} MB/s")
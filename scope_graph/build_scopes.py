@@ -1,4 +1,4 @@
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple
 
 from scope_graph.scope_resolution import LocalScope, LocalDef, Reference, Scoping
 from scope_graph.scope_resolution.imports import (
@@ -7,7 +7,7 @@ from scope_graph.scope_resolution.imports import (
     parse_alias,
     parse_name,
 )
-from scope_graph.utils import TextRange
+from scope_graph.utils import RawRange
 from scope_graph.languages import LANG_PARSER
 from scope_graph.scope_resolution.graph import ScopeGraph
 
@@ -24,7 +24,66 @@ from scope_graph.config import PYTHON_SCM
 namespaces = ["class", "function", "parameter", "variable"]
 
 
+def group_import_parts(
+    src_bytes: bytearray,
+    capture_map: Dict[int, RawRange],
+    stmt_indices: List[int],
+    part_captures: List[LocalImportPartCapture],
+) -> List[LocalImportStmt]:
+    """
+    Assigns the import part captures to their statements. Captures are in
+    document order, so a part belongs to the last statement captured before it,
+    and a statement matched by several patterns shows up as repeated captures
+    of the same range that get merged into one
+    """
+    # (capture index, range), a statement matched by several patterns is
+    # captured once per match
+    stmts: List[Tuple[int, RawRange]] = []
+    for i in stmt_indices:
+        if stmts and capture_map[i] == stmts[-1][1]:
+            continue
+        stmts.append((i, capture_map[i]))
+
+    from_names = [""] * len(stmts)
+    names: List[List[str]] = [[] for _ in stmts]
+    aliases: List[List[Optional[str]]] = [[] for _ in stmts]
+
+    owner = -1
+    seen = set()
+    for part in part_captures:
+        while owner + 1 < len(stmts) and stmts[owner + 1][0] < part.index:
+            owner += 1
+
+        part_range = capture_map[part.index]
+        if owner < 0 or not stmts[owner][1].contains(part_range):
+            continue
+        # the same part captured again by another match of the statement
+        if (part.part, part_range) in seen:
+            continue
+        seen.add((part.part, part_range))
+
+        match part.part:
+            case ImportPartType.MODULE:
+                from_names[owner] = parse_from(src_bytes, part_range)
+            case ImportPartType.ALIAS:
+                # an alias follows the name it renames
+                if names[owner]:
+                    aliases[owner][-1] = parse_alias(src_bytes, part_range)
+            case ImportPartType.NAME:
+                names[owner].append(parse_name(src_bytes, part_range))
+                aliases[owner].append(None)
+
+    return [
+        LocalImportStmt(range, names[j], from_name=from_names[j], aliases=aliases[j])
+        for j, (_, range) in enumerate(stmts)
+    ]
+
+
 def build_scope_graph(src_bytes: bytearray, language: str = "python") -> ScopeGraph:
+    """
+    Builds the scope graph of a file. The scopes of all defs and refs are located
+    in a single pass instead of one interval query per capture
+    """
     parser = LANG_PARSER[language]
     query, root_node = parser._build_query(src_bytes, PYTHON_SCM)
 
@@ -34,16 +93,12 @@ def build_scope_graph(src_bytes: bytearray, language: str = "python") -> ScopeGr
     local_import_stmt_capture_indices: List = []
     local_import_part_capture: List[LocalImportPartCapture] = []
 
-    # capture_id -> range map
-    capture_map: Dict[int, TextRange] = {}
+    # capture_id -> range map, TextRanges are only built for the nodes that
+    # end up being queried for them
+    capture_map: Dict[int, RawRange] = {}
 
     for i, (node, capture_name) in enumerate(query.captures(root_node)):
-        capture_map[i] = TextRange(
-            start_byte=node.start_byte,
-            end_byte=node.end_byte,
-            start_point=node.start_point,
-            end_point=node.end_point,
-        )
+        capture_map[i] = RawRange.from_node(node)
 
         parts = capture_name.split(".")
         # print(node, capture_name, parts)
@@ -91,12 +146,7 @@ def build_scope_graph(src_bytes: bytearray, language: str = "python") -> ScopeGr
                 l = LocalImportPartCapture(index=i, part=part)
                 local_import_part_capture.append(l)
 
-    root_range = TextRange(
-        start_byte=root_node.start_byte,
-        end_byte=root_node.end_byte,
-        start_point=root_node.start_point,
-        end_point=root_node.end_point,
-    )
+    root_range = RawRange.from_node(root_node).to_range()
     scope_graph = ScopeGraph(root_range)
 
     # insert scopes first
@@ -104,38 +154,23 @@ def build_scope_graph(src_bytes: bytearray, language: str = "python") -> ScopeGr
         scope_graph.insert_local_scope(LocalScope(capture_map[i]))
 
     # insert imports
-    for i in local_import_stmt_capture_indices:
-        range = capture_map[i]
-        from_name, aliases, names = "", [], []
-        for part in local_import_part_capture:
-            part_range = capture_map[part.index]
-            if range.contains(part_range):
-                match part.part:
-                    case ImportPartType.MODULE:
-                        from_name = parse_from(src_bytes, part_range)
-                    case ImportPartType.ALIAS:
-                        aliases.append(parse_alias(src_bytes, part_range))
-                    case ImportPartType.NAME:
-                        names.append(parse_name(src_bytes, part_range))
-
-        import_stmt = LocalImportStmt(
-            range, names, from_name=from_name, aliases=aliases
-        )
+    for import_stmt in group_import_parts(
+        src_bytes,
+        capture_map,
+        local_import_stmt_capture_indices,
+        local_import_part_capture,
+    ):
         scope_graph.insert_local_import(import_stmt)
 
-    # insert defs
-    for def_capture in local_def_captures:
-        range = capture_map[def_capture.index]
-        local_def = LocalDef(range, src_bytes, def_capture.symbol)
-        match def_capture.scoping:
-            case Scoping.GLOBAL:
-                scope_graph.insert_global_def(local_def)
-            case Scoping.HOISTED:
-                scope_graph.insert_hoisted_def(local_def)
-            case Scoping.LOCAL:
-                scope_graph.insert_local_def(local_def)
-
-    # insert refs
+    local_defs = [
+        (
+            LocalDef(capture_map[def_capture.index], src_bytes, def_capture.symbol),
+            def_capture.scoping,
+        )
+        for def_capture in local_def_captures
+    ]
+
+    refs = []
     for local_ref_capture in local_ref_captures:
         index = local_ref_capture.index
         symbol = local_ref_capture.symbol
@@ -143,8 +178,8 @@ def build_scope_graph(src_bytes: bytearray, language: str = "python") -> ScopeGr
         range = capture_map[index]
         # if the symbol is present, is it one of the supported symbols for this language?
         symbol_id = symbol if symbol in namespaces else None
-        new_ref = Reference(range, src_bytes, symbol_id=symbol_id)
+        refs.append(Reference(range, src_bytes, symbol_id=symbol_id))
 
-        scope_graph.insert_ref(new_ref)
+    scope_graph.insert_batch(local_defs, refs)
 
     return scope_graph
@@ -0,0 +1,148 @@
+from pathlib import Path
+from typing import Dict, Optional
+import hashlib
+import pickle
+import sqlite3
+import time
+
+from scope_graph import __version__
+from scope_graph.config import (
+    PYTHON_SCM,
+    SCOPE_CACHE_MAX_BYTES,
+    SCOPE_CACHE_MAX_AGE,
+    SCOPE_GRAPH_FORMAT,
+)
+from scope_graph.scope_resolution.graph import ScopeGraph
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ScopeGraphCache:
+    """
+    Content addressed store of serialized ScopeGraphs, backed by a single SQLite
+    file. Entries are keyed by the hash of the file bytes, the query file, the
+    library version and the scope graph format, so edits to the .scm, an
+    upgrade or a change to the graphs built invalidate everything
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        query_file: str = PYTHON_SCM,
+        max_bytes: int = SCOPE_CACHE_MAX_BYTES,
+        max_age: float = SCOPE_CACHE_MAX_AGE,
+        graph_format: int = SCOPE_GRAPH_FORMAT,
+    ):
+        self.db_path = Path(db_path)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+        with open(query_file, "rb") as f:
+            self._salt = hashlib.sha256(
+                f.read()
+                + __version__.encode("utf-8")
+                + f"format={graph_format}".encode("utf-8")
+            ).digest()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS scope_graphs (
+                key TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                accessed REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+        # access times are flushed in batch by evict() rather than on every get
+        self._touched: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, src_bytes: bytes) -> str:
+        return hashlib.sha256(self._salt + src_bytes).hexdigest()
+
+    def get(self, key: str) -> Optional[ScopeGraph]:
+        row = self._conn.execute(
+            "SELECT data FROM scope_graphs WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.touch(key)
+        return pickle.loads(row[0])
+
+    def touch(self, key: str):
+        self._touched[key] = time.time()
+
+    def put(self, key: str, g: ScopeGraph):
+        data = pickle.dumps(g, protocol=pickle.HIGHEST_PROTOCOL)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO scope_graphs VALUES (?, ?, ?, ?)",
+            (key, data, len(data), time.time()),
+        )
+
+    def get_or_build(self, src_bytes: bytes, build) -> ScopeGraph:
+        """
+        Returns the cached graph for src_bytes, calling build(src_bytes) on a miss
+        """
+        key = self.key(src_bytes)
+        g = self.get(key)
+        if g is None:
+            g = build(src_bytes)
+            self.put(key, g)
+
+        return g
+
+    def size(self) -> int:
+        return self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM scope_graphs"
+        ).fetchone()[0]
+
+    def evict(self):
+        """
+        Drops entries older than max_age, then the least recently used entries
+        until the cache fits in max_bytes
+        """
+        self._conn.executemany(
+            "UPDATE scope_graphs SET accessed = ? WHERE key = ?",
+            [(accessed, key) for key, accessed in self._touched.items()],
+        )
+        self._touched.clear()
+
+        if self.max_age is not None:
+            self._conn.execute(
+                "DELETE FROM scope_graphs WHERE accessed < ?",
+                (time.time() - self.max_age,),
+            )
+
+        if self.max_bytes is not None:
+            total = self.size()
+            if total > self.max_bytes:
+                evicted = []
+                for key, size in self._conn.execute(
+                    "SELECT key, size FROM scope_graphs ORDER BY accessed ASC"
+                ):
+                    if total <= self.max_bytes:
+                        break
+                    evicted.append((key,))
+                    total -= size
+
+                logger.debug(f"Evicting {len(evicted)} scope graphs")
+                self._conn.executemany(
+                    "DELETE FROM scope_graphs WHERE key = ?", evicted
+                )
+
+        self._conn.commit()
+
+    def close(self):
+        self.evict()
+        self._conn.close()
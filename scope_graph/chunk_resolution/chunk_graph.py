@@ -1,17 +1,21 @@
-from networkx import DiGraph, node_link_graph
+from networkx import DiGraph, node_link_data, node_link_graph
 from pathlib import Path
 from llama_index.core.schema import BaseNode
-from typing import List, Tuple, Dict
+from llama_index.core.utils import get_tqdm_iterable
+from typing import List, Tuple, Dict, Optional
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
 import os
 
-# from scope_graph.scope_resolution.interval_tree import IntervalGraph
-from scope_graph.scope_resolution.capture_refs import capture_refs
+# from scope_graph.scope_resolution.scope_index import ScopeIndex
 from scope_graph.scope_resolution.graph_types import ScopeID
-from scope_graph.repo_resolution.repo_graph import RepoGraph, RepoNodeID, repo_node_id
+from scope_graph.repo_resolution.repo_graph import RepoGraph, RepoNodeID
 from scope_graph.fs import RepoFs
+from scope_graph.cache import ScopeGraphCache
 from scope_graph.utils import TextRange
 
 from .graph import ChunkMetadata, ChunkNode, EdgeKind
+from .chunk_index import ChunkIndex
 from .cluster import cluster_leiden, cluster_infomap
 
 import logging
@@ -21,30 +25,90 @@ from collections import defaultdict
 logger = logging.getLogger(__name__)
 
 
+# per process state for from_chunks(workers=N), inherited from the parent
+# through fork rather than pickled
+_worker_graph: "ChunkGraph" = None
+_worker_chunks: List[ChunkNode] = None
+
+
+def _init_worker(graph: "ChunkGraph", chunks: List[ChunkNode]):
+    global _worker_graph, _worker_chunks
+
+    _worker_graph = graph
+    _worker_chunks = chunks
+
+
+def _build_file_edges(chunk_idxs: List[int]) -> List[List[str]]:
+    """
+    Resolves the edges of the chunks of a single file inside a worker process,
+    returned as the dst chunk ids of each chunk
+    """
+    return [_worker_graph._chunk_edges(_worker_chunks[i]) for i in chunk_idxs]
+
+
 class ChunkGraph:
-    def __init__(self, repo_path: Path, g: DiGraph):
-        self.fs = RepoFs(repo_path)
+    def __init__(
+        self,
+        repo_path: Path,
+        g: DiGraph,
+        repo_graph: Optional[RepoGraph] = None,
+        cache: Optional[ScopeGraphCache] = None,
+    ):
+        self._repo_path = repo_path
+        # the graph only holds chunk ids, the nodes themselves live in _nodes
         self._graph = g
-        self._repo_graph = RepoGraph(repo_path)
-        self._file2scope = defaultdict(set)
-        self._chunkmap: Dict[Path, List[ChunkNode]] = defaultdict(list)
+        self._nodes: Dict[str, ChunkNode] = {}
+        # built on first use if not given, with cache passed on to it
+        self._repo_graph = repo_graph
+        self._cache = cache
+        # keyed by the file ids of the RepoGraph
+        self._file2scope: Dict[int, set[ScopeID]] = defaultdict(set)
+        self._chunkmap: Dict[int, List[ChunkNode]] = defaultdict(list)
+        # built on first lookup into a file, dropped when a chunk is added to it
+        self._chunk_indexes: Dict[int, ChunkIndex] = {}
+
+    @property
+    def repo_graph(self) -> RepoGraph:
+        """
+        The RepoGraph the chunks are resolved against. Only built when first
+        needed, so a ChunkGraph loaded with from_json does not parse the repo
+        unless it is queried
+        """
+        if self._repo_graph is None:
+            self._repo_graph = RepoGraph(self._repo_path, cache=self._cache)
+        return self._repo_graph
+
+    @property
+    def fs(self) -> RepoFs:
+        # the scan of the RepoGraph, so the repo is only walked once
+        return self.repo_graph.fs
 
     # TODO: design decisions
     # turn import => export mapping into a function
-    # implement tqdm for chunk by chunk processing
     @classmethod
-    def from_chunks(cls, repo_path: Path, chunks: List[BaseNode]):
+    def from_chunks(
+        cls,
+        repo_path: Path,
+        chunks: List[BaseNode],
+        repo_graph: Optional[RepoGraph] = None,
+        cache: Optional[ScopeGraphCache] = None,
+        workers: int = 1,
+        show_progress: bool = False,
+    ):
         """
         Build chunk (import) to chunk (export) mapping by associating a chunk with
         the list of scopes, and then using the scope -> scope mapping provided in RepoGraph
-        to resolve the exports
+        to resolve the exports. Pass repo_graph to reuse a graph the caller
+        already has, eg. one from RepoGraph.load. With workers > 1 the edges
+        are resolved over a process pool, see _build_parallel
         """
         g = DiGraph()
-        cg: ChunkGraph = cls(repo_path, g)
+        cg: ChunkGraph = cls(repo_path, g, repo_graph=repo_graph, cache=cache)
         cg._file2scope = defaultdict(set)
 
         # used to map range to chunks
         chunk_names = set()
+        chunk_nodes: List[ChunkNode] = []
 
         for i, chunk in enumerate(chunks, start=1):
             metadata = ChunkMetadata(**chunk.metadata)
@@ -57,79 +121,179 @@ class ChunkGraph:
                 content=chunk.get_content(),
             )
             cg.add_node(chunk_node)
+            chunk_nodes.append(chunk_node)
 
-            cg._chunkmap[Path(metadata.file_path)].append(chunk_node)
+            cg._add_chunk(cg._file_id(metadata.file_path), chunk_node)
 
         # shouldnt really happen but ...
         if len(chunk_names) != len(chunks):
             raise ValueError("Collision has occurred in chunk names")
 
         # main loop to build graph
-        for chunk_node in cg.get_all_nodes():
+        if workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+            chunk_edges = cg._build_parallel(chunk_nodes, workers, show_progress)
+        else:
+            if workers > 1:
+                logger.warning("fork is not available, building chunk edges serially")
+
             # chunk -> range -> scope
-            cg.build_import_exports(chunk_node)
+            chunk_edges = map(
+                cg._chunk_edges,
+                get_tqdm_iterable(chunk_nodes, show_progress, "Building chunk edges"),
+            )
+
+        # edges are added in chunk order either way, so the graph is the same
+        for chunk_node, dst_ids in zip(chunk_nodes, chunk_edges):
+            cg._add_edges(chunk_node, dst_ids)
 
         for f, scopes in cg._file2scope.items():
-            all_scopes = cg._repo_graph.scopes_map[f].scopes()
+            all_scopes = cg.repo_graph.get_scope_graph(f).scopes()
             all_scopes = set(all_scopes)
 
             unresolved = all_scopes - scopes
-            print("Missing scopes: ", unresolved, " in ", f)
+            print(
+                "Missing scopes: ", unresolved, " in ", cg.repo_graph.files.path(f)
+            )
 
         return cg
 
     @classmethod
-    def from_json(cls, repo_path: Path, json_data: Dict):
-        cg = node_link_graph(json_data)
+    def from_json(
+        cls,
+        repo_path: Path,
+        json_data: Dict,
+        repo_graph: Optional[RepoGraph] = None,
+        cache: Optional[ScopeGraphCache] = None,
+    ):
+        """
+        Loads a graph saved with to_json. Only deserializes, the repo is not
+        scanned or parsed until repo_graph is needed
+        """
+        g = node_link_graph(json_data)
+        cg = cls(repo_path, g, repo_graph=repo_graph, cache=cache)
 
-        return cls(repo_path, cg)
+        # node_link_data writes the node attrs next to the id, move them out of
+        # the graph into the ChunkNodes
+        for node_id, attrs in g.nodes(data=True):
+            attrs.pop("id", None)
+            cg._nodes[node_id] = ChunkNode(id=node_id, **attrs)
+            attrs.clear()
+
+        return cg
+
+    def to_json(self) -> Dict:
+        """
+        The graph in node_link_data form, with the ChunkNodes as node attrs
+        """
+        json_data = node_link_data(self._graph)
+        for node in json_data["nodes"]:
+            node.update(self._nodes[node["id"]].dict())
+
+        return json_data
 
     def to_nodes(self, cluster: bool = True):
         if cluster:
             chunk2clusters, cluster2chunks = self.cluster()
             for cluster, chunks in cluster2chunks.items():
-                for node in chunks:
+                for node_id in chunks:
                     # create a new node representing the cluster
-                    node.set_community(chunk2clusters[node.id])
+                    self._nodes[node_id].set_community(chunk2clusters[node_id])
 
         return self.get_all_nodes()
 
-    def get_node(self, node_id: str) -> ChunkNode:
-        data = self._graph._node[node_id]
-
-        # BUG: hacky fix but for some reason node_link_data stores
-        # the data wihtout id
-        if data.get("id", None):
-            del data["id"]
+    def _file_id(self, file_path: str) -> int:
+        """
+        The id of a chunk's file in the RepoGraph's FileTable. Chunk paths are
+        usually already resolved, so the str lookup saves resolving them
+        """
+        file_id = self.repo_graph.files.get_id(file_path)
+        if file_id is None:
+            file_id = self.repo_graph.fs.file_id(Path(file_path))
+        return file_id
 
-        return ChunkNode(id=node_id, **self._graph._node[node_id])
+    def get_node(self, node_id: str) -> ChunkNode:
+        return self._nodes[node_id]
 
     def get_all_nodes(self) -> List[ChunkNode]:
-        return [self.get_node(n) for n in self._graph.nodes]
+        return [self._nodes[n] for n in self._graph.nodes]
 
     def add_node(self, chunk_node: ChunkNode):
-        id = chunk_node.id
-        self._graph.add_node(id, **chunk_node.dict())
+        self._nodes[chunk_node.id] = chunk_node
+        self._graph.add_node(chunk_node.id)
 
     def update_node(self, chunk_node: ChunkNode):
-        self._graph.add_node(chunk_node)
+        self._nodes[chunk_node.id] = chunk_node
+
+    def _build_parallel(
+        self, chunk_nodes: List[ChunkNode], workers: int, show_progress: bool
+    ) -> List[List[str]]:
+        """
+        Fans the edges of the chunks out over a process pool, one task per file.
+        The workers are forked after the RepoGraph is built, so they share it
+        with the parent instead of receiving a pickled copy, and hand back
+        plain edge lists that are put back in chunk order
+        """
+        # build the shared state before forking
+        self.repo_graph
+
+        files: Dict[int, List[int]] = defaultdict(list)
+        for i, chunk_node in enumerate(chunk_nodes):
+            files[self._file_id(chunk_node.metadata.file_path)].append(i)
+
+        file_chunks = list(files.values())
+        chunksize = max(1, len(file_chunks) // (workers * 4))
+
+        chunk_edges: List[List[str]] = [None] * len(chunk_nodes)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_init_worker,
+            initargs=(self, chunk_nodes),
+        ) as pool:
+            results = pool.map(_build_file_edges, file_chunks, chunksize=chunksize)
+            for chunk_idxs, file_edges in zip(
+                file_chunks,
+                get_tqdm_iterable(results, show_progress, "Building chunk edges"),
+            ):
+                for i, dst_ids in zip(chunk_idxs, file_edges):
+                    chunk_edges[i] = dst_ids
+
+        return chunk_edges
 
     def build_import_exports(self, chunk_node: ChunkNode):
         """
         Build the import to export mapping for a chunk
         need to do: import (chunk -> range -> scope) -> export (scope -> range -> chunk)
         """
-        file_path = Path(chunk_node.metadata.file_path)
-        scope_graph = self._repo_graph.scopes_map[file_path]
-        chunk_refs = capture_refs(chunk_node.content.encode())
+        self._add_edges(chunk_node, self._chunk_edges(chunk_node))
 
-        for ref in chunk_refs:
-            # range -> scope
-            ref_scope = scope_graph.scope_by_range(ref.range)
-            # scope (import) -> scope (export)
-            export_scopes = self._repo_graph.import_to_export_scope(
-                repo_node_id(file_path, ref_scope)
+    def _add_edges(self, chunk_node: ChunkNode, dst_ids: List[str]):
+        for dst_id in dst_ids:
+            self._graph.add_edge(chunk_node.id, dst_id, kind=EdgeKind.ImportToExport)
+
+    def _chunk_edges(self, chunk_node: ChunkNode) -> List[str]:
+        """
+        Returns the ids of the chunks that the chunk imports from, without
+        touching the graph
+        """
+        file_id = self._file_id(chunk_node.metadata.file_path)
+        scope_graph = self.repo_graph.get_scope_graph(file_id)
+
+        # the refs of the chunk are sliced out of the file's scope graph by line,
+        # refs in the same scope share their exports so each scope is looked up
+        # once
+        chunk_range = chunk_node.range
+        ref_scopes = dict.fromkeys(
+            scope
+            for _, scope in scope_graph.references_by_lines(
+                chunk_range.start_point.row, chunk_range.end_point.row
             )
+        )
+
+        exports: List[Tuple[ScopeID, int, Tuple[int, int]]] = []
+        for ref_scope in ref_scopes:
+            # scope (import) -> scope (export)
+            export_scopes = self.repo_graph.scope_exports(file_id, ref_scope)
 
             print("Export scope len: ", len(export_scopes))
 
@@ -138,36 +302,60 @@ class ChunkGraph:
             # 1. can resolve range here using the scope
             # 2. can resolve range when RepoNode is constructed
             # Favor 1. since we can use repo_graph for both scope->range and range->scope
-            for export_scope, export_sg in [
-                (node.scope, self._repo_graph.scopes_map[Path(node.file_path)])
-                for node in export_scopes
-            ]:
-                export_range = export_sg.range_by_scope(export_scope)
-                dst_chunk = self.find_chunk(file_path, export_range)
-                if dst_chunk:
-                    print("Adding edge: ", ref_scope, " -> ", dst_chunk.id)
-                    self._graph.add_edge(
-                        chunk_node.id, dst_chunk.id, kind=EdgeKind.ImportToExport
-                    )
-
-    # TODO: should really use IntervalGraph here but chunks are small enough
-    def find_chunk(self, file_path: Path, range: TextRange):
+            for node in export_scopes:
+                export_sg = self.repo_graph.get_scope_graph(node.file_id)
+                export_range = export_sg.range_by_scope(node.scope).line_range()
+                exports.append((ref_scope, node.file_id, export_range))
+
+        # the chunks of the export ranges are looked up in bulk, per file
+        export_files: Dict[int, List[int]] = defaultdict(list)
+        for i, (_, export_file, _) in enumerate(exports):
+            export_files[export_file].append(i)
+
+        dst_chunks: List[Optional[ChunkNode]] = [None] * len(exports)
+        for export_file, idxs in export_files.items():
+            found = self.find_chunks(export_file, [exports[i][2] for i in idxs])
+            for i, dst_chunk in zip(idxs, found):
+                dst_chunks[i] = dst_chunk
+
+        dst_ids = []
+        for (ref_scope, _, _), dst_chunk in zip(exports, dst_chunks):
+            if dst_chunk:
+                print("Adding edge: ", ref_scope, " -> ", dst_chunk.id)
+                dst_ids.append(dst_chunk.id)
+
+        return dst_ids
+
+    def _add_chunk(self, file_id: int, chunk_node: ChunkNode):
+        self._chunkmap[file_id].append(chunk_node)
+        self._chunk_indexes.pop(file_id, None)
+
+    def _chunk_index(self, file_id: int) -> ChunkIndex:
+        index = self._chunk_indexes.get(file_id, None)
+        if index is None:
+            index = self._chunk_indexes[file_id] = ChunkIndex(
+                self._chunkmap.get(file_id, [])
+            )
+        return index
+
+    def find_chunk(self, file_id: int, range: TextRange) -> Optional[ChunkNode]:
         """
-        Find a chunk given a range
+        Find the chunk of a file, given by id, that contains a range
         """
-        chunks = self._chunkmap[file_path]
-        for chunk in chunks:
-            if chunk.range.contains_line(range):
-                return chunk
+        return self._chunk_index(file_id).find(*range.line_range())
 
-        return None
+    def find_chunks(
+        self, file_id: int, ranges: List[Tuple[int, int]]
+    ) -> List[Optional[ChunkNode]]:
+        """
+        Same as find_chunk for many (start row, end row) ranges of one file
+        """
+        return self._chunk_index(file_id).find_many(ranges)
 
     def to_str(self):
         repr = ""
-        for u, v, _ in self._graph.edges(data=True):
-            u_node = self.get_node(u)
-            v_node = self.get_node(v)
-            repr += f"{u_node} -> {v_node}\n"
+        for u, v in self._graph.edges:
+            repr += f"{self._nodes[u]} -> {self._nodes[v]}\n"
         return repr
 
     def cluster(
@@ -200,7 +388,7 @@ class ChunkGraph:
     def _get_classes_and_funcs(
         self, file_path: Path, scope_id: ScopeID
     ) -> List[RepoNodeID]:
-        def_nodes = self._repo_graph.scopes_map[file_path].definitions(scope_id)
+        def_nodes = self.repo_graph.scopes_map[file_path].definitions(scope_id)
 
         return list(
             filter(lambda d: d.data["def_type"] in ["class", "function"], def_nodes)
@@ -208,7 +396,7 @@ class ChunkGraph:
 
     ##### For debugging ####!SECTION
     def nodes(self):
-        return self._graph.nodes(data=True)
+        return [(n, self._nodes[n]) for n in self._graph.nodes]
 
     # def get_import_refs(
     #     self, unresolved_refs: set[str], file_path: Path, scopes: List[ScopeID]
@@ -0,0 +1,56 @@
+from array import array
+from bisect import bisect_right
+from typing import List, Optional, Sequence, Tuple
+
+from .graph import ChunkNode
+
+
+class ChunkIndex:
+    """
+    Chunk lookups by line for the chunks of a file. Chunks are kept sorted by
+    start row as parallel start/end arrays, along with the running max of the
+    ends, so a lookup bisects for the last chunk starting before the range and
+    only walks back while an earlier chunk could still reach past its end. For
+    chunks that don't overlap, as produced by the splitters, that is one step
+    """
+
+    def __init__(self, chunks: Sequence[ChunkNode]):
+        rows = [chunk.line_range for chunk in chunks]
+        # among chunks starting on the same row the widest sorts first, so the
+        # narrowest one is found first
+        order = sorted(range(len(chunks)), key=lambda i: (rows[i][0], -rows[i][1]))
+
+        self._chunks: List[ChunkNode] = [chunks[i] for i in order]
+        self._starts = array("q", [rows[i][0] for i in order])
+        self._ends = array("q", [rows[i][1] for i in order])
+        self._max_ends = array("q", self._ends)
+        for i in range(1, len(self._max_ends)):
+            self._max_ends[i] = max(self._max_ends[i], self._max_ends[i - 1])
+
+    def __len__(self):
+        return len(self._chunks)
+
+    def find(self, start_row: int, end_row: int) -> Optional[ChunkNode]:
+        """
+        Returns the chunk containing the rows that starts last, ie. the
+        innermost one if chunks are nested
+        """
+        return self._find(bisect_right(self._starts, start_row) - 1, end_row)
+
+    def _find(self, pos: int, end_row: int) -> Optional[ChunkNode]:
+        while pos >= 0 and self._max_ends[pos] >= end_row:
+            if self._ends[pos] >= end_row:
+                return self._chunks[pos]
+            pos -= 1
+
+        return None
+
+    def find_many(
+        self, ranges: Sequence[Tuple[int, int]]
+    ) -> List[Optional[ChunkNode]]:
+        """
+        Same as find for every (start row, end row), without the per call
+        overhead
+        """
+        starts, find = self._starts, self._find
+        return [find(bisect_right(starts, start) - 1, end) for start, end in ranges]
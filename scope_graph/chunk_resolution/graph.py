@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import List, Optional, NewType
+from typing import List, Optional, NewType, Tuple
 from pydantic.dataclasses import dataclass
 
 from scope_graph.scope_resolution.graph import Node
@@ -30,13 +30,20 @@ class ChunkNode(Node):
 
     @property
     def range(self):
+        start_row, end_row = self.line_range
         return TextRange(
             start_byte=0,
             end_byte=0,
-            start_point=(self.metadata.start_line, 0),
-            end_point=(self.metadata.end_line, 0),
+            start_point=(start_row, 0),
+            end_point=(end_row, 0),
         )
 
+    @property
+    def line_range(self) -> Tuple[int, int]:
+        # chunk lines are 1-based and inclusive, rows are 0-based like the
+        # ranges of the scope graphs
+        return self.metadata.start_line - 1, self.metadata.end_line - 1
+
     def set_community(self, community: int):
         self.metadata.community = community
 
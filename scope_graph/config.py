@@ -15,3 +15,18 @@ SYS_MODULES_LIST = "scope_graph/languages/{lang}/sys_modules.json".format(lang=L
 THIRD_PARTY_MODULES_LIST = (
     "scope_graph/languages/{lang}/third_party_modules.json".format(lang=LANGUAGE)
 )
+
+# on-disk scope graph cache
+# version of what build_scope_graph produces and ScopeGraph.__getstate__ pickles,
+# part of the cache key. Bump it whenever either changes so that old entries
+# miss instead of returning stale graphs:
+# 2 byte based scope ranges, 3 lazy ranges, 4 import/alias captures
+SCOPE_GRAPH_FORMAT = 4
+SCOPE_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+SCOPE_CACHE_MAX_AGE = 30 * 24 * 60 * 60
+
+# repo scanning, directories and files matching these globs are never walked
+SCAN_EXCLUDES = [".git", "node_modules", "__pycache__", ".venv", "venv", ".tox"]
+# threads reading source files, reads from a warm page cache are faster on a
+# single thread so only raise this for cold caches or network filesystems
+READ_WORKERS = 1
@@ -0,0 +1,69 @@
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Optional, TypeVar
+
+V = TypeVar("V")
+
+
+class FileTable:
+    """
+    Interns the resolved paths of a repo's files as small ints, in the order
+    they are first seen, ie. scan order for RepoFs. Ids are never reused, so
+    they stay valid while files come and go. Lookups go through the path str,
+    so callers holding a str never have to build a Path
+    """
+
+    def __init__(self):
+        self._paths: List[Path] = []
+        self._strs: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+    def intern(self, path: Path | str) -> int:
+        path_str = str(path)
+        file_id = self._ids.get(path_str, None)
+        if file_id is None:
+            file_id = self._ids[path_str] = len(self._paths)
+            self._paths.append(Path(path))
+            self._strs.append(path_str)
+
+        return file_id
+
+    def get_id(self, path: Path | str) -> Optional[int]:
+        return self._ids.get(str(path), None)
+
+    def path(self, file_id: int) -> Path:
+        return self._paths[file_id]
+
+    def path_str(self, file_id: int) -> str:
+        return self._strs[file_id]
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __contains__(self, path: object) -> bool:
+        return str(path) in self._ids
+
+
+class FileMap(Mapping[Path, V]):
+    """
+    Path keyed, read only view of a dict keyed by file id, for handing the id
+    keyed state of a graph out at the API boundary
+    """
+
+    def __init__(self, files: FileTable, data: Dict[int, V]):
+        self._files = files
+        self._data = data
+
+    def __getitem__(self, path: Path | str) -> V:
+        file_id = self._files.get_id(path)
+        if file_id is None or file_id not in self._data:
+            raise KeyError(path)
+        return self._data[file_id]
+
+    def __contains__(self, path: object) -> bool:
+        return self._files.get_id(path) in self._data
+
+    def __iter__(self) -> Iterator[Path]:
+        return (self._files.path(file_id) for file_id in self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -1,7 +1,14 @@
 from pathlib import Path
-from typing import Iterator, Tuple
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+import os
+import time
 
-from scope_graph.config import FILE_GLOB_ENDING, LANGUAGE
+from scope_graph.config import FILE_GLOB_ENDING, LANGUAGE, SCAN_EXCLUDES, READ_WORKERS
+from scope_graph.file_table import FileTable
+from scope_graph.ignore import IgnoreRules
+from scope_graph.git_changes import Manifest, changes_since, worktree_manifest
 from scope_graph.repo_resolution.namespace import NameSpace
 
 import logging
@@ -10,6 +17,16 @@ logger = logging.getLogger(__name__)
 
 SRC_EXT = FILE_GLOB_ENDING[LANGUAGE]
 
+ModuleKey = Tuple[str, ...]
+# posix dir relative to the repo -> (whether the walk skips it, rules inside it)
+DirRules = Dict[str, Tuple[bool, Optional[IgnoreRules]]]
+
+
+class FileEntry(NamedTuple):
+    path: Path
+    size: int
+    mtime: float
+
 
 # TODO: replace with the lama implementation or something
 class RepoFs:
@@ -17,41 +34,386 @@ class RepoFs:
     Handles all the filesystem operations
     """
 
-    def __init__(self, repo_path: Path):
+    def __init__(
+        self,
+        repo_path: Path,
+        exclude: Optional[List[str]] = None,
+        gitignore: bool = True,
+    ):
         self.path = repo_path
-        self._all_paths = self._get_all_paths()
+        self._exclude = SCAN_EXCLUDES if exclude is None else exclude
+        self._gitignore = gitignore
+
+        # size and mtime of the source files seen by the last scan
+        self._file_stats: Dict[Path, FileEntry] = {}
+        # ids of the source files, shared with the graphs built from this fs
+        self.files = FileTable()
+        self._set_paths(self._get_all_paths())
+
+    @classmethod
+    def from_paths(
+        cls,
+        repo_path: Path,
+        paths: List[Path],
+        file_stats: Dict[Path, FileEntry],
+        exclude: Optional[List[str]] = None,
+        gitignore: bool = True,
+        files: Optional[FileTable] = None,
+        path_ids: Optional[Dict[Path, int]] = None,
+    ) -> "RepoFs":
+        """
+        Restores a RepoFs from the results of an earlier scan, ie. paths and
+        file_stats in the form RepoFs(repo_path) produces them, without walking
+        the repo. The file ids of the source paths are restored too if given,
+        otherwise they are assigned in scan order
+        """
+        fs = cls.__new__(cls)
+        fs.path = repo_path
+        fs._exclude = SCAN_EXCLUDES if exclude is None else exclude
+        fs._gitignore = gitignore
+        fs._file_stats = file_stats
+        fs.files = files if files is not None else FileTable()
+        fs._set_paths(paths, path_ids)
+
+        return fs
+
+    def _set_paths(
+        self, all_paths: List[Path], path_ids: Optional[Dict[Path, int]] = None
+    ):
+        self._all_paths = all_paths
+        self._path_set = set(self._all_paths)
+
+        # scanned source path -> file id, so ids are resolved once per file
+        if path_ids is None:
+            path_ids = {
+                p: self.files.intern(p.resolve())
+                for p in all_paths
+                if p.suffix == SRC_EXT
+            }
+        self._path_ids: Dict[Path, int] = path_ids
+
+        # trailing module parts -> first path in scan order that ends with them
+        self._module_index: Dict[ModuleKey, Path] = {}
+        # module name -> all paths with that name in scan order, used to find the
+        # next candidate for a key when its path gets removed
+        self._name_index: Dict[str, List[Path]] = defaultdict(list)
+        self._match_cache: Dict[ModuleKey, Path] = {}
+
+        for path in self._all_paths:
+            self._index_path(path)
 
         # TODO: fix this later to actually parse the Paths
 
-    def get_files_content(self) -> Iterator[Tuple[Path, bytes]]:
+    def file_id(self, path: Path) -> int:
+        """
+        The id of a source file, given either as produced by the scan or as any
+        other path to it
+        """
+        file_id = self._path_ids.get(path, None)
+        if file_id is None:
+            file_id = self.files.intern(path.resolve())
+        return file_id
+
+    def get_files(self) -> Iterator[Path]:
         for file in self._all_paths:
             if file.suffix == SRC_EXT:
+                yield file
+
+    def get_files_content(
+        self, workers: int = READ_WORKERS
+    ) -> Iterator[Tuple[Path, bytes]]:
+        """
+        Yields the source files in scan order, read ahead by a bounded pool of
+        threads so that at most 2 * workers files are held in memory
+        """
+        files = self.get_files()
+        if workers <= 1:
+            for file in files:
                 yield file, file.read_bytes()
+            return
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for file in files:
+                pending.append((file, pool.submit(file.read_bytes)))
+                if len(pending) >= 2 * workers:
+                    file, content = pending.popleft()
+                    yield file, content.result()
+
+            while pending:
+                file, content = pending.popleft()
+                yield file, content.result()
+
+    def manifest(self) -> Manifest:
+        """
+        Git blob hashes of the source files in the work tree, can be stored and
+        passed to changes_since on a later run
+        """
+        dirs = {}
+        return {
+            path: blob
+            for path, blob in worktree_manifest(self.path).items()
+            if self._is_source(path, dirs)
+        }
+
+    def changes_since(
+        self, base: Optional[str] = None, manifest: Optional[Manifest] = None
+    ) -> Tuple[List[Path], List[Path]]:
+        """
+        Source files changed (added or modified) and deleted since either a base
+        commit or a stored manifest, computed from the local git object database
+        """
+        changes = changes_since(self.path, base=base, manifest=manifest)
+
+        dirs = {}
+        changed = [self.path / p for p in changes.changed if self._is_source(p, dirs)]
+        # deleted files can't be matched against the .gitignores they were under
+        deleted = [
+            self.path / p
+            for p in changes.deleted
+            if os.path.splitext(p)[1] == SRC_EXT
+        ]
+
+        return changed, deleted
+
+    def scan(self) -> Iterator[FileEntry]:
+        """
+        Lazily walks the repo, yielding the source files that are not excluded
+        """
+        for path, is_dir, stat in self._walk():
+            if not is_dir:
+                yield FileEntry(path, stat.st_size, stat.st_mtime)
 
     # TODO: need to account for relative paths
     # we miss the following case:
     # - import a => will match any file in the repo that ends with "a"
-    def match_file(self, ns_path: Path) -> Path:
+    def match_file(self, ns_path: Path) -> Optional[Path]:
         """
         Given a file abc/xyz, check if it exists in all_paths
         even if the abc is not aligned with the root of the path
         """
+        key = ns_path.parts
+        if key in self._match_cache:
+            return self._match_cache[key]
 
-        for path in self._all_paths:
-            path_name = path.name.replace(SRC_EXT, "")
-            match_path = list(path.parts[-len(ns_path.parts) : -1]) + [path_name]
+        path = self._module_index.get(key, None)
+        if path is None:
+            return None
+
+        if path.suffix == SRC_EXT:
+            match = path.resolve()
+        else:
+            match = (path / "__init__.py").resolve()
+
+        self._match_cache[key] = match
+        return match
+
+    def add_paths(self, paths: List[Path]):
+        """
+        Registers new source files along with any of their parent directories
+        that are not yet known
+        """
+        for path in paths:
+            path = self._to_repo_path(path)
+            for p in reversed([path] + list(path.parents)):
+                if p not in self._path_set and p != self.path and self.path in p.parents:
+                    self._path_set.add(p)
+                    self._all_paths.append(p)
+                    self._index_path(p)
+
+            if path.suffix == SRC_EXT and path.is_file():
+                try:
+                    stat = path.stat()
+                except OSError as e:
+                    logger.warning(f"Could not stat {path}: {e}")
+                    continue
+                self._file_stats[path] = FileEntry(path, stat.st_size, stat.st_mtime)
+                self._path_ids[path] = self.files.intern(path.resolve())
 
-            if match_path == list(ns_path.parts):
-                if path.suffix == SRC_EXT:
-                    return path.resolve()
-                elif path.is_dir():
-                    return (path / "__init__.py").resolve()
+    def remove_paths(self, paths: List[Path]):
+        removed = {self._to_repo_path(p) for p in paths} & self._path_set
+        if not removed:
+            return
 
-        return None
+        self._all_paths = [p for p in self._all_paths if p not in removed]
+        self._path_set -= removed
+        self._match_cache.clear()
+        for path in removed:
+            self._file_stats.pop(path, None)
+            # the id stays in the table, it is not reused
+            self._path_ids.pop(path, None)
+
+        for path in removed:
+            name = self._module_name(path)
+            self._name_index[name] = [p for p in self._name_index[name] if p != path]
+
+            # hand each key owned by the removed path to the next candidate
+            for key in self._module_keys(path):
+                if self._module_index.get(key, None) != path:
+                    continue
+
+                del self._module_index[key]
+                for candidate in self._name_index[name]:
+                    if key in self._module_keys(candidate):
+                        self._module_index[key] = candidate
+                        break
+
+    def _is_source(self, rel_path: str, dirs: Optional[DirRules] = None) -> bool:
+        return os.path.splitext(rel_path)[1] == SRC_EXT and not self._ignored(
+            rel_path, dirs
+        )
+
+    def _ignored(self, rel_path: str, dirs: Optional[DirRules] = None) -> bool:
+        """
+        Whether the walk skips rel_path, a posix path relative to the repo. dirs
+        keeps the rules of the directories already seen, so checking many paths
+        reads each .gitignore once
+        """
+        if dirs is None:
+            dirs = {}
+
+        rel_dir, _, name = rel_path.rpartition("/")
+        ignored, rules = self._dir_rules(rel_dir, dirs)
+        return ignored or bool(rules and rules.ignored(rel_path, name, False))
+
+    def _dir_rules(
+        self, rel_dir: str, dirs: DirRules
+    ) -> Tuple[bool, Optional[IgnoreRules]]:
+        """
+        Whether the walk skips the directory rel_dir, and the rules that apply
+        inside of it
+        """
+        if rel_dir in dirs:
+            return dirs[rel_dir]
+
+        if rel_dir:
+            parent, _, name = rel_dir.rpartition("/")
+            ignored, rules = self._dir_rules(parent, dirs)
+            ignored = ignored or bool(rules and rules.ignored(rel_dir, name, True))
+        else:
+            ignored = False
+            rules = IgnoreRules("", self._exclude) if self._exclude else None
+
+        gitignore = self.path / rel_dir / ".gitignore"
+        if not ignored and self._gitignore and gitignore.is_file():
+            rules = IgnoreRules.from_file(gitignore, rel_dir, rules)
+
+        dirs[rel_dir] = (ignored, rules)
+        return ignored, rules
+
+    def _to_repo_path(self, path: Path) -> Path:
+        """
+        Converts a path to the same form as the ones produced by the scan
+        """
+        return self.path / path.resolve().relative_to(self.path.resolve())
+
+    def _module_name(self, path: Path) -> str:
+        return path.name.replace(SRC_EXT, "")
+
+    def _module_keys(self, path: Path) -> List[ModuleKey]:
+        """
+        All the trailing module parts that path can be imported by, ie.
+        a/b/c.py -> (c,), (b, c), (a, b, c)
+        """
+        parts = path.relative_to(self.path).parts
+        parts = parts[:-1] + (self._module_name(path),)
+
+        return [parts[-i:] for i in range(1, len(parts) + 1)]
+
+    def module_keys(self, paths: List[Path]) -> set[ModuleKey]:
+        """
+        The keys match_file may resolve to the given files or to their parent
+        packages, ie. the module paths that can newly resolve once they are added
+        """
+        keys = set()
+        for path in paths:
+            path = self._to_repo_path(path)
+            for p in [path] + list(path.parents):
+                if p == self.path or self.path not in p.parents:
+                    break
+                keys.update(self._module_keys(p))
+
+        return keys
+
+    def _index_path(self, path: Path):
+        self._name_index[self._module_name(path)].append(path)
+        for key in self._module_keys(path):
+            self._module_index.setdefault(key, path)
+
+    def _walk(self) -> Iterator[Tuple[Path, bool, Optional[os.stat_result]]]:
+        """
+        Walks the repo with os.scandir depth first, without descending into
+        excluded or gitignored directories. Yields source files along with their
+        stat, and directories. Entries of a directory come in scandir order and
+        always after the directory itself
+        """
+        root_rules = IgnoreRules("", self._exclude) if self._exclude else None
+
+        # (dir, its posix path relative to the repo, rules that apply inside of it)
+        stack = [(self.path, "", root_rules)]
+        while stack:
+            dir, rel_dir, rules = stack.pop()
+            try:
+                with os.scandir(dir) as it:
+                    entries = list(it)
+            except OSError as e:
+                logger.warning(f"Could not scan {dir}: {e}")
+                continue
+
+            if self._gitignore:
+                for entry in entries:
+                    if entry.name == ".gitignore":
+                        rules = IgnoreRules.from_file(dir / entry.name, rel_dir, rules)
+                        break
+
+            subdirs = []
+            for entry in entries:
+                name = entry.name
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+
+                if not is_dir and os.path.splitext(name)[1] != SRC_EXT:
+                    continue
+                rel_path = f"{rel_dir}/{name}" if rel_dir else name
+                if rules and rules.ignored(rel_path, name, is_dir):
+                    continue
+
+                path = dir / name
+                if is_dir:
+                    yield path, True, None
+                    # like rglob, list symlinked dirs but don't follow them
+                    if not entry.is_symlink():
+                        subdirs.append((path, rel_path, rules))
+                else:
+                    # eg. a broken symlink
+                    try:
+                        stat = entry.stat()
+                    except OSError as e:
+                        logger.warning(f"Could not stat {path}: {e}")
+                        continue
+                    yield path, False, stat
+
+            stack.extend(reversed(subdirs))
 
     def _get_all_paths(self):
         """
         Return all source files matching language extension and directories
         """
+        start = time.perf_counter()
+
+        all_paths = []
+        self._file_stats = {}
+        for path, is_dir, stat in self._walk():
+            all_paths.append(path)
+            if not is_dir:
+                self._file_stats[path] = FileEntry(path, stat.st_size, stat.st_mtime)
+
+        elapsed = time.perf_counter() - start
+        logger.debug(
+            f"Scanned {len(all_paths)} paths under {self.path} in {elapsed:.3f}s "
+            f"({len(all_paths) / max(elapsed, 1e-9):.0f} paths/s)"
+        )
 
-        return [p for p in self.path.rglob("*") if p.suffix == SRC_EXT or p.is_dir()]
+        return all_paths
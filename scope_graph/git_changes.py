@@ -0,0 +1,122 @@
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+import subprocess
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# posix path relative to the repo -> git blob hash
+Manifest = Dict[str, str]
+
+
+class FileChanges(NamedTuple):
+    added: List[str]
+    modified: List[str]
+    deleted: List[str]
+
+    @property
+    def changed(self) -> List[str]:
+        return self.added + self.modified
+
+
+def _git(repo: Path, *args: str, input: Optional[bytes] = None) -> bytes:
+    """
+    Runs a git command inside repo, only ever against the local object database
+    """
+    try:
+        return subprocess.run(
+            ["git", "-C", str(repo), *args],
+            input=input,
+            capture_output=True,
+            check=True,
+        ).stdout
+    except FileNotFoundError:
+        raise RuntimeError("git is not installed")
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(
+            f"git {' '.join(args)} failed: {e.stderr.decode(errors='ignore').strip()}"
+        )
+
+
+def _split(out: bytes) -> List[str]:
+    return [p.decode() for p in out.split(b"\0") if p]
+
+
+def commit_manifest(repo: Path, commit: str = "HEAD") -> Manifest:
+    """
+    Blob hashes of every file under repo at commit, read from the object database
+    """
+    manifest = {}
+    # <mode> SP <type> SP <hash> TAB <path>
+    for line in _split(_git(repo, "ls-tree", "-r", "-z", commit)):
+        info, path = line.split("\t", 1)
+        _, type, blob = info.split()
+        if type == "blob":
+            manifest[path] = blob
+
+    return manifest
+
+
+def worktree_manifest(repo: Path) -> Manifest:
+    """
+    Blob hashes of the files under repo as they are on disk, including untracked
+    but not ignored files. Only files whose stat differs from the index are hashed
+    """
+    manifest = {}
+    # <mode> SP <hash> SP <stage> TAB <path>
+    for line in _split(_git(repo, "ls-files", "-s", "-z")):
+        info, path = line.split("\t", 1)
+        manifest[path] = info.split()[1]
+
+    dirty = _split(_git(repo, "diff-files", "--name-only", "--relative", "-z"))
+    untracked = _split(
+        _git(repo, "ls-files", "--others", "--exclude-standard", "-z")
+    )
+
+    to_hash = []
+    for path in dirty + untracked:
+        if (repo / path).is_file():
+            to_hash.append(path)
+        else:
+            manifest.pop(path, None)
+
+    if to_hash:
+        # hash-object resolves --stdin-paths from the top of the work tree, not
+        # from the current directory
+        abs_paths = "\n".join(str((repo / p).resolve()) for p in to_hash)
+        blobs = _git(repo, "hash-object", "--stdin-paths", input=abs_paths.encode())
+        for path, blob in zip(to_hash, blobs.decode().split()):
+            manifest[path] = blob
+
+    return manifest
+
+
+def diff_manifests(old: Manifest, new: Manifest) -> FileChanges:
+    added = [p for p in new if p not in old]
+    modified = [p for p in new if p in old and old[p] != new[p]]
+    deleted = [p for p in old if p not in new]
+
+    return FileChanges(added, modified, deleted)
+
+
+def changes_since(
+    repo: Path, base: Optional[str] = None, manifest: Optional[Manifest] = None
+) -> FileChanges:
+    """
+    Files added, modified or deleted in the working tree of repo relative to
+    either a base commit or a previously stored manifest
+    """
+    if (base is None) == (manifest is None):
+        raise ValueError("Exactly one of base or manifest must be given")
+
+    if manifest is None:
+        manifest = commit_manifest(repo, base)
+
+    changes = diff_manifests(manifest, worktree_manifest(repo))
+    logger.debug(
+        f"{len(changes.added)} added, {len(changes.modified)} modified, "
+        f"{len(changes.deleted)} deleted files under {repo}"
+    )
+
+    return changes
@@ -0,0 +1,136 @@
+from pathlib import Path
+from typing import List, Optional
+import re
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _glob_to_regex(glob: str) -> str:
+    """
+    Translates a gitignore glob, where * does not cross directories and **
+    does, into a regex
+    """
+    regex = ""
+    i = 0
+    while i < len(glob):
+        c = glob[i]
+        if glob.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+            continue
+        elif glob.startswith("**", i):
+            regex += ".*"
+            i += 2
+            continue
+        elif c == "*":
+            regex += "[^/]*"
+        elif c == "?":
+            regex += "[^/]"
+        elif c == "[":
+            end = glob.find("]", i + 1)
+            if end == -1:
+                regex += re.escape(c)
+            else:
+                regex += "[" + glob[i + 1 : end].replace("!", "^", 1) + "]"
+                i = end
+        elif c == "\\" and i + 1 < len(glob):
+            i += 1
+            regex += re.escape(glob[i])
+        else:
+            regex += re.escape(c)
+        i += 1
+
+    return regex
+
+
+class IgnoreRule:
+    """
+    A single gitignore pattern, relative to the directory of its .gitignore
+    """
+
+    def __init__(self, pattern: str):
+        self.negated = pattern.startswith("!")
+        if self.negated:
+            pattern = pattern[1:]
+
+        self.dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+
+        # patterns with a slash anywhere but the end are relative to the
+        # .gitignore, the others match a name at any depth
+        self.anchored = "/" in pattern
+        pattern = pattern.lstrip("/")
+
+        self._regex = re.compile(_glob_to_regex(pattern) + r"\Z")
+
+    def match(self, rel_path: str, name: str, is_dir: bool) -> bool:
+        if self.dir_only and not is_dir:
+            return False
+
+        return bool(self._regex.match(rel_path if self.anchored else name))
+
+
+class IgnoreRules:
+    """
+    The rules of one .gitignore or of a list of exclude globs, along with the
+    rules inherited from the parent directories. Paths are given as posix strs
+    relative to the root of the walk, base is the directory the rules are
+    relative to, "" for the root
+    """
+
+    def __init__(
+        self,
+        base: str,
+        patterns: List[str],
+        parent: Optional["IgnoreRules"] = None,
+    ):
+        self.base = base
+        self._prefix = len(base) + 1 if base else 0
+        self.parent = parent
+        self.rules: List[IgnoreRule] = []
+
+        for line in patterns:
+            line = line.rstrip("\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+            self.rules.append(IgnoreRule(line))
+
+    @classmethod
+    def from_file(
+        cls, gitignore: Path, base: str, parent: Optional["IgnoreRules"] = None
+    ) -> Optional["IgnoreRules"]:
+        """
+        Reads a .gitignore, returns the parent rules if it can't be read
+        """
+        try:
+            patterns = gitignore.read_text(errors="ignore").splitlines()
+        except OSError as e:
+            logger.warning(f"Could not read {gitignore}: {e}")
+            return parent
+
+        return cls(base, patterns, parent)
+
+    def ignored(self, path: str, name: str, is_dir: bool) -> bool:
+        """
+        Last matching rule wins, starting from the closest .gitignore. name is
+        the last part of path
+        """
+        rules: Optional[IgnoreRules] = self
+        while rules is not None:
+            matched = rules._match(path, name, is_dir)
+            if matched is not None:
+                return matched
+            rules = rules.parent
+
+        return False
+
+    def _match(self, path: str, name: str, is_dir: bool) -> Optional[bool]:
+        rel_path = path[self._prefix :]
+        for rule in reversed(self.rules):
+            if rule.match(rel_path, name, is_dir):
+                return not rule.negated
+
+        return None
+
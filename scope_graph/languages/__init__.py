@@ -1,4 +1,5 @@
 from .python import PythonParse
+from .registry import LANG_REGISTRY, LanguageRegistry
 
 # TODO: when we have to implement a third one of these things,
 # build a factory class to do it properly
@@ -1,20 +1,17 @@
 import tree_sitter_python as tspython
-from tree_sitter import Language, Parser
 from scope_graph.config import PYTHON_SCM, PYTHONTS_LIB
+from scope_graph.languages.registry import LANG_REGISTRY
+
+LANG_REGISTRY.register("python", tspython.language)
 
 
 class PythonParse:
 
     @classmethod
-    def _build_query(cls, file_content: bytearray, query_file: str):
-        query_file = open(PYTHON_SCM, "rb").read()
-
-        PY_LANGUAGE = Language(tspython.language())
-
-        parser = Parser()
-        parser.set_language(PY_LANGUAGE)
+    def _build_query(cls, file_content: bytearray, query_file: str = PYTHON_SCM):
+        parser = LANG_REGISTRY.parser("python")
 
         root = parser.parse(file_content).root_node
-        query = PY_LANGUAGE.query(query_file)
+        query = LANG_REGISTRY.query("python", query_file)
 
         return query, root
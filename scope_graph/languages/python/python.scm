@@ -97,23 +97,25 @@
   (identifier) @local.definition.variable)
 
 ;;Imports:
+;;
+;; every imported name is matched on its own, so a statement with several
+;; names is captured once per name. build_scope_graph merges the captures of
+;; the same statement back together
 
 ;;   
 ;;    import a, b
 ;;    import module.submodule.c
 ;;   
 (import_statement
-  (dotted_name
-    (identifier) @local.import.name)+) @local.import.statement
+  name: (dotted_name) @local.import.name) @local.import.statement
 
 ;;    import a as b
 ;;    
-;;    `a` is ignored
-;;    `b` is an import
+;;    `b` is the name bound in the scope
 (import_statement
-  (aliased_import
-    "as"
-    (identifier) @local.import))
+  name: (aliased_import
+    name: (dotted_name) @local.import.name
+    alias: (identifier) @local.import.alias)) @local.import.statement
 
 ;;    from module import name1, name2
 ;;    from module import (
@@ -121,30 +123,17 @@
 ;;       LocalDef,
 ;;    )
 (import_from_statement
-  module_name: 
-    (dotted_name) @local.import.module
-  name: 
-    (dotted_name 
-      (identifier) @local.import.name)+
-) @local.import.statement
-
-;;;; TODO: alias and wildcard imports not supported
-;;;; aliased (alias first)
-;;;;    from module import name1, name2
-;;;;    from module import (
-;;;;       LocalScope,
-;;;;       LocalDef,
-;;;;    )
-;;(import_from_statement
-;;  module_name: (dotted_name) @local.import.module
-;;  name: (
-;;    (aliased_import
-;;      name: (dotted_name (identifier) @local.import.name)
-;;      alias: (identifier) @local.import.alias)?
-;;  )+
-;;) @local.import.statement
-;;
-;;
+  module_name: (dotted_name) @local.import.module
+  name: (dotted_name) @local.import.name) @local.import.statement
+
+;;    from module import name1 as alias1, name2
+(import_from_statement
+  module_name: (dotted_name) @local.import.module
+  name: (aliased_import
+    name: (dotted_name) @local.import.name
+    alias: (identifier) @local.import.alias)) @local.import.statement
+
+;;;; TODO: wildcard imports not supported
 ;;;; from module import *
 ;;;;(import_from_statement
 ;;;;  module_name: (dotted_name) @local.import.module
@@ -0,0 +1,139 @@
+from dataclasses import dataclass, fields
+from typing import Callable, Dict, List, Tuple
+import threading
+
+from tree_sitter import Language, Parser, Query
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RegistryStats:
+    query_hits: int = 0
+    query_misses: int = 0
+    parser_hits: int = 0
+    parser_misses: int = 0
+
+
+class LanguageRegistry:
+    """
+    Process wide cache of tree-sitter languages, compiled queries and parsers.
+    Each (language, query file) pair is read and compiled exactly once, and
+    parsers are reused per thread since they are not safe to share. Hits are
+    counted per thread so that lookups never take the lock
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable] = {}
+        self._languages: Dict[str, Language] = {}
+        self._queries: Dict[Tuple[str, str], Query] = {}
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # the stats of every thread that looked something up, summed by stats()
+        self._thread_stats: List[RegistryStats] = []
+
+    def register(self, lang: str, loader: Callable):
+        """
+        Register a loader returning the tree-sitter language pointer for lang
+        """
+        self._loaders[lang] = loader
+
+    def language(self, lang: str) -> Language:
+        language = self._languages.get(lang, None)
+        if language is None:
+            with self._lock:
+                language = self._languages.get(lang, None)
+                if language is None:
+                    language = Language(self._loaders[lang]())
+                    self._languages[lang] = language
+
+        return language
+
+    def query(self, lang: str, query_file: str) -> Query:
+        """
+        Returns the compiled query for query_file, compiling it on first use
+        """
+        key = (lang, str(query_file))
+
+        query = self._queries.get(key, None)
+        if query is not None:
+            self._local_stats().query_hits += 1
+            return query
+
+        # language() takes the lock itself
+        language = self.language(lang)
+        with self._lock:
+            query = self._queries.get(key, None)
+            if query is None:
+                logger.debug(f"Compiling query {query_file} for {lang}")
+                with open(query_file, "rb") as f:
+                    query = language.query(f.read())
+                self._queries[key] = query
+                hit = False
+            else:
+                hit = True
+
+        if hit:
+            self._local_stats().query_hits += 1
+        else:
+            self._local_stats().query_misses += 1
+
+        return query
+
+    def parser(self, lang: str) -> Parser:
+        """
+        Returns the parser for lang owned by the calling thread
+        """
+        parsers = getattr(self._local, "parsers", None)
+        if parsers is None:
+            parsers = self._local.parsers = {}
+
+        parser = parsers.get(lang, None)
+        if parser is not None:
+            self._local_stats().parser_hits += 1
+            return parser
+
+        parser = Parser()
+        parser.set_language(self.language(lang))
+        parsers[lang] = parser
+        self._local_stats().parser_misses += 1
+
+        return parser
+
+    def _local_stats(self) -> RegistryStats:
+        stats = getattr(self._local, "stats", None)
+        if stats is None:
+            stats = self._local.stats = RegistryStats()
+            with self._lock:
+                self._thread_stats.append(stats)
+
+        return stats
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Counters summed over all threads. Counts of threads that are still
+        looking things up may lag behind by a few
+        """
+        with self._lock:
+            thread_stats = list(self._thread_stats)
+
+        return {
+            f.name: sum(getattr(stats, f.name) for stats in thread_stats)
+            for f in fields(RegistryStats)
+        }
+
+    def clear(self):
+        """
+        Drop all compiled queries and reset the counters. Parsers owned by
+        other threads are left alone
+        """
+        with self._lock:
+            self._queries.clear()
+            self._thread_stats = []
+        self._local = threading.local()
+
+
+LANG_REGISTRY = LanguageRegistry()
@@ -2,7 +2,7 @@ from scope_graph.scope_resolution.graph import Node
 from scope_graph.scope_resolution.graph_types import ScopeID
 
 from enum import Enum
-from typing import NewType
+from typing import NewType, Optional
 import os
 
 from pydantic import root_validator
@@ -37,5 +37,52 @@ class RepoNode(Node):
         return f"{self.name}"
 
 
+class RepoNodeView:
+    """
+    Lightweight, read only stand in for RepoNode handed out by RepoGraph
+    lookups. Equal to any other view of the same (file, scope). file_id is
+    the id of the file in the graph's FileTable, if it has one
+    """
+
+    __slots__ = ("idx", "file_path", "scope", "file_id")
+
+    def __init__(
+        self,
+        idx: int,
+        file_path: str,
+        scope: ScopeID,
+        file_id: Optional[int] = None,
+    ):
+        self.idx = idx
+        self.file_path = file_path
+        self.scope = scope
+        self.file_id = file_id
+
+    @property
+    def name(self) -> str:
+        return self.file_path.split(os.sep)[-1]
+
+    @property
+    def repo_id(self) -> RepoNodeID:
+        return RepoNodeID(f"{self.file_path}::{self.scope}")
+
+    def to_node(self) -> RepoNode:
+        return RepoNode(repo_id=self.repo_id)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, RepoNodeView):
+            return NotImplemented
+        return self.file_path == other.file_path and self.scope == other.scope
+
+    def __hash__(self) -> int:
+        return hash((self.file_path, self.scope))
+
+    def __repr__(self):
+        return f"RepoNodeView({self.repo_id})"
+
+    def __str__(self):
+        return self.name
+
+
 class EdgeKind(str, Enum):
     ImportToExport = "ImportToExport"
@@ -8,6 +8,7 @@ from scope_graph.scope_resolution.imports import LocalImportStmt
 from scope_graph.repo_resolution.namespace import NameSpace
 from scope_graph.fs import RepoFs
 from scope_graph.utils import SysModules, ThirdPartyModules
+from scope_graph.config import LANGUAGE
 
 import logging
 
@@ -24,6 +25,48 @@ class ModuleType(str, Enum):
     UNKNOWN = "unknown"
 
 
+class ModuleClassifier:
+    """
+    Classifies the root name of an import as a sys or third party module. The
+    module lists are loaded once per process, and results are cached per root
+    until the third party modules are updated
+    """
+
+    def __init__(
+        self,
+        sys_modules: Optional[SysModules] = None,
+        third_party_modules: Optional[ThirdPartyModules] = None,
+    ):
+        if sys_modules is None:
+            sys_modules = SysModules(LANGUAGE)
+        if third_party_modules is None:
+            third_party_modules = ThirdPartyModules(LANGUAGE)
+
+        self.sys_modules = sys_modules
+        self.third_party_modules = third_party_modules
+        self._cache: Dict[str, Optional[ModuleType]] = {}
+        self._cache_version = third_party_modules.version
+
+    def classify(self, root: str) -> Optional[ModuleType]:
+        """
+        Returns None if the module is neither, ie. it has to be looked up in
+        the repo
+        """
+        if self._cache_version != self.third_party_modules.version:
+            self._cache.clear()
+            self._cache_version = self.third_party_modules.version
+
+        if root not in self._cache:
+            if root in self.sys_modules:
+                self._cache[root] = ModuleType.SYS
+            elif root in self.third_party_modules:
+                self._cache[root] = ModuleType.THIRD_PARTY
+            else:
+                self._cache[root] = None
+
+        return self._cache[root]
+
+
 @dataclass
 class LocalImport:
     """
@@ -36,6 +79,8 @@ class LocalImport:
     filepath: Path
     # only for ModuleType.LOCAL
     import_path: Optional[Path] = None
+    # the name this import is bound to in the importing file, if aliased
+    alias: Optional[str] = None
     # if this import is defined in a scope
     ref_scopes: Optional[int] = field(default_factory=list)
 
@@ -48,8 +93,7 @@ def import_stmt_to_import(
     filepath: Path,
     g: ScopeGraph,
     fs: RepoFs,
-    sys_modules: SysModules,
-    third_party_modules: ThirdPartyModules,
+    modules: ModuleClassifier,
 ) -> List[LocalImport]:
     """
     Convert an import statement, which may hold multiple imports
@@ -72,24 +116,17 @@ def import_stmt_to_import(
         namespaces = [NameSpace(n) for n in import_stmt.names]
 
     # resolve module type
-    import_path = None
-    for ns in namespaces:
-        if ns.root in sys_modules:
-            module_type = ModuleType.SYS
-        elif ns.root in third_party_modules:
-            module_type = ModuleType.THIRD_PARTY
+    for ns, alias in zip(namespaces, import_stmt.aliases):
+        import_path = None
+        if module_type := modules.classify(ns.root):
+            pass
         elif import_path := fs.match_file(ns.to_path()):
             module_type = ModuleType.LOCAL
         else:
             module_type = ModuleType.UNKNOWN
 
         # resolve refs to this import
-        ref_scopes = []
-        for scope in g.scopes():
-            for ref in g.references_by_origin(scope):
-                ref_node = g.get_node(ref)
-                if ref_node.name == ns.child:
-                    ref_scopes.append(scope)
+        ref_scopes = g.refs_by_name(alias or ns.child)
 
         imports.append(
             LocalImport(
@@ -97,8 +134,34 @@ def import_stmt_to_import(
                 module_type,
                 filepath,
                 import_path=import_path,
+                alias=alias,
                 ref_scopes=ref_scopes,
             )
         )
 
     return imports
+
+
+def file_imports(
+    g: ScopeGraph,
+    filepath: Path,
+    fs: RepoFs,
+    modules: ModuleClassifier,
+) -> List[LocalImport]:
+    """
+    Convert all the import statements in a file
+    """
+    imports = []
+    for imp_node in g.get_all_imports():
+        imp_stmt = LocalImportStmt(imp_node.range, **imp_node.data)
+        imports.extend(
+            import_stmt_to_import(
+                import_stmt=imp_stmt,
+                filepath=filepath,
+                g=g,
+                fs=fs,
+                modules=modules,
+            )
+        )
+
+    return imports
@@ -0,0 +1,170 @@
+from bisect import bisect_left
+from pathlib import Path
+import os
+from typing import Iterator, List, Mapping, Optional
+
+from scope_graph.scope_resolution.compact_graph import (
+    CSR,
+    CompactScopeGraph,
+    PackedScopeGraphs,
+)
+from scope_graph.scope_resolution.graph_types import ScopeID
+
+from .graph_type import EdgeKind, RepoNodeID, RepoNodeView
+from .repo_graph import REPO_EDGE_KINDS, _abs, open_saved
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MappedScopesMap(Mapping[Path, CompactScopeGraph]):
+    """
+    scopes_map of a MappedRepoGraph: file path -> CompactScopeGraph, looked up
+    by bisecting the files sorted by path
+    """
+
+    def __init__(self, graph: "MappedRepoGraph"):
+        self._g = graph
+        self._files = graph._columns.column("rg.files")
+        self._sorted = graph._columns.column("rg.files_sorted")
+        self._graphs = PackedScopeGraphs(graph._columns)
+
+    def _find(self, path: Path | str) -> Optional[int]:
+        rel = self._g._rel(str(path))
+        key = lambda i: self._g._file_str(self._files[i])
+
+        pos = bisect_left(self._sorted, rel, key=key)
+        if pos < len(self._sorted) and key(self._sorted[pos]) == rel:
+            return self._sorted[pos]
+        return None
+
+    def __getitem__(self, path: Path | str) -> CompactScopeGraph:
+        i = self._find(path)
+        if i is None:
+            raise KeyError(path)
+        return self._graphs[i]
+
+    def __contains__(self, path: object) -> bool:
+        return isinstance(path, (Path, str)) and self._find(path) is not None
+
+    def __iter__(self) -> Iterator[Path]:
+        for file_id in self._files:
+            yield _abs(self._g._file_str(file_id), self._g.root)
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+
+class MappedRepoGraph:
+    """
+    Read only RepoGraph over a file written by RepoGraph.save. Nothing is
+    copied out of the file up front: nodes, edges (CSR), scope graphs and the
+    string pool are read from a shared read only mapping, so any number of
+    processes opening the same file share one copy of it through the page
+    cache. Exposes the query side of RepoGraph
+    """
+
+    def __init__(self, path: Path, repo_path: Optional[Path] = None):
+        self._columns = open_saved(path)
+        self.root = (
+            repo_path.resolve() if repo_path else Path(self._columns.meta["root"])
+        )
+        # node ids are strs, so paths are converted with str ops rather than
+        # going through Path
+        self._prefix = str(self.root).rstrip(os.sep) + os.sep
+
+        self._strings = self._columns.strings("rg.strings")
+        self._file_table = self._columns.column("rg.file_table")
+        self._node_files = self._columns.column("rg.node_files")
+        self._node_scopes = self._columns.column("rg.node_scopes")
+        self._nodes_sorted = self._columns.column("rg.nodes_sorted")
+        self._edges = CSR(
+            self._columns.column("rg.edges.offsets"),
+            self._columns.column("rg.edges.targets"),
+        )
+        self._edge_kinds = self._columns.column("rg.edge_kinds")
+
+        self.scopes_map = MappedScopesMap(self)
+
+    def __len__(self) -> int:
+        return len(self._node_files)
+
+    def _rel(self, path: str) -> str:
+        if path.startswith(self._prefix):
+            return path[len(self._prefix) :].replace(os.sep, "/")
+        return path
+
+    def _abs(self, path: str) -> str:
+        if os.path.isabs(path):
+            return path
+        return self._prefix + path.replace("/", os.sep)
+
+    def _file_str(self, file_id: int) -> str:
+        return self._strings[self._file_table[file_id]]
+
+    def _node_key(self, idx: int):
+        return self._file_str(self._node_files[idx]), self._node_scopes[idx]
+
+    def _find_node(self, node_id: RepoNodeID) -> Optional[int]:
+        file, scope = node_id.rsplit("::", 1)
+        return self.find_node(file, int(scope))
+
+    def find_node(self, path: Path | str, scope: ScopeID) -> Optional[int]:
+        key = (self._rel(str(path)), scope)
+
+        pos = bisect_left(self._nodes_sorted, key, key=self._node_key)
+        if pos < len(self._nodes_sorted):
+            idx = self._nodes_sorted[pos]
+            if self._node_key(idx) == key:
+                return idx
+        return None
+
+    def node_id(self, idx: int) -> RepoNodeID:
+        return self._view(idx).repo_id
+
+    def _view(self, idx: int) -> RepoNodeView:
+        file_id = self._node_files[idx]
+        return RepoNodeView(
+            idx,
+            self._abs(self._file_str(file_id)),
+            ScopeID(self._node_scopes[idx]),
+            file_id,
+        )
+
+    def get_node(self, node_id: RepoNodeID) -> Optional[RepoNodeView]:
+        idx = self._find_node(node_id)
+        if idx is None:
+            return None
+
+        return self._view(idx)
+
+    def import_to_export_scope(self, ref_node_id: RepoNodeID) -> List[RepoNodeView]:
+        """
+        Returns the export (def) scopes that are tied to the import (ref) scope
+        """
+        return self._exports(self._find_node(ref_node_id))
+
+    def _exports(self, u: Optional[int]) -> List[RepoNodeView]:
+        if u is None:
+            return []
+
+        return [
+            self._view(self._edges.targets[i])
+            for i in range(self._edges.offsets[u], self._edges.offsets[u + 1])
+            if REPO_EDGE_KINDS[self._edge_kinds[i]] == EdgeKind.ImportToExport
+        ]
+
+    def scope_exports(self, path: Path, scope: ScopeID) -> List[RepoNodeView]:
+        """
+        Same as import_to_export_scope for the scope of a file
+        """
+        return self._exports(self.find_node(path, scope))
+
+    def to_str(self):
+        repr = ""
+        for u in range(len(self)):
+            for v in self._edges.neighbours(u):
+                repr += f"{self._view(u)} -> {self._view(v)}\n"
+
+        return repr
@@ -1,28 +1,133 @@
-from typing import Any, List, Dict, Tuple, NewType
+from typing import Any, List, Dict, Iterator, Tuple, NewType, Optional
 from pathlib import Path
+from array import array
 from networkx import DiGraph
+from concurrent.futures import ProcessPoolExecutor
+import os
 
-from scope_graph.fs import RepoFs
+from scope_graph.fs import FileEntry, ModuleKey, RepoFs
+from scope_graph.file_table import FileMap, FileTable
+from scope_graph.git_changes import Manifest
+from scope_graph.storage import ColumnFile, ColumnWriter
 from scope_graph.scope_resolution.graph import ScopeGraph
+from scope_graph.scope_resolution.compact_graph import (
+    CSR,
+    CompactScopeGraph,
+    pack_scope_graphs,
+    unpack_scope_graphs,
+)
 from scope_graph.scope_resolution.graph_types import ScopeID
 from scope_graph.build_scopes import build_scope_graph
+from scope_graph.cache import ScopeGraphCache
 from scope_graph.scope_resolution import LocalImportStmt
-from scope_graph.utils import SysModules, ThirdPartyModules, TextRange
-from scope_graph.config import LANGUAGE
-
-from .imports import NameSpace, LocalImport, ModuleType, import_stmt_to_import
-from .graph_type import EdgeKind, RepoNode, RepoNodeID
+from scope_graph.utils import TextRange
+from scope_graph.config import LANGUAGE, NAMESPACE_DELIMETERS
+
+from .imports import (
+    NameSpace,
+    LocalImport,
+    ModuleType,
+    ModuleClassifier,
+    import_stmt_to_import,
+    file_imports,
+)
+from .graph_type import EdgeKind, RepoNodeID, RepoNodeView
 
 from collections import defaultdict
 import logging
 
 logger = logging.getLogger(__name__)
 
+DELIMITER = NAMESPACE_DELIMETERS[LANGUAGE]
+
 
 def repo_node_id(file: Path, scope_id: ScopeID):
     return "".join([str(file), "::", str(scope_id)])
 
 
+# bump when the layout written by RepoGraph.save changes
+FORMAT_VERSION = 3
+MODULE_TYPES = list(ModuleType)
+REPO_EDGE_KINDS = list(EdgeKind)
+NO_STRING = -1
+NO_FILE = -1
+
+
+def _rel(path: Path, base: Path) -> str:
+    """
+    Paths are stored relative to the repo so a saved graph survives the repo
+    being moved, or absolute if they lie outside of it
+    """
+    try:
+        return path.relative_to(base).as_posix()
+    except ValueError:
+        return str(path)
+
+
+def _abs(path: str, base: Path) -> Path:
+    return Path(path) if os.path.isabs(path) else base / path
+
+
+def open_saved(path: Path, use_mmap: bool = True) -> ColumnFile:
+    """
+    Opens a file written by RepoGraph.save
+    """
+    columns = ColumnFile(path, use_mmap=use_mmap)
+    if columns.meta.get("version") != FORMAT_VERSION:
+        raise ValueError(
+            f"{path} has format version {columns.meta.get('version')}, "
+            f"expected {FORMAT_VERSION}"
+        )
+
+    return columns
+
+
+# per process state for RepoGraph(workers=N), set up once by _init_worker
+_worker_fs: RepoFs = None
+_worker_cache: ScopeGraphCache = None
+_worker_modules: ModuleClassifier = None
+_worker_compact: bool = False
+
+
+def _init_worker(
+    fs: RepoFs, cache_path: Optional[Path], compact: bool, modules: ModuleClassifier
+):
+    global _worker_fs, _worker_cache, _worker_modules, _worker_compact
+
+    _worker_fs = fs
+    _worker_compact = compact
+    _worker_cache = ScopeGraphCache(cache_path) if cache_path else None
+    _worker_modules = modules
+
+
+def _build_file(
+    path: Path,
+) -> Tuple[Path, ScopeGraph, List[LocalImport], Optional[str], bool]:
+    """
+    Parses a single file and extracts its imports inside a worker process.
+    Cache lookups happen here but writes are left to the parent process
+    """
+    src_bytes = path.read_bytes()
+
+    key, g = None, None
+    if _worker_cache:
+        key = _worker_cache.key(src_bytes)
+        g = _worker_cache.get(key)
+
+    hit = g is not None
+    if not hit:
+        g = build_scope_graph(src_bytes, language=LANGUAGE)
+
+    imports = file_imports(g, path.resolve(), _worker_fs, _worker_modules)
+
+    # the cache stores full graphs, so misses are compacted after the parent
+    # has written them
+    if _worker_compact and (key is None or hit):
+        g = g.compact()
+
+    return path, g, imports, key, hit
+
+
 # rename to import graph?
 # probably not, since we do want struct to hold repo level info
 
@@ -33,107 +138,613 @@ class RepoGraph:
     Constructs a graph of relation between the scopes of a repo
     """
 
-    def __init__(self, path: Path):
+    def __init__(
+        self,
+        path: Path,
+        workers: int = 1,
+        cache: Optional[ScopeGraphCache] = None,
+        compact: bool = False,
+        modules: Optional[ModuleClassifier] = None,
+    ):
         if not path.exists():
             raise FileNotFoundError(f"Path {path} does not exist")
 
         self.fs = RepoFs(path)
+        # files are keyed by their id in here, paths are only used at the API
+        # boundary
+        self.files = self.fs.files
         self._graph = DiGraph()
-        self.scopes_map: Dict[Path, ScopeGraph] = self._construct_scopes(self.fs)
+        self._cache = cache
+        # store read only CompactScopeGraphs in scopes_map to save memory
+        self._compact = compact
+        # classifies imports as sys or third party modules
+        self._modules = modules if modules is not None else ModuleClassifier()
 
-        self._imports: Dict[Path, List[LocalImport]] = {}
+        self._scopes: Dict[int, ScopeGraph | CompactScopeGraph] = {}
+        self._imports: Dict[int, List[LocalImport]] = {}
 
         # FOR DEBUGGING
-        self._missing_import_refs: Dict[Path, List[str]] = {}
-        self._resolved_import_refs: Dict[Path, List[str]] = defaultdict(list)
+        self._missing_import_refs: Dict[int, List[str]] = {}
+        self._resolved_import_refs: Dict[int, List[str]] = defaultdict(list)
         self.total_scopes = set()
 
+        # reverse index from an imported (export) file to the files importing it,
+        # and the repo nodes that belong to each file, used by update()
+        self._importers: Dict[int, set[int]] = defaultdict(set)
+        self._imported: Dict[int, set[int]] = defaultdict(set)
+        self._file_nodes: Dict[int, set[int]] = defaultdict(set)
+        # same for unresolved imports: the module path they failed to match
+        # (see RepoFs.match_file) -> the files importing it, and back
+        self._unresolved_importers: Dict[ModuleKey, set[int]] = defaultdict(set)
+        self._unresolved: Dict[int, set[ModuleKey]] = defaultdict(set)
+        self._init_nodes()
+
         # TODO: put everything into a function that can be measured with TQDM
-        # construct imports
-        for path, g in self.scopes_map.items():
-            self._imports[path] = self._construct_import(g, path, self.fs)
-            self._missing_import_refs[path] = [
-                str(imp.namespace) for imp in self._imports[path]
-            ]
+        # construct scopes and imports
+        if workers > 1:
+            self._construct_parallel(self.fs, workers)
+        else:
+            self._scopes = self._construct_scopes(self.fs)
+            for file_id, g in self._scopes.items():
+                self._imports[file_id] = self._construct_import(
+                    g, self.files.path(file_id), self.fs
+                )
+
+        if self._cache:
+            self._cache.evict()
+
+        for file_id, imports in self._imports.items():
+            self._index_imports(file_id, imports)
 
         # map import ref to export scope
-        for path, imports in self._imports.items():
-            imp2def: List[Tuple[LocalImport, str, ScopeID, Path]] = []
-
-            # resolve the different types of imports
-            local_imports = [
-                local_imp
-                for local_imp in imports
-                if local_imp.module_type == ModuleType.LOCAL
-            ]
-            imp2def.extend(self.map_local_to_exports(path, local_imports))
-
-            for imp, def_scope, name, export_file in imp2def:
-                if imp.module_type == ModuleType.LOCAL:
-                    # establish an edge between all refs from all local scopes to the
-                    # def scope in import_file
-                    for ref_scope in imp.ref_scopes:
-                        # TODO: convert this to debug
-                        if "client.py" in str(path):
-                            print(
-                                f"Adding ref: {imp.namespace.child}:{ref_scope} -> {export_file}:{def_scope}"
-                            )
-
-                        # create nodes and edges
-                        ref_node_id = repo_node_id(path, ref_scope)
-                        ref_node = self.get_node(ref_node_id)
-                        if not ref_node:
-                            self.total_scopes.add(ref_node_id)
-                            ref_node = self.create_node(ref_node_id)
-
-                        self._missing_import_refs[path] = [
-                            ref
-                            for ref in self._missing_import_refs[path]
-                            if ref != str(imp.namespace)
-                        ]
-                        self._resolved_import_refs[path].append(name)
-
-                        imp_node_id = repo_node_id(export_file, def_scope)
-                        imp_node = self.get_node(imp_node_id)
-                        if not imp_node:
-                            self.total_scopes.add(ref_node_id)
-                            self.create_node(imp_node_id)
-
-                        self._graph.add_edge(
-                            ref_node_id,
-                            imp_node_id,
-                            kind=EdgeKind.ImportToExport,
-                        )
-
-    def get_node(self, node_id: RepoNodeID) -> RepoNode:
-        node = self._graph.nodes.get(node_id, None)
-        if node:
-            return RepoNode(repo_id=node_id)
-
-        return None
-
-    def create_node(self, node_id: RepoNodeID):
-        node = RepoNode(repo_id=node_id)
-
-        self._graph.add_node(node.repo_id, name=node.name)
+        for file_id in self._imports:
+            self._add_import_edges(file_id)
+
+    @property
+    def scopes_map(self) -> FileMap[ScopeGraph | CompactScopeGraph]:
+        """
+        Resolved file path -> the scope graph of the file
+        """
+        return FileMap(self.files, self._scopes)
+
+    def get_scope_graph(self, file_id: int) -> ScopeGraph | CompactScopeGraph:
+        return self._scopes[file_id]
+
+    def save(self, path: Path):
+        """
+        Writes the graph to a binary column file that RepoGraph.load maps back
+        without reparsing: the file table, the scope graph of every file (see
+        pack_scope_graphs), the repo nodes as (file id, scope) columns, the edges
+        as a CSR adjacency, the resolved imports and the scanned paths. Paths,
+        namespaces and aliases are interned in a single string table
+        """
+        root = self.fs.path.resolve()
+        strings, string_ids = [], {}
+
+        def intern(s: str) -> int:
+            if s not in string_ids:
+                string_ids[s] = len(strings)
+                strings.append(s)
+            return string_ids[s]
+
+        writer = ColumnWriter(
+            meta={
+                "version": FORMAT_VERSION,
+                "root": str(root),
+                "fs_root": str(self.fs.path),
+                "exclude": list(self.fs._exclude),
+                "gitignore": self.fs._gitignore,
+                "compact": self._compact,
+            }
+        )
+
+        # file id -> path, so ids survive the round trip
+        file_names = [_rel(self.files.path(i), root) for i in range(len(self.files))]
+        writer.add("rg.file_table", array("q", [intern(f) for f in file_names]))
+
+        files = list(self._scopes)
+        writer.add("rg.files", array("q", files))
+        # files and nodes sorted by path, for lookups by bisection
+        writer.add(
+            "rg.files_sorted",
+            array(
+                "q", sorted(range(len(files)), key=lambda i: file_names[files[i]])
+            ),
+        )
+        pack_scope_graphs(
+            writer,
+            [
+                g if isinstance(g, CompactScopeGraph) else g.compact()
+                for g in self._scopes.values()
+            ],
+        )
+
+        # repo nodes, in graph order
+        node_index = {}
+        node_files, node_scopes = array("q"), array("q")
+        for i, node in enumerate(self._graph.nodes):
+            file_id, scope = self._node_keys[node]
+            node_index[node] = i
+            node_files.append(file_id)
+            node_scopes.append(scope)
+        writer.add("rg.node_files", node_files)
+        writer.add("rg.node_scopes", node_scopes)
+        writer.add(
+            "rg.nodes_sorted",
+            array(
+                "q",
+                sorted(
+                    range(len(node_index)),
+                    key=lambda i: (file_names[node_files[i]], node_scopes[i]),
+                ),
+            ),
+        )
+
+        edges, edge_kinds = [], array("b")
+        for u, v, kind in self._graph.edges(data="kind"):
+            edges.append((node_index[u], node_index[v]))
+            edge_kinds.append(REPO_EDGE_KINDS.index(kind))
+        adjacency = CSR.from_pairs(len(node_index), edges)
+        writer.add("rg.edges.offsets", adjacency.offsets)
+        writer.add("rg.edges.targets", adjacency.targets)
+        writer.add("rg.edge_kinds", edge_kinds)
+
+        # imports, grouped by file in the same order as rg.files
+        imp_offsets = array("q", [0])
+        parents, children = array("q"), array("q")
+        module_types, import_paths, aliases = array("b"), array("q"), array("q")
+        ref_offsets, ref_scopes = array("q", [0]), array("q")
+        for f in files:
+            imports = self._imports.get(f, [])
+            imp_offsets.append(imp_offsets[-1] + len(imports))
+            for imp in imports:
+                parents.append(intern(DELIMITER.join(imp.namespace.parent)))
+                children.append(intern(DELIMITER.join(imp.namespace._child)))
+                module_types.append(MODULE_TYPES.index(imp.module_type))
+                import_paths.append(
+                    intern(_rel(imp.import_path, root))
+                    if imp.import_path
+                    else NO_STRING
+                )
+                aliases.append(intern(imp.alias) if imp.alias else NO_STRING)
+                ref_scopes.extend(imp.ref_scopes)
+                ref_offsets.append(len(ref_scopes))
+
+        writer.add("imp.offsets", imp_offsets)
+        writer.add("imp.parents", parents)
+        writer.add("imp.children", children)
+        writer.add("imp.module_types", module_types)
+        writer.add("imp.import_paths", import_paths)
+        writer.add("imp.aliases", aliases)
+        writer.add("imp.ref_scopes.offsets", ref_offsets)
+        writer.add("imp.ref_scopes.targets", ref_scopes)
+
+        # the scan, so that loading does not walk the repo
+        fs_paths, fs_file_ids = array("q"), array("q")
+        sizes, mtimes = array("q"), array("d")
+        for p in self.fs._all_paths:
+            stat = self.fs._file_stats.get(p, None)
+            fs_paths.append(intern(_rel(p, self.fs.path)))
+            fs_file_ids.append(self.fs._path_ids.get(p, NO_FILE))
+            sizes.append(stat.size if stat else -1)
+            mtimes.append(stat.mtime if stat else -1)
+        writer.add("fs.paths", fs_paths)
+        writer.add("fs.file_ids", fs_file_ids)
+        writer.add("fs.sizes", sizes)
+        writer.add("fs.mtimes", mtimes)
+
+        writer.add_strings("rg.strings", strings)
+        writer.write(path)
+
+    @classmethod
+    def load(
+        cls,
+        path: Path,
+        repo_path: Optional[Path] = None,
+        cache: Optional[ScopeGraphCache] = None,
+        use_mmap: bool = True,
+        modules: Optional[ModuleClassifier] = None,
+    ) -> "RepoGraph":
+        """
+        Loads a graph written by save. The scope graphs come back as
+        CompactScopeGraphs reading the mapped file in place, the networkx graph
+        and the import indexes are rebuilt from the stored columns, and files
+        keep their ids. repo_path overrides the location of the repo recorded at
+        save time. modules classifies the imports of files re-imported by update.
+        The debugging state (missing and resolved import refs) is not restored
+        """
+        columns = open_saved(path, use_mmap=use_mmap)
+        meta = columns.meta
+
+        if repo_path is None:
+            fs_root, root = Path(meta["fs_root"]), Path(meta["root"])
+        else:
+            fs_root, root = repo_path, repo_path.resolve()
+        if not fs_root.exists():
+            raise FileNotFoundError(f"Path {fs_root} does not exist")
+
+        strings = list(columns.strings("rg.strings"))
+
+        g = cls.__new__(cls)
+        g._graph = DiGraph()
+        g._cache = cache
+        g._compact = meta["compact"]
+        g._modules = modules if modules is not None else ModuleClassifier()
+        g._missing_import_refs = {}
+        g._resolved_import_refs = defaultdict(list)
+        g.total_scopes = set()
+        g._importers = defaultdict(set)
+        g._imported = defaultdict(set)
+        g._file_nodes = defaultdict(set)
+        g._unresolved_importers = defaultdict(set)
+        g._unresolved = defaultdict(set)
+        g._init_nodes()
+
+        files = FileTable()
+        for string_id in columns.column("rg.file_table"):
+            files.intern(_abs(strings[string_id], root))
+
+        file_stats, fs_paths, path_ids = {}, [], {}
+        sizes, mtimes = columns.column("fs.sizes"), columns.column("fs.mtimes")
+        fs_file_ids = columns.column("fs.file_ids")
+        for i, string_id in enumerate(columns.column("fs.paths")):
+            p = _abs(strings[string_id], fs_root)
+            fs_paths.append(p)
+            if sizes[i] >= 0:
+                file_stats[p] = FileEntry(p, sizes[i], mtimes[i])
+            if fs_file_ids[i] != NO_FILE:
+                path_ids[p] = fs_file_ids[i]
+        g.fs = RepoFs.from_paths(
+            fs_root,
+            fs_paths,
+            file_stats,
+            meta["exclude"],
+            meta["gitignore"],
+            files=files,
+            path_ids=path_ids,
+        )
+        g.files = files
+
+        scope_files = list(columns.column("rg.files"))
+        g._scopes = dict(zip(scope_files, unpack_scope_graphs(columns)))
+
+        # nodes get their ids in graph order, so they come back as 0..n-1
+        for file_id, scope in zip(
+            columns.column("rg.node_files"), columns.column("rg.node_scopes")
+        ):
+            g._add_node(file_id, scope)
+
+        adjacency = CSR(
+            columns.column("rg.edges.offsets"), columns.column("rg.edges.targets")
+        )
+        edge_kinds = columns.column("rg.edge_kinds")
+        for u in range(len(g._nodes)):
+            for i in range(adjacency.offsets[u], adjacency.offsets[u + 1]):
+                g._graph.add_edge(
+                    u, adjacency.targets[i], kind=REPO_EDGE_KINDS[edge_kinds[i]]
+                )
+
+        imp_offsets = columns.column("imp.offsets")
+        parents = columns.column("imp.parents")
+        children = columns.column("imp.children")
+        module_types = columns.column("imp.module_types")
+        import_paths = columns.column("imp.import_paths")
+        aliases = columns.column("imp.aliases")
+        refs = CSR(
+            columns.column("imp.ref_scopes.offsets"),
+            columns.column("imp.ref_scopes.targets"),
+        )
+
+        g._imports = {}
+        for f, file_id in enumerate(scope_files):
+            imports = []
+            for i in range(imp_offsets[f], imp_offsets[f + 1]):
+                import_path, alias = import_paths[i], aliases[i]
+                imports.append(
+                    LocalImport(
+                        NameSpace(strings[parents[i]], strings[children[i]]),
+                        MODULE_TYPES[module_types[i]],
+                        files.path(file_id),
+                        import_path=(
+                            _abs(strings[import_path], root)
+                            if import_path != NO_STRING
+                            else None
+                        ),
+                        alias=strings[alias] if alias != NO_STRING else None,
+                        ref_scopes=list(refs.neighbours(i)),
+                    )
+                )
+            g._imports[file_id] = imports
+            g._index_imports(file_id, imports)
+
+        return g
+
+    def update_from_git(
+        self, base: Optional[str] = None, manifest: Optional[Manifest] = None
+    ):
+        """
+        Updates the graph with the files that changed in the work tree since
+        either a base commit or a manifest from RepoFs.manifest, the graph being
+        the one built at that point
+        """
+        changed, deleted = self.fs.changes_since(base=base, manifest=manifest)
+        logger.info(
+            f"Updating {len(changed)} changed and {len(deleted)} deleted files"
+        )
+
+        self.update(changed, deleted)
+
+    def update(self, changed: List[Path], deleted: Optional[List[Path]] = None):
+        """
+        Incrementally updates the graph for files that were modified, added or
+        deleted. Only the touched files are re-parsed, and only the edges whose
+        import or export side lies in one of them are recomputed
+        """
+        deleted = deleted or []
+        changed = [p.resolve() for p in changed]
+        deleted = [p.resolve() for p in deleted if p.resolve() in self.scopes_map]
+        added = [p for p in changed if p not in self.scopes_map]
+
+        self.fs.add_paths(added)
+        self.fs.remove_paths(deleted)
+
+        # from here on files are handled by id
+        changed = [self.files.intern(p) for p in changed]
+        deleted = [self.files.get_id(p) for p in deleted]
+
+        # files whose imports may now resolve to a different module: importers of
+        # deleted files, and files with unresolved imports of the new modules
+        stale_imports = set()
+        for f in deleted:
+            stale_imports |= self._importers.get(f, set())
+        for key in self.fs.module_keys(added):
+            stale_imports |= self._unresolved_importers.get(key, set())
+
+        # files whose edges point into a re-parsed file have stale export scopes
+        stale_edges = set(stale_imports)
+        for f in changed:
+            stale_edges |= self._importers.get(f, set())
+
+        # nodes that may be left without edges once the update is done
+        orphans = set()
+        for f in deleted + changed:
+            orphans |= self._remove_file(f)
+
+        for f in deleted:
+            del self._scopes[f]
+
+        for f in changed:
+            self._scopes[f] = self._build_scope_graph(
+                self.files.path(f).read_bytes()
+            )
+            stale_imports.add(f)
+
+        stale_imports -= set(deleted)
+        stale_edges = (stale_edges | stale_imports) - set(deleted)
+
+        for f in stale_imports:
+            imports = self._construct_import(
+                self._scopes[f], self.files.path(f), self.fs
+            )
+            self._imports[f] = imports
+            self._index_imports(f, imports)
+
+        for f in stale_edges:
+            orphans |= self._clear_import_edges(f)
+            self._add_import_edges(f)
+
+        for node in orphans:
+            if node in self._graph and self._graph.degree(node) == 0:
+                self._remove_node(node)
+
+        if self._cache:
+            self._cache.evict()
+
+    def _index_imports(self, file_id: int, imports: List[LocalImport]):
+        self._unindex_imports(file_id)
+
+        for imp in imports:
+            if imp.module_type == ModuleType.LOCAL and imp.import_path:
+                export_file = self.files.intern(imp.import_path)
+                self._importers[export_file].add(file_id)
+                self._imported[file_id].add(export_file)
+            elif imp.module_type == ModuleType.UNKNOWN:
+                key = imp.namespace.to_path().parts
+                self._unresolved_importers[key].add(file_id)
+                self._unresolved[file_id].add(key)
+
+    def _remove_file(self, file_id: int) -> set[int]:
+        """
+        Removes every repo node of a file, along with its import and export edges.
+        Returns the nodes of other files that were connected to it
+        """
+        nodes = set(self._file_nodes.get(file_id, set()))
+        neighbours = set()
+        for node in nodes:
+            neighbours.update(self._graph.successors(node))
+            neighbours.update(self._graph.predecessors(node))
+
+        for node in nodes:
+            self._remove_node(node)
+        self._file_nodes.pop(file_id, None)
+        self._imports.pop(file_id, None)
+        self._missing_import_refs.pop(file_id, None)
+        self._resolved_import_refs.pop(file_id, None)
+        self._unindex_imports(file_id)
+
+        return neighbours - nodes
+
+    def _unindex_imports(self, file_id: int):
+        for export_file in self._imported.pop(file_id, set()):
+            self._importers[export_file].discard(file_id)
+        for key in self._unresolved.pop(file_id, set()):
+            self._unresolved_importers[key].discard(file_id)
+
+    def _clear_import_edges(self, file_id: int) -> set[int]:
+        """
+        Removes the import edges going out of the scopes of a file. Returns the
+        nodes at both ends of the removed edges
+        """
+        touched = set()
+        for node in self._file_nodes[file_id]:
+            out_edges = list(self._graph.out_edges(node))
+            if out_edges:
+                touched.add(node)
+                touched.update(v for _, v in out_edges)
+                self._graph.remove_edges_from(out_edges)
+
+        return touched
+
+    def _add_import_edges(self, file_id: int):
+        """
+        Maps the import refs of a file to the export scopes they resolve to
+        """
+        imports = self._imports[file_id]
+        imp2def: List[Tuple[LocalImport, ScopeID, str, int]] = []
+
+        self._missing_import_refs[file_id] = [str(imp.namespace) for imp in imports]
+        self._resolved_import_refs[file_id] = []
+
+        # resolve the different types of imports
+        local_imports = [
+            local_imp
+            for local_imp in imports
+            if local_imp.module_type == ModuleType.LOCAL
+        ]
+        imp2def.extend(self.map_local_to_exports(file_id, local_imports))
+
+        for imp, def_scope, name, export_file in imp2def:
+            if imp.module_type == ModuleType.LOCAL:
+                # establish an edge between all refs from all local scopes to the
+                # def scope in import_file
+                for ref_scope in imp.ref_scopes:
+                    # create nodes and edges
+                    ref_node = self._node_index.get((file_id, ref_scope), None)
+                    if ref_node is None:
+                        ref_node = self._add_node(file_id, ref_scope)
+                        self.total_scopes.add(ref_node)
+
+                    self._missing_import_refs[file_id] = [
+                        ref
+                        for ref in self._missing_import_refs[file_id]
+                        if ref != str(imp.namespace)
+                    ]
+                    self._resolved_import_refs[file_id].append(name)
+
+                    imp_node = self._node_index.get((export_file, def_scope), None)
+                    if imp_node is None:
+                        imp_node = self._add_node(export_file, def_scope)
+                        self.total_scopes.add(imp_node)
+
+                    self._graph.add_edge(
+                        ref_node,
+                        imp_node,
+                        kind=EdgeKind.ImportToExport,
+                    )
+
+    def _init_nodes(self):
+        """
+        Repo nodes are ints into side tables holding their (file id, scope)
+        """
+        self._node_keys: List[Optional[Tuple[int, ScopeID]]] = []
+        self._node_index: Dict[Tuple[int, ScopeID], int] = {}
+        # a view per node, so lookups don't allocate
+        self._nodes: List[Optional[RepoNodeView]] = []
+
+    def _add_node(self, file_id: int, scope: ScopeID) -> int:
+        key = (file_id, scope)
+        node = len(self._nodes)
+
+        self._node_keys.append(key)
+        self._node_index[key] = node
+        self._nodes.append(
+            RepoNodeView(node, self.files.path_str(file_id), scope, file_id)
+        )
+        self._file_nodes[file_id].add(node)
+        self._graph.add_node(node)
+
         return node
 
-    def import_to_export_scope(self, ref_node_id: RepoNodeID) -> List[RepoNode]:
+    def _remove_node(self, node: int):
+        # ids are not reused, the side tables keep a hole instead
+        key = self._node_keys[node]
+        self._graph.remove_node(node)
+        del self._node_index[key]
+        self._file_nodes[key[0]].discard(node)
+        self._node_keys[node] = None
+        self._nodes[node] = None
+
+    def find_node(self, path: Path | str, scope: ScopeID) -> Optional[int]:
+        """
+        The node of scope in the file at path, which must be resolved
+        """
+        file_id = self.files.get_id(path)
+        if file_id is None:
+            return None
+        return self._node_index.get((file_id, scope), None)
+
+    def _to_node(self, node: int | RepoNodeID) -> Optional[int]:
+        if isinstance(node, str):
+            file, scope = node.rsplit("::", 1)
+            return self.find_node(file, ScopeID(int(scope)))
+        return node if node in self._graph else None
+
+    def node_id(self, node: int) -> RepoNodeID:
+        return self._nodes[node].repo_id
+
+    def nodes(self) -> Iterator[RepoNodeView]:
+        return (self._nodes[n] for n in self._graph.nodes)
+
+    def edges(self) -> Iterator[Tuple[RepoNodeView, RepoNodeView]]:
+        return ((self._nodes[u], self._nodes[v]) for u, v in self._graph.edges)
+
+    def get_node(self, node: int | RepoNodeID) -> Optional[RepoNodeView]:
+        """
+        Looks a node up either by id or by its "path::scope" str
+        """
+        node = self._to_node(node)
+        if node is None:
+            return None
+
+        return self._nodes[node]
+
+    def import_to_export_scope(
+        self, ref_node: int | RepoNodeID
+    ) -> List[RepoNodeView]:
         """
         Returns the export (def) scopes that are tied to the import (ref) scope
         """
+        ref_node = self._to_node(ref_node)
+        if ref_node is None:
+            return []
 
         return [
-            self.get_node(v)
-            for _, v, attrs in self._graph.edges(ref_node_id, data=True)
+            self._nodes[v]
+            for v, attrs in self._graph._adj[ref_node].items()
             if attrs["kind"] == EdgeKind.ImportToExport
         ]
 
+    def scope_exports(
+        self, file: Path | int, scope: ScopeID
+    ) -> List[RepoNodeView]:
+        """
+        Same as import_to_export_scope for the scope of a file, given by path or
+        by id, without going through a node id str
+        """
+        if isinstance(file, int):
+            ref_node = self._node_index.get((file, scope), None)
+        else:
+            ref_node = self.find_node(file, scope)
+        if ref_node is None:
+            return []
+
+        return self.import_to_export_scope(ref_node)
+
     # TODO: make this language dependent function implemented outside of
     # repo_graph
     def map_local_to_exports(
-        self, path: Path, imports: List[LocalImport]
-    ) -> List[Tuple[LocalImport, str, ScopeID, Path]]:
+        self, file_id: int, imports: List[LocalImport]
+    ) -> List[Tuple[LocalImport, ScopeID, str, int]]:
         """
         Given an import namespace, map it to the local (export) definitions in
         the resolved import namespace path
@@ -145,58 +756,80 @@ class RepoGraph:
             if export_file:
                 # TODO: handle __init__.py case
                 if "__init__.py" in str(export_file):
-                    imports = self._imports[path]
+                    imports = self._imports[file_id]
                     pass
                 else:
                     # match with exports
+                    export_id = self.files.intern(export_file)
                     for name, def_scope in self._get_exports(
-                        self.scopes_map[export_file], export_file
+                        self._scopes[export_id], export_file
                     ):
                         if imp.namespace.child == name:
-                            imp2def.append((imp, def_scope, name, export_file))
+                            imp2def.append((imp, def_scope, name, export_id))
 
         return imp2def
 
     # TODO: add some sort of hierarchal structure to the scopes?
-    def _construct_scopes(self, fs: RepoFs) -> Dict[Path, ScopeGraph]:
+    def _construct_scopes(self, fs: RepoFs) -> Dict[int, ScopeGraph]:
         """
         Returns all the scopes associated with the files in the directory
         """
         scope_map = {}
         for path, file_content in fs.get_files_content():
-            # index by full path
-            scope_map[path.resolve()] = build_scope_graph(
-                file_content, language=LANGUAGE
-            )
+            # index by file id
+            scope_map[fs.file_id(path)] = self._build_scope_graph(file_content)
 
         return scope_map
 
+    def _build_scope_graph(
+        self, file_content: bytes
+    ) -> ScopeGraph | CompactScopeGraph:
+        if self._cache:
+            g = self._cache.get_or_build(
+                file_content, lambda src: build_scope_graph(src, language=LANGUAGE)
+            )
+        else:
+            g = build_scope_graph(file_content, language=LANGUAGE)
+
+        return g.compact() if self._compact else g
+
+    def _construct_parallel(self, fs: RepoFs, workers: int):
+        """
+        Fans out scope and import construction over a process pool. Results are
+        merged in file scan order so the graph is identical to a serial build
+        """
+        files = list(fs.get_files())
+        chunksize = max(1, len(files) // (workers * 4))
+        cache_path = self._cache.db_path if self._cache else None
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(fs, cache_path, self._compact, self._modules),
+        ) as pool:
+            for path, g, imports, key, hit in pool.map(
+                _build_file, files, chunksize=chunksize
+            ):
+                if key is not None:
+                    if hit:
+                        self._cache.touch(key)
+                    else:
+                        self._cache.put(key, g)
+                        g = g.compact() if self._compact else g
+
+                file_id = fs.file_id(path)
+                self._scopes[file_id] = g
+                self._imports[file_id] = imports
+
     # ultimately the output should be 3-tuple
     # (import_stmt, path, import_type)
     def _construct_import(
         self, g: ScopeGraph, file: Path, fs: RepoFs
-    ) -> Dict[Path, List[LocalImport]]:
+    ) -> List[LocalImport]:
         """
         Constructs a map from file to its imports
         """
-        # lists for checking if python module is system or third party
-        sys_modules_list = SysModules(LANGUAGE)
-        third_party_modules_list = ThirdPartyModules(LANGUAGE)
-
-        imports = []
-        for imp_node in g.get_all_imports():
-            imp_stmt = LocalImportStmt(imp_node.range, **imp_node.data)
-            imp_blocks = import_stmt_to_import(
-                import_stmt=imp_stmt,
-                filepath=file,
-                g=g,
-                fs=fs,
-                sys_modules=sys_modules_list,
-                third_party_modules=third_party_modules_list,
-            )
-            imports.extend(imp_blocks)
-
-        return imports
+        return file_imports(g, file, fs, self._modules)
 
     # NOTE: this would need to be handled differently for other langs
     def _get_exports(self, g: ScopeGraph, file: Path) -> List[Tuple[str, ScopeID]]:
@@ -222,26 +855,23 @@ class RepoGraph:
 
     def to_str(self):
         repr = ""
-        for u, v, _ in self._graph.edges(data=True):
-            u = self.get_node(u)
-            v = self.get_node(v)
-
+        for u, v in self.edges():
             repr += f"{u} -> {v}\n"
 
         return repr
 
     def print_missing_imports(self):
 
-        for path, missing_imports in self._missing_import_refs.items():
+        for file_id, missing_imports in self._missing_import_refs.items():
             total_missing = 0
             total_resolved = 0
 
-            print("Path: ", path)
+            print("Path: ", self.files.path(file_id))
             for missed in missing_imports:
                 print("-", missed)
                 total_missing += 1
-            if self._resolved_import_refs.get(path, None):
-                for resolved in self._resolved_import_refs[path]:
+            if self._resolved_import_refs.get(file_id, None):
+                for resolved in self._resolved_import_refs[file_id]:
                     total_resolved += 1
                     print("Resolved: ", resolved)
 
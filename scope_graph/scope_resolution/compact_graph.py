@@ -0,0 +1,525 @@
+from array import array
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import json
+
+from scope_graph.storage import ColumnFile, ColumnWriter, JsonTable
+from scope_graph.utils import TextRange
+
+from .graph_types import NodeKind, EdgeKind, ScopeNode, ScopeID
+from .scope_index import RefIndex, ScopeIndex
+
+NODE_KINDS = list(NodeKind)
+EDGE_KINDS = list(EdgeKind)
+
+# edges that attach a node to the scope it lives in, every node except the root
+# has exactly one of these
+MEMBER_EDGES = [
+    EdgeKind.ScopeToScope,
+    EdgeKind.DefToScope,
+    EdgeKind.ImportToScope,
+    EdgeKind.RefToOrigin,
+]
+MEMBER_EDGE_BY_KIND = {
+    NodeKind.SCOPE: EdgeKind.ScopeToScope,
+    NodeKind.DEFINITION: EdgeKind.DefToScope,
+    NodeKind.IMPORT: EdgeKind.ImportToScope,
+    NodeKind.REFERENCE: EdgeKind.RefToOrigin,
+}
+NO_NODE = -1
+
+
+class CSR:
+    """
+    Compressed sparse row adjacency: the neighbours of node i are
+    targets[offsets[i] : offsets[i + 1]]
+    """
+
+    def __init__(self, offsets: Sequence[int], targets: Sequence[int]):
+        self.offsets = offsets
+        self.targets = targets
+
+    @classmethod
+    def from_pairs(cls, num_nodes: int, pairs: List[Tuple[int, int]]) -> "CSR":
+        """
+        Builds the adjacency from (src, dst) pairs, keeping their relative order
+        """
+        counts = array("q", [0]) * (num_nodes + 1)
+        for src, _ in pairs:
+            counts[src + 1] += 1
+        for i in range(num_nodes):
+            counts[i + 1] += counts[i]
+
+        targets = array("q", [0]) * len(pairs)
+        fill = array("q", counts)
+        for src, dst in pairs:
+            targets[fill[src]] = dst
+            fill[src] += 1
+
+        return cls(counts, targets)
+
+    def neighbours(self, node: int) -> Sequence[int]:
+        return self.targets[self.offsets[node] : self.offsets[node + 1]]
+
+
+class CompactScopeGraph:
+    """
+    Read only, array backed form of a ScopeGraph. Nodes are stored as parallel
+    columns (kind, byte/point range, interned name, data, parent scope) and edges
+    as one CSR adjacency per edge kind, instead of a networkx graph of pydantic
+    dicts. Exposes the same query API as ScopeGraph
+    """
+
+    def __init__(
+        self,
+        root_idx: int,
+        kinds: Sequence[int],
+        ranges: Sequence[int],
+        names: Sequence[int],
+        data_ids: Sequence[int],
+        parents: Sequence[int],
+        adjacency: Dict[EdgeKind, CSR],
+        strings: List[str],
+        data: List[Dict],
+    ):
+        self.root_idx = root_idx
+        # ranges holds 6 ints per node:
+        # start_byte, end_byte, start_row, start_col, end_row, end_col
+        self._kinds = kinds
+        self._ranges = ranges
+        self._names = names
+        self._data_ids = data_ids
+        self._parents = parents
+        self._adjacency = adjacency
+        self._strings = strings
+        self._data = data
+
+        self._index: Optional[ScopeIndex] = None
+        self._ref_names: Optional[Dict[str, List[ScopeID]]] = None
+        self._ref_index: Optional[RefIndex] = None
+
+    @classmethod
+    def from_scope_graph(cls, g) -> "CompactScopeGraph":
+        nodes = g._graph.nodes(data=True)
+        num_nodes = len(nodes)
+
+        kinds = array("b")
+        ranges = array("q")
+        names = array("q")
+        data_ids = array("q")
+        parents = array("q", [NO_NODE]) * num_nodes
+
+        strings, string_ids = [], {}
+        data, data_index = [], {}
+
+        def intern(s: str) -> int:
+            if s not in string_ids:
+                string_ids[s] = len(strings)
+                strings.append(s)
+            return string_ids[s]
+
+        def intern_data(d: Dict) -> int:
+            key = repr(sorted(d.items()))
+            if key not in data_index:
+                data_index[key] = len(data)
+                data.append(d)
+            return data_index[key]
+
+        intern("")
+        intern_data({})
+
+        for idx in range(num_nodes):
+            attrs = nodes[idx]
+            node_range = attrs["range"]
+
+            kinds.append(NODE_KINDS.index(attrs["type"]))
+            ranges.extend(
+                (
+                    node_range["start_byte"],
+                    node_range["end_byte"],
+                    *node_range["start_point"],
+                    *node_range["end_point"],
+                )
+            )
+            names.append(intern(attrs["name"] or ""))
+            data_ids.append(intern_data(attrs["data"] or {}))
+
+        pairs = {kind: [] for kind in EDGE_KINDS}
+        for u, v, attrs in g._graph.edges(data=True):
+            kind = attrs["type"]
+            if kind in MEMBER_EDGES:
+                parents[u] = v
+                # stored reversed, ie. scope -> members
+                pairs[kind].append((v, u))
+            else:
+                pairs[kind].append((u, v))
+
+        adjacency = {
+            kind: CSR.from_pairs(num_nodes, kind_pairs)
+            for kind, kind_pairs in pairs.items()
+        }
+
+        return cls(
+            g.root_idx,
+            kinds,
+            ranges,
+            names,
+            data_ids,
+            parents,
+            adjacency,
+            strings,
+            data,
+        )
+
+    def __len__(self):
+        return len(self._kinds)
+
+    # allocation free accessors
+    def kind(self, idx: int) -> NodeKind:
+        return NODE_KINDS[self._kinds[idx]]
+
+    def name(self, idx: int) -> str:
+        return self._strings[self._names[idx]]
+
+    def parent(self, idx: int) -> int:
+        return self._parents[idx]
+
+    def line_range(self, idx: int) -> Tuple[int, int]:
+        return self._ranges[6 * idx + 2], self._ranges[6 * idx + 4]
+
+    def byte_range(self, idx: int) -> Tuple[int, int]:
+        return self._ranges[6 * idx], self._ranges[6 * idx + 1]
+
+    def text_range(self, idx: int) -> TextRange:
+        sb, eb, sr, sc, er, ec = self._ranges[6 * idx : 6 * idx + 6]
+        return TextRange(
+            start_byte=sb, end_byte=eb, start_point=(sr, sc), end_point=(er, ec)
+        )
+
+    def get_node(self, idx: int) -> ScopeNode:
+        return ScopeNode(
+            range=self.text_range(idx),
+            type=self.kind(idx),
+            name=self.name(idx),
+            data=dict(self._data[self._data_ids[idx]]),
+        )
+
+    def _members(self, scope: int, kind: EdgeKind) -> List[int]:
+        return list(self._adjacency[kind].neighbours(scope))
+
+    def scopes(self) -> List[ScopeID]:
+        scope_kind = NODE_KINDS.index(NodeKind.SCOPE)
+        return [i for i, kind in enumerate(self._kinds) if kind == scope_kind]
+
+    def imports(self, start: int) -> List[int]:
+        return self._members(start, EdgeKind.ImportToScope)
+
+    def get_all_imports(self) -> List[ScopeNode]:
+        all_imports = []
+        for scope in self.scopes():
+            all_imports.extend([self.get_node(i) for i in self.imports(scope)])
+
+        return all_imports
+
+    def definitions(self, start: int) -> List[ScopeNode]:
+        return [self.get_node(d) for d in self._members(start, EdgeKind.DefToScope)]
+
+    def get_all_definitions(self) -> List[ScopeNode]:
+        all_defs = []
+        for scope in self.scopes():
+            all_defs.extend(self.definitions(scope))
+
+        return all_defs
+
+    def references_by_origin(self, start: int) -> List[int]:
+        return self._members(start, EdgeKind.RefToOrigin)
+
+    def references_by_lines(
+        self, start_row: int, end_row: int
+    ) -> List[Tuple[int, ScopeID]]:
+        if self._ref_index is None:
+            self._ref_index = RefIndex(
+                (self._ranges[6 * ref + 2], self._ranges[6 * ref], ref, scope)
+                for scope in self.scopes()
+                for ref in self.references_by_origin(scope)
+            )
+
+        return self._ref_index.by_lines(start_row, end_row)
+
+    def refs_by_name(self, name: str) -> List[ScopeID]:
+        if self._ref_names is None:
+            self._ref_names = defaultdict(list)
+            for scope in self.scopes():
+                for ref in self.references_by_origin(scope):
+                    self._ref_names[self.name(ref)].append(scope)
+
+        return list(self._ref_names.get(name, []))
+
+    def child_scopes(self, start: ScopeID) -> List[ScopeID]:
+        return self._members(start, EdgeKind.ScopeToScope)
+
+    def parent_scope(self, start: ScopeID) -> Optional[ScopeID]:
+        if self.kind(start) == NodeKind.SCOPE and self._parents[start] != NO_NODE:
+            return self._parents[start]
+        return None
+
+    def parent_scope_stack(self, start: ScopeID) -> Iterator[ScopeID]:
+        while start is not None:
+            yield start
+            start = self.parent_scope(start)
+
+    def child_scope_stack(self, start: ScopeID) -> List[ScopeID]:
+        stack = self.child_scopes(start)
+
+        for child in self.child_scopes(start):
+            stack += self.child_scope_stack(child)
+
+        return stack
+
+    def ref_definitions(self, ref: int) -> List[int]:
+        return list(self._adjacency[EdgeKind.RefToDef].neighbours(ref))
+
+    def ref_imports(self, ref: int) -> List[int]:
+        return list(self._adjacency[EdgeKind.RefToImport].neighbours(ref))
+
+    def scope_by_range(
+        self, range: TextRange, start: ScopeID = None
+    ) -> Optional[ScopeID]:
+        """
+        Returns the smallest child scope that contains the given range
+        """
+        if not start:
+            start = self.root_idx
+
+        if self._index is None:
+            self._index = ScopeIndex(self.text_range(self.root_idx), self.root_idx)
+            for scope in self.scopes():
+                if scope != self.root_idx:
+                    self._index.add_scope(self.text_range(scope), scope)
+
+        resolved_scope_id = self._index.locate(range)
+        if resolved_scope_id is not None:
+            return resolved_scope_id
+
+        return start
+
+    def range_by_scope(self, scope: ScopeID) -> Optional[TextRange]:
+        if 0 <= scope < len(self) and self.kind(scope) == NodeKind.SCOPE:
+            return self.text_range(scope)
+        return None
+
+    def edges(self) -> Iterator[Tuple[int, int, EdgeKind]]:
+        """
+        Yields edges in the same order as ScopeGraph._graph.edges
+        """
+        for u in range(len(self)):
+            for kind in (EdgeKind.RefToDef, EdgeKind.RefToImport):
+                for v in self._adjacency[kind].neighbours(u):
+                    yield u, v, kind
+
+            if self._parents[u] != NO_NODE:
+                yield u, self._parents[u], MEMBER_EDGE_BY_KIND[self.kind(u)]
+
+    def to_str(self):
+        """
+        A str representation of the graph
+        """
+        repr = "\n"
+
+        for u, v, edge_type in self.edges():
+            repr += f"{u}:{self.name(u)} --{edge_type}-> {v}:{self.name(v)}\n"
+
+        return repr
+
+    def save(self, path: Path):
+        """
+        Writes the graph to a column file, see pack_scope_graphs
+        """
+        writer = ColumnWriter()
+        pack_scope_graphs(writer, [self])
+        writer.write(path)
+
+    @classmethod
+    def load(cls, path: Path, use_mmap: bool = True) -> "CompactScopeGraph":
+        """
+        Maps a graph written by save, its columns are read in place
+        """
+        return unpack_scope_graphs(ColumnFile(path, use_mmap=use_mmap))[0]
+
+    def scope_graph_state(self) -> Dict:
+        """
+        The graph in the pickled form of ScopeGraph, see ScopeGraph.__getstate__
+        """
+        nodes = [
+            (
+                self.kind(i).value,
+                self.name(i),
+                *self._ranges[6 * i : 6 * i + 6],
+                dict(self._data[self._data_ids[i]]),
+            )
+            for i in range(len(self))
+        ]
+        edges = [(u, v, kind.value) for u, v, kind in self.edges()]
+
+        return {"root_idx": self.root_idx, "nodes": nodes, "edges": edges}
+
+    def __getstate__(self):
+        state = {
+            k: v
+            for k, v in self.__dict__.items()
+            if k not in ("_index", "_ref_names", "_ref_index")
+        }
+        # columns mapped from a file are memoryviews, which don't pickle
+        for k in ("_kinds", "_ranges", "_names", "_data_ids", "_parents"):
+            state[k] = _to_array(state[k])
+        state["_adjacency"] = {
+            kind: CSR(_to_array(csr.offsets), _to_array(csr.targets))
+            for kind, csr in self._adjacency.items()
+        }
+        state["_strings"] = list(self._strings)
+        state["_data"] = [self._data[i] for i in range(len(self._data))]
+
+        return state
+
+    def __setstate__(self, state: Dict):
+        self.__dict__.update(state)
+        self._index = None
+        self._ref_names = None
+        self._ref_index = None
+
+
+def _to_array(column: Sequence[int]) -> array:
+    if isinstance(column, array):
+        return column
+    return array(column.format, column)
+
+
+def pack_scope_graphs(
+    writer: ColumnWriter, graphs: List[CompactScopeGraph], prefix: str = "sg"
+):
+    """
+    Adds graphs to writer as one set of columns. Node columns are concatenated,
+    with graph i owning nodes node_offsets[i] : node_offsets[i + 1], and node ids
+    stay local to their graph. Names and data are re-interned into tables shared
+    by all the graphs
+    """
+    roots, node_offsets = array("q"), array("q", [0])
+    kinds, ranges, names = array("b"), array("q"), array("q")
+    data_ids, parents = array("q"), array("q")
+    adjacency = {kind: (array("q"), array("q")) for kind in EDGE_KINDS}
+
+    strings, string_ids = [], {}
+    data, data_index = [], {}
+
+    for g in graphs:
+        roots.append(g.root_idx)
+        node_offsets.append(node_offsets[-1] + len(g))
+
+        kinds.extend(g._kinds)
+        ranges.extend(g._ranges)
+        parents.extend(g._parents)
+
+        local_names = []
+        for s in g._strings:
+            if s not in string_ids:
+                string_ids[s] = len(strings)
+                strings.append(s)
+            local_names.append(string_ids[s])
+        names.extend(local_names[i] for i in g._names)
+
+        local_data = []
+        for i in range(len(g._data)):
+            key = json.dumps(g._data[i], sort_keys=True)
+            if key not in data_index:
+                data_index[key] = len(data)
+                data.append(key)
+            local_data.append(data_index[key])
+        data_ids.extend(local_data[i] for i in g._data_ids)
+
+        for kind, (offsets, targets) in adjacency.items():
+            # a mapped graph's offsets point into a targets column it shares
+            # with the other graphs of its file
+            csr = g._adjacency[kind]
+            first, last = csr.offsets[0], csr.offsets[len(g)]
+            base = len(targets) - first
+            offsets.extend(csr.offsets[i] + base for i in range(len(g)))
+            targets.extend(csr.targets[first:last])
+
+    for kind, (offsets, targets) in adjacency.items():
+        offsets.append(len(targets))
+        writer.add(f"{prefix}.{kind.value}.offsets", offsets)
+        writer.add(f"{prefix}.{kind.value}.targets", targets)
+
+    writer.add(f"{prefix}.roots", roots)
+    writer.add(f"{prefix}.node_offsets", node_offsets)
+    writer.add(f"{prefix}.kinds", kinds)
+    writer.add(f"{prefix}.ranges", ranges)
+    writer.add(f"{prefix}.names", names)
+    writer.add(f"{prefix}.data_ids", data_ids)
+    writer.add(f"{prefix}.parents", parents)
+    writer.add_strings(f"{prefix}.strings", strings)
+    writer.add_strings(f"{prefix}.data", data)
+
+
+class PackedScopeGraphs(Sequence[CompactScopeGraph]):
+    """
+    The graphs written by pack_scope_graphs. Graph i is sliced out of the
+    file's columns on first access, so opening costs nothing per graph
+    """
+
+    def __init__(self, columns: ColumnFile, prefix: str = "sg"):
+        self._roots = columns.column(f"{prefix}.roots")
+        self._node_offsets = columns.column(f"{prefix}.node_offsets")
+        self._kinds = columns.column(f"{prefix}.kinds")
+        self._ranges = columns.column(f"{prefix}.ranges")
+        self._names = columns.column(f"{prefix}.names")
+        self._data_ids = columns.column(f"{prefix}.data_ids")
+        self._parents = columns.column(f"{prefix}.parents")
+        self._strings = columns.strings(f"{prefix}.strings")
+        self._data = JsonTable(columns.strings(f"{prefix}.data"))
+        self._adjacency = {
+            kind: (
+                columns.column(f"{prefix}.{kind.value}.offsets"),
+                columns.column(f"{prefix}.{kind.value}.targets"),
+            )
+            for kind in EDGE_KINDS
+        }
+        self._graphs: Dict[int, CompactScopeGraph] = {}
+
+    def __len__(self) -> int:
+        return len(self._roots)
+
+    def __getitem__(self, i: int) -> CompactScopeGraph:
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+
+        if i not in self._graphs:
+            start, end = self._node_offsets[i], self._node_offsets[i + 1]
+            self._graphs[i] = CompactScopeGraph(
+                self._roots[i],
+                self._kinds[start:end],
+                self._ranges[6 * start : 6 * end],
+                self._names[start:end],
+                self._data_ids[start:end],
+                self._parents[start:end],
+                {
+                    # offsets index into the shared targets column
+                    kind: CSR(offsets[start : end + 1], targets)
+                    for kind, (offsets, targets) in self._adjacency.items()
+                },
+                self._strings,
+                self._data,
+            )
+
+        return self._graphs[i]
+
+
+def unpack_scope_graphs(
+    columns: ColumnFile, prefix: str = "sg"
+) -> List[CompactScopeGraph]:
+    """
+    Inverse of pack_scope_graphs. The graphs are slices of the file's columns,
+    so this only costs a few views per graph
+    """
+    return list(PackedScopeGraphs(columns, prefix))
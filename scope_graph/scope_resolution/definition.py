@@ -1,23 +1,26 @@
 from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, Union
 
-from scope_graph.utils import TextRange
+from scope_graph.utils import LazyRange, RawRange, TextRange
 
 from .graph_types import NodeKind
 
 
 @dataclass
-class LocalDef:
-    range: TextRange
+class LocalDef(LazyRange):
+    raw_range: RawRange
     symbol: str
     name: str
 
     def __init__(
-        self, range: TextRange, buffer: bytearray, symbol: Optional[str]
+        self,
+        range: Union[TextRange, RawRange],
+        buffer: bytearray,
+        symbol: Optional[str],
     ) -> "LocalDef":
-        self.range = range
+        super().__init__(range)
         self.symbol = symbol
-        self.name = buffer[self.range.start_byte : self.range.end_byte].decode("utf-8")
+        self.name = buffer[range.start_byte : range.end_byte].decode("utf-8")
 
     def to_node(self):
         return {
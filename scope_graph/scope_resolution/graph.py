@@ -1,17 +1,19 @@
 from networkx import DiGraph, dfs_postorder_nodes
+from pathlib import Path
 from typing import Dict, Optional, Iterator, List, NewType, Tuple
 from enum import Enum
 from collections import defaultdict
 
 from scope_graph.graph import Node
-from scope_graph.utils import TextRange
+from scope_graph.utils import RawRange, TextRange
 
-from .imports import LocalImportStmt
+from .imports import LocalImportStmt, bound_names
 from .definition import LocalDef
 from .reference import Reference
-from .scope import LocalScope, ScopeStack
+from .scope import LocalScope, ScopeStack, Scoping
 from .graph_types import NodeKind, EdgeKind, ScopeNode, ScopeID
-from .interval_tree import IntervalGraph
+from .scope_index import RefIndex, ScopeIndex
+from .compact_graph import CompactScopeGraph
 
 
 class ScopeGraph:
@@ -19,6 +21,7 @@ class ScopeGraph:
         # TODO: put all this logic into a separate Graph class
         self._graph = DiGraph()
         self._node_counter = 0
+        self._init_indexes()
 
         self.scope2range: Dict[ScopeID, TextRange] = {}
 
@@ -27,18 +30,63 @@ class ScopeGraph:
         self.scope2range[self.root_idx] = range
 
         # use this to faster resolve range -> scope queries
-        self._ig = IntervalGraph(range, self.root_idx)
+        self._index = ScopeIndex(range, self.root_idx)
+
+    def _init_indexes(self):
+        """
+        Per edge kind adjacency, kept in sync with _graph by _add_edge so that
+        scope queries don't have to filter the edges of the whole graph
+        """
+        self._scopes: List[ScopeID] = []
+        self._parent_scopes: Dict[ScopeID, ScopeID] = {}
+        self._child_scopes: Dict[ScopeID, List[ScopeID]] = defaultdict(list)
+        self._scope_defs: Dict[ScopeID, List[int]] = defaultdict(list)
+        self._scope_imports: Dict[ScopeID, List[int]] = defaultdict(list)
+        self._scope_refs: Dict[ScopeID, List[int]] = defaultdict(list)
+        # ref name -> origin scope of each ref with that name
+        self._ref_names: Dict[str, List[ScopeID]] = defaultdict(list)
+        # refs by line, built on first use and dropped when a ref is added
+        self._ref_index: Optional[RefIndex] = None
+
+        # per scope symbol tables: name -> def ids and imported name -> import ids
+        self._def_symbols: Dict[ScopeID, Dict[str, List[int]]] = defaultdict(
+            lambda: defaultdict(list)
+        )
+        self._import_symbols: Dict[ScopeID, Dict[str, List[int]]] = defaultdict(
+            lambda: defaultdict(list)
+        )
+
+    def _add_edge(self, src: int, dst: int, kind: EdgeKind):
+        self._graph.add_edge(src, dst, type=kind)
+
+        match kind:
+            case EdgeKind.ScopeToScope:
+                self._parent_scopes[src] = dst
+                self._child_scopes[dst].append(src)
+            case EdgeKind.DefToScope:
+                self._scope_defs[dst].append(src)
+                self._def_symbols[dst][self._graph.nodes[src]["name"]].append(src)
+            case EdgeKind.ImportToScope:
+                self._scope_imports[dst].append(src)
+                # an import stmt is a candidate once per name, even if repeated
+                data = self._graph.nodes[src]["data"]
+                names = bound_names(data["names"], data.get("aliases", []))
+                for name in dict.fromkeys(names):
+                    self._import_symbols[dst][name].append(src)
+            case EdgeKind.RefToOrigin:
+                self._scope_refs[dst].append(src)
+                self._ref_names[self._graph.nodes[src]["name"]].append(dst)
+                self._ref_index = None
 
     def insert_local_scope(self, new: LocalScope):
         """
         Insert local scope to smallest enclosing parent scope
         """
-        parent_scope = self.scope_by_range(new.range, self.root_idx)
+        parent_scope = self.scope_by_range(new.raw_range, self.root_idx)
         if parent_scope is not None:
-            new_node = ScopeNode(range=new.range, type=NodeKind.SCOPE)
-            new_id = self.add_node(new_node)
-            self._graph.add_edge(new_id, parent_scope, type=EdgeKind.ScopeToScope)
-            self._ig.add_scope(new.range, new_id)
+            new_id = self._add_node(NodeKind.SCOPE, new.raw_range)
+            self._add_edge(new_id, parent_scope, EdgeKind.ScopeToScope)
+            self._index.add_scope(new.raw_range, new_id)
 
             self.scope2range[new_id] = new.range
 
@@ -46,11 +94,11 @@ class ScopeGraph:
         """
         Insert import into smallest enclosing parent scope
         """
-        parent_scope = self.scope_by_range(new.range, self.root_idx)
+        parent_scope = self.scope_by_range(new.raw_range, self.root_idx)
         if parent_scope is not None:
-            new_node = ScopeNode(
-                range=new.range,
-                type=NodeKind.IMPORT,
+            new_id = self._add_node(
+                NodeKind.IMPORT,
+                new.raw_range,
                 data={
                     "from_name": new.from_name,
                     "aliases": new.aliases,
@@ -58,122 +106,132 @@ class ScopeGraph:
                 },
             )
 
-            new_id = self.add_node(new_node)
-            self._graph.add_edge(new_id, parent_scope, type=EdgeKind.ImportToScope)
+            self._add_edge(new_id, parent_scope, EdgeKind.ImportToScope)
 
     def insert_local_def(self, new: LocalDef) -> None:
         """
         Insert a def into the scope-graph
         """
-        defining_scope = self.scope_by_range(new.range, self.root_idx)
+        self._insert_local_def(new, self.scope_by_range(new.raw_range, self.root_idx))
+
+    def _insert_local_def(self, new: LocalDef, defining_scope: Optional[ScopeID]):
         if defining_scope is not None:
-            new_def = ScopeNode(
-                range=new.range,
+            new_idx = self._add_node(
+                NodeKind.DEFINITION,
+                new.raw_range,
                 name=new.name,
-                type=NodeKind.DEFINITION,
                 data={"def_type": new.symbol},
             )
-            new_idx = self.add_node(new_def)
-            self._graph.add_edge(new_idx, defining_scope, type=EdgeKind.DefToScope)
+            self._add_edge(new_idx, defining_scope, EdgeKind.DefToScope)
 
     def insert_hoisted_def(self, new: LocalDef) -> None:
         """
         Insert a def into the scope-graph, at the parent scope of the defining scope
         """
-        defining_scope = self.scope_by_range(new.range, self.root_idx)
+        self._insert_hoisted_def(
+            new, self.scope_by_range(new.raw_range, self.root_idx)
+        )
+
+    def _insert_hoisted_def(self, new: LocalDef, defining_scope: Optional[ScopeID]):
         if defining_scope is not None:
             def_type = new.symbol
-            new_def = ScopeNode(
-                range=new.range,
-                name=new.name,
-                type=NodeKind.DEFINITION,
-            )
-            new_idx = self.add_node(new_def)
+            new_idx = self._add_node(NodeKind.DEFINITION, new.raw_range, name=new.name)
 
             # if the parent scope exists, insert this def there, if not,
             # insert into the defining scope
             parent_scope = self.parent_scope(defining_scope)
             target_scope = parent_scope if parent_scope is not None else defining_scope
 
-            self._graph.add_edge(new_idx, target_scope, type=EdgeKind.DefToScope)
+            self._add_edge(new_idx, target_scope, EdgeKind.DefToScope)
 
     def insert_global_def(self, new: LocalDef) -> None:
         """
         Insert a def into the scope-graph, at the root scope
         """
-        new_def = ScopeNode(
-            range=new.range,
-            name=new.name,
-            type=NodeKind.DEFINITION,
-        )
-        new_idx = self.add_node(new_def)
-        self._graph.add_edge(new_idx, self.root_idx, type=EdgeKind.DefToScope)
+        new_idx = self._add_node(NodeKind.DEFINITION, new.raw_range, name=new.name)
+        self._add_edge(new_idx, self.root_idx, EdgeKind.DefToScope)
 
     def insert_ref(self, new: Reference) -> None:
+        self._insert_ref(new, self.scope_by_range(new.raw_range, self.root_idx))
+
+    def insert_batch(
+        self, defs: List[Tuple[LocalDef, Scoping]], refs: List[Reference]
+    ) -> None:
+        """
+        Insert all the defs and refs of a file at once. Their enclosing scopes are
+        located in a single sorted sweep instead of one index lookup per capture,
+        the resulting graph is the same as inserting them one by one, in order
+        """
+        scopes = self._locate_many(
+            [local_def.raw_range for local_def, _ in defs]
+            + [ref.raw_range for ref in refs]
+        )
+
+        for (local_def, scoping), scope in zip(defs, scopes):
+            match scoping:
+                case Scoping.GLOBAL:
+                    self.insert_global_def(local_def)
+                case Scoping.HOISTED:
+                    self._insert_hoisted_def(local_def, scope)
+                case Scoping.LOCAL:
+                    self._insert_local_def(local_def, scope)
+
+        for ref, scope in zip(refs, scopes[len(defs) :]):
+            self._insert_ref(ref, scope)
+
+    def _locate_many(self, ranges: List[RawRange]) -> List[ScopeID]:
+        """
+        Resolves scope_by_range for many ranges at once
+        """
+        return [
+            scope if scope is not None else self.root_idx
+            for scope in self._index.locate_many(ranges)
+        ]
+
+    def _insert_ref(self, new: Reference, local_scope_idx: Optional[ScopeID]):
         possible_defs = []
         possible_imports = []
 
-        local_scope_idx = self.scope_by_range(new.range, self.root_idx)
         if local_scope_idx is not None:
             # traverse the scopes from the current-scope to the root-scope
             for scope in self.parent_scope_stack(local_scope_idx):
                 # find candidate definitions in each scope
-                for local_def in [
-                    src
-                    for src, dst, attrs in self._graph.in_edges(scope, data=True)
-                    if attrs["type"] == EdgeKind.DefToScope
-                ]:
-                    def_node = self.get_node(local_def)
-                    if def_node.type == NodeKind.DEFINITION:
-                        if new.name == def_node.name:
-                            possible_defs.append((local_def, def_node.name))
-                            break  # ensure that we add the first definition in the nearest ancestor scope
+                def_ids = self._def_symbols.get(scope, {}).get(new.name, None)
+                if def_ids:
+                    # ensure that we add the first definition in the nearest ancestor scope
+                    possible_defs.append((def_ids[0], new.name))
 
                 # find candidate imports in each scope
                 # TODO: fix this for new import names format
-                for local_import in [
-                    src
-                    for src, dst, attrs in self._graph.in_edges(scope, data=True)
-                    if attrs["type"] == EdgeKind.ImportToScope
-                ]:
-                    import_node = self.get_node(local_import)
-                    if import_node.type == NodeKind.IMPORT:
-                        if new.name in import_node.data["names"]:
-                            possible_imports.append((local_import, import_node.name))
+                for local_import in self._import_symbols.get(scope, {}).get(
+                    new.name, []
+                ):
+                    possible_imports.append((local_import, new.name))
 
         if possible_defs or possible_imports:
-            new_ref = ScopeNode(range=new.range, name=new.name, type=NodeKind.REFERENCE)
-            ref_idx = self.add_node(new_ref)
+            ref_idx = self._add_node(NodeKind.REFERENCE, new.raw_range, name=new.name)
 
             for def_idx, _ in possible_defs:
-                self._graph.add_edge(ref_idx, def_idx, type=EdgeKind.RefToDef)
+                self._add_edge(ref_idx, def_idx, EdgeKind.RefToDef)
 
             for imp_idx, _ in possible_imports:
-                self._graph.add_edge(ref_idx, imp_idx, type=EdgeKind.RefToImport)
+                self._add_edge(ref_idx, imp_idx, EdgeKind.RefToImport)
 
             # add an edge back to the originating scope of the reference
-            self._graph.add_edge(ref_idx, local_scope_idx, type=EdgeKind.RefToOrigin)
+            self._add_edge(ref_idx, local_scope_idx, EdgeKind.RefToOrigin)
 
     # TODO: maybe we want to think about another class for sticking all these utility access methods
     def scopes(self) -> List[ScopeID]:
         """
         Return all scopes in the graph
         """
-        return [
-            u
-            for u, attrs in self._graph.nodes(data=True)
-            if attrs["type"] == NodeKind.SCOPE
-        ]
+        return list(self._scopes)
 
     def imports(self, start: int) -> List[int]:
         """
         Get all imports in the scope
         """
-        return [
-            u
-            for u, v, attrs in self._graph.in_edges(start, data=True)
-            if attrs["type"] == EdgeKind.ImportToScope
-        ]
+        return list(self._scope_imports.get(start, []))
 
     def get_all_imports(self) -> List[ScopeNode]:
         all_imports = []
@@ -188,11 +246,7 @@ class ScopeGraph:
         """
         Get all definitions in the scope and child scope
         """
-        return [
-            self.get_node(u)
-            for u, v, attrs in self._graph.in_edges(start, data=True)
-            if attrs["type"] == EdgeKind.DefToScope
-        ]
+        return [self.get_node(u) for u in self._scope_defs.get(start, [])]
 
     def get_all_definitions(self) -> List[ScopeNode]:
         all_defs = []
@@ -207,31 +261,50 @@ class ScopeGraph:
         """
         Get all references in the scope and child scope
         """
-        return [
-            u
-            for u, v, attrs in self._graph.in_edges(start, data=True)
-            if attrs["type"] == EdgeKind.RefToOrigin
-        ]
+        return list(self._scope_refs.get(start, []))
+
+    def references_by_lines(
+        self, start_row: int, end_row: int
+    ) -> List[Tuple[int, ScopeID]]:
+        """
+        Returns (ref id, origin scope) of the references starting between two
+        rows inclusive, in source order
+        """
+        if self._ref_index is None:
+            nodes = self._graph.nodes
+            self._ref_index = RefIndex(
+                (
+                    nodes[ref]["range"]["start_point"][0],
+                    nodes[ref]["range"]["start_byte"],
+                    ref,
+                    scope,
+                )
+                for scope, refs in self._scope_refs.items()
+                for ref in refs
+            )
+
+        return self._ref_index.by_lines(start_row, end_row)
+
+    def refs_by_name(self, name: str) -> List[ScopeID]:
+        """
+        Origin scopes of all the references to name, one per reference, in the
+        same order as walking references_by_origin over scopes()
+        """
+        # scope ids are assigned in the same order as scopes(), and the sort is
+        # stable, so refs in the same scope keep their order
+        return sorted(self._ref_names.get(name, []))
 
     def child_scopes(self, start: ScopeID) -> List[ScopeID]:
         """
         Get all child scopes of the given scope
         """
-        return [
-            u
-            for u, v, attrs in self._graph.edges(data=True)
-            if attrs["type"] == EdgeKind.ScopeToScope and v == start
-        ]
+        return list(self._child_scopes.get(start, []))
 
     def parent_scope(self, start: ScopeID) -> Optional[ScopeID]:
         """
         Produce the parent scope of a given scope
         """
-        if self.get_node(start).type == NodeKind.SCOPE:
-            for src, dst, attrs in self._graph.out_edges(start, data=True):
-                if attrs["type"] == EdgeKind.ScopeToScope:
-                    return dst
-        return None
+        return self._parent_scopes.get(start, None)
 
     # def scope_by_range(self, range: TextRange, start: ScopeID = None) -> ScopeID:
     #     """
@@ -261,7 +334,7 @@ class ScopeGraph:
         if not start:
             start = self.root_idx
 
-        resolved_scope_id = self._ig.contains(range, overlap=False)
+        resolved_scope_id = self._index.locate(range)
         if resolved_scope_id is not None:
             return resolved_scope_id
 
@@ -294,7 +367,7 @@ class ScopeGraph:
         """
         Returns stack of parent scope traversed
         """
-        return ScopeStack(self._graph, start)
+        return ScopeStack(self._parent_scopes, start)
 
     def add_node(self, node: ScopeNode) -> int:
         """
@@ -302,6 +375,30 @@ class ScopeGraph:
         """
         id = self._node_counter
         self._graph.add_node(id, **node.dict())
+        if node.type == NodeKind.SCOPE:
+            self._scopes.append(id)
+
+        self._node_counter += 1
+
+        return id
+
+    def _add_node(
+        self,
+        type: NodeKind,
+        range: RawRange,
+        name: str = "",
+        data: Optional[Dict] = None,
+    ) -> int:
+        """
+        Same as add_node but writes the node attributes directly, skipping the
+        ScopeNode validation
+        """
+        id = self._node_counter
+        self._graph.add_node(
+            id, range=range.to_dict(), type=type, name=name, data=data or {}
+        )
+        if type == NodeKind.SCOPE:
+            self._scopes.append(id)
 
         self._node_counter += 1
 
@@ -310,6 +407,80 @@ class ScopeGraph:
     def get_node(self, idx: int) -> ScopeNode:
         return ScopeNode(**self._graph.nodes(data=True)[idx])
 
+    def compact(self) -> "CompactScopeGraph":
+        """
+        Returns a read only, array backed copy of this graph
+        """
+        return CompactScopeGraph.from_scope_graph(self)
+
+    def save(self, path: Path):
+        """
+        Writes the graph to a binary column file, see CompactScopeGraph.save
+        """
+        self.compact().save(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "ScopeGraph":
+        """
+        Rebuilds a graph written by save without reparsing the source. Use
+        CompactScopeGraph.load for a read only graph that skips the rebuild
+        """
+        g = cls.__new__(cls)
+        g.__setstate__(CompactScopeGraph.load(path).scope_graph_state())
+
+        return g
+
+    def __getstate__(self):
+        """
+        Flattens the graph into plain tuples so that it pickles compactly, ie.
+        when shipped back from a worker process
+        """
+        nodes = []
+        for _, attrs in self._graph.nodes(data=True):
+            range = attrs["range"]
+            nodes.append(
+                (
+                    attrs["type"].value,
+                    attrs["name"],
+                    range["start_byte"],
+                    range["end_byte"],
+                    *range["start_point"],
+                    *range["end_point"],
+                    attrs["data"],
+                )
+            )
+        edges = [
+            (u, v, attrs["type"].value) for u, v, attrs in self._graph.edges(data=True)
+        ]
+
+        return {"root_idx": self.root_idx, "nodes": nodes, "edges": edges}
+
+    def __setstate__(self, state: Dict):
+        self._graph = DiGraph()
+        self._node_counter = 0
+        self._init_indexes()
+        self.scope2range = {}
+        self.root_idx = state["root_idx"]
+
+        # node ids are assigned in insertion order, so re-adding the nodes and
+        # edges in order reproduces the same ids and the same in_edges order
+        for kind, name, sb, eb, sr, sc, er, ec, data in state["nodes"]:
+            range = TextRange(
+                start_byte=sb, end_byte=eb, start_point=(sr, sc), end_point=(er, ec)
+            )
+            node = ScopeNode(range=range, type=NodeKind(kind), name=name, data=data)
+            id = self.add_node(node)
+
+            if node.type == NodeKind.SCOPE:
+                self.scope2range[id] = range
+                if id == self.root_idx:
+                    self._index = ScopeIndex(range, id)
+                else:
+                    self._index.add_scope(range, id)
+
+        for u, v, kind in state["edges"]:
+            self._add_edge(u, v, EdgeKind(kind))
+
     def to_str(self):
         """
         A str representation of the graph
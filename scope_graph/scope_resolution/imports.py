@@ -1,24 +1,24 @@
 from dataclasses import dataclass, asdict
-from typing import Optional, List
+from typing import Optional, List, Union
 
-from scope_graph.utils import TextRange
+from scope_graph.utils import LazyRange, RawRange, TextRange
 
 from .graph_types import NodeKind
 
 
-def parse_from(buffer: bytearray, range: TextRange) -> str:
+def parse_from(buffer: bytearray, range: Union[TextRange, RawRange]) -> str:
     return buffer[range.start_byte : range.end_byte].decode("utf-8")
 
 
-def parse_alias(buffer: bytearray, range: TextRange):
+def parse_alias(buffer: bytearray, range: Union[TextRange, RawRange]):
     return buffer[range.start_byte : range.end_byte].decode("utf-8")
 
 
-def parse_name(buffer: bytearray, range: TextRange):
+def parse_name(buffer: bytearray, range: Union[TextRange, RawRange]):
     return buffer[range.start_byte : range.end_byte].decode("utf-8")
 
 
-class LocalImportStmt:
+class LocalImportStmt(LazyRange):
     """
     Represents a local import statement of the form:
 
@@ -28,22 +28,37 @@ class LocalImportStmt:
 
     def __init__(
         self,
-        range: TextRange,
+        range: Union[TextRange, RawRange],
         names: List[str],
         from_name: Optional[str] = "",
-        aliases: Optional[List[str]] = [],
+        aliases: Optional[List[Optional[str]]] = [],
     ):
-        self.range = range
+        super().__init__(range)
         self.names = names
         self.from_name = from_name
-        self.aliases = aliases
+        # one per name, None if the name is not aliased
+        self.aliases = list(aliases) + [None] * (len(names) - len(aliases))
+
+    def bound_names(self) -> List[str]:
+        """
+        The names this statement introduces into its scope
+        """
+        return bound_names(self.names, self.aliases)
 
     # Technically, this is the only python specific method
     def __str__(self):
         from_name = f"from {self.from_name} " if self.from_name else ""
-        # TODO: fix this
-        alias_str = f" as {self.aliases}" if self.aliases else ""
+        names = ", ".join(
+            f"{name} as {alias}" if alias else name
+            for name, alias in zip(self.names, self.aliases)
+        )
+
+        return f"{from_name}import {names}"
 
-        names = ", ".join(self.names)
 
-        return f"{from_name}import {names}{alias_str}"
+def bound_names(names: List[str], aliases: List[Optional[str]]) -> List[str]:
+    """
+    import a.b binds a, import a.b as c binds c
+    """
+    aliases = list(aliases) + [None] * (len(names) - len(aliases))
+    return [alias or name.split(".")[0] for name, alias in zip(names, aliases)]
@@ -1,17 +1,20 @@
-from typing import Optional
+from typing import Optional, Union
 from dataclasses import dataclass
 
-from scope_graph.utils import SymbolId, TextRange
+from scope_graph.utils import LazyRange, RawRange, SymbolId, TextRange
 
 
 @dataclass
-class Reference:
-    range: TextRange
+class Reference(LazyRange):
+    raw_range: RawRange
     symbol_id: Optional[SymbolId]
 
     def __init__(
-        self, range: TextRange, buffer: bytearray, symbol_id: Optional[SymbolId] = None
+        self,
+        range: Union[TextRange, RawRange],
+        buffer: bytearray,
+        symbol_id: Optional[SymbolId] = None,
     ) -> "Reference":
-        self.range = range
+        super().__init__(range)
         self.symbol_id = symbol_id
-        self.name = buffer[self.range.start_byte : self.range.end_byte].decode("utf-8")
+        self.name = buffer[range.start_byte : range.end_byte].decode("utf-8")
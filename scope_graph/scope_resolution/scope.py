@@ -1,19 +1,14 @@
-from dataclasses import dataclass
-from typing import Optional, Iterator
-from networkx import DiGraph
+from typing import Optional, Iterator, Mapping, Union
 from enum import Enum
 
-from scope_graph.utils import TextRange
+from scope_graph.utils import LazyRange, RawRange, TextRange
 
 from .graph_types import EdgeKind
 
 
-@dataclass
-class LocalScope:
-    range: TextRange
-
-    def __init__(self, range: TextRange):
-        self.range = range
+class LocalScope(LazyRange):
+    def __init__(self, range: Union[TextRange, RawRange]):
+        super().__init__(range)
 
 
 class Scoping(str, Enum):
@@ -23,8 +18,8 @@ class Scoping(str, Enum):
 
 
 class ScopeStack(Iterator):
-    def __init__(self, scope_graph: DiGraph, start: Optional[int]):
-        self.scope_graph = scope_graph
+    def __init__(self, parent_scopes: Mapping[int, int], start: Optional[int]):
+        self.parent_scopes = parent_scopes
         self.start = start
 
     def __iter__(self) -> "ScopeStack":
@@ -34,14 +29,7 @@ class ScopeStack(Iterator):
     def __next__(self) -> int:
         if self.start is not None:
             original = self.start
-            parent = None
-            for _, target, attrs in self.scope_graph.out_edges(self.start, data=True):
-                if (
-                    attrs.get("type") == EdgeKind.ScopeToScope
-                ):  # Replace with appropriate edge kind check
-                    parent = target
-                    break
-            self.start = parent
+            self.start = self.parent_scopes.get(self.start, None)
             return original
         else:
             raise StopIteration
@@ -0,0 +1,137 @@
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from scope_graph.utils import TextRange
+
+from .graph_types import ScopeID
+
+# (start_byte, -end_byte, insertion order), so that among scopes starting at the
+# same byte the innermost one sorts last
+ScopeKey = Tuple[int, int, int]
+
+
+class ScopeIndex:
+    """
+    Smallest enclosing scope lookups by byte offset. Scopes are properly nested,
+    so they are kept sorted by start with a pointer to their parent: a lookup
+    bisects for the last scope starting before the range and climbs its ancestors
+    until one contains the range
+    """
+
+    def __init__(self, range: TextRange, root_id: int):
+        self._keys: List[ScopeKey] = []
+        self._ids: List[int] = []
+
+        self._start: Dict[int, int] = {}
+        self._end: Dict[int, int] = {}
+        self._parent: Dict[int, Optional[int]] = {}
+
+        self.root_id = root_id
+        self.add_scope(range, root_id)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add_scope(self, range: TextRange, scope_id: int):
+        start, end = range.start_byte, range.end_byte
+        key = (start, -end, len(self._ids))
+
+        parent = self._locate(start, end)
+        self._start[scope_id] = start
+        self._end[scope_id] = end
+        self._parent[scope_id] = parent
+
+        pos = bisect_right(self._keys, key)
+        self._keys.insert(pos, key)
+        self._ids.insert(pos, scope_id)
+
+        # scopes are normally added outer first, in which case nothing follows
+        # inside the new scope. Otherwise adopt the ones that it now encloses
+        for child in self._ids[pos + 1 :]:
+            if self._start[child] > end:
+                break
+            if self._parent[child] == parent and self._end[child] <= end:
+                self._parent[child] = scope_id
+
+    def parent(self, scope_id: int) -> Optional[int]:
+        return self._parent[scope_id]
+
+    def locate(self, range: TextRange) -> Optional[int]:
+        """
+        Returns the smallest scope that contains the range
+        """
+        return self._locate(range.start_byte, range.end_byte)
+
+    def _locate(self, start: int, end: int) -> Optional[int]:
+        pos = bisect_right(self._keys, (start, float("inf"))) - 1
+        if pos < 0:
+            return None
+
+        scope = self._ids[pos]
+        while scope is not None and not (
+            self._start[scope] <= start and end <= self._end[scope]
+        ):
+            scope = self._parent[scope]
+
+        return scope
+
+    def locate_many(self, ranges: Sequence[TextRange]) -> List[Optional[int]]:
+        """
+        Same as locate for every range, but resolved in a single sweep over the
+        ranges sorted by start, keeping a stack of the scopes open at that point
+        """
+        located: List[Optional[int]] = [None] * len(ranges)
+        queries = sorted(
+            (range.start_byte, range.end_byte, i) for i, range in enumerate(ranges)
+        )
+
+        # innermost open scope on top
+        stack: List[int] = []
+        next_scope = 0
+        for start, end, i in queries:
+            while next_scope < len(self._ids) and self._keys[next_scope][0] <= start:
+                scope = self._ids[next_scope]
+                while stack and self._end[stack[-1]] <= self._start[scope]:
+                    stack.pop()
+                stack.append(scope)
+                next_scope += 1
+
+            while stack and self._end[stack[-1]] <= start:
+                stack.pop()
+
+            # the range can still stick out of the innermost scopes
+            for scope in reversed(stack):
+                if end <= self._end[scope]:
+                    located[i] = scope
+                    break
+
+        return located
+
+
+class RefIndex:
+    """
+    The references of a file sorted by (start row, start byte), as parallel
+    arrays with the origin scope of each ref, so the refs on a span of lines are
+    found by bisecting the rows instead of re-parsing the text of the span
+    """
+
+    def __init__(self, refs: Iterable[Tuple[int, int, int, ScopeID]]):
+        # (start row, start byte, ref id, origin scope)
+        refs = sorted(refs)
+        self._rows = array("q", [row for row, _, _, _ in refs])
+        self._refs = array("q", [ref for _, _, ref, _ in refs])
+        self._scopes = array("q", [scope for _, _, _, scope in refs])
+
+    def __len__(self):
+        return len(self._refs)
+
+    def by_lines(self, start_row: int, end_row: int) -> List[Tuple[int, ScopeID]]:
+        """
+        Returns (ref id, origin scope) for every ref starting on a row between
+        start_row and end_row inclusive, in source order
+        """
+        lo = bisect_left(self._rows, start_row)
+        hi = bisect_right(self._rows, end_row, lo)
+
+        return list(zip(self._refs[lo:hi], self._scopes[lo:hi]))
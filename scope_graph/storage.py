@@ -0,0 +1,164 @@
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+import json
+import mmap
+import sys
+
+MAGIC = b"SGCOLS01"
+# every column starts on a multiple of this
+ALIGN = 8
+
+Column = Union[array, bytes]
+
+
+def _pad(n: int) -> int:
+    return -n % ALIGN
+
+
+class ColumnWriter:
+    """
+    Collects named columns, ie. typed arrays or raw bytes, and writes them into
+    a single file laid out so that ColumnFile can map every column in place:
+
+        MAGIC | header length (u64) | json header | columns, 8 byte aligned
+    """
+
+    def __init__(self, meta: Optional[Dict[str, Any]] = None):
+        self.meta = meta or {}
+        self._columns: Dict[str, Column] = {}
+
+    def add(self, name: str, column: Column):
+        if name in self._columns:
+            raise ValueError(f"Duplicate column {name}")
+        self._columns[name] = column
+
+    def add_strings(self, name: str, strings: Iterable[str]):
+        """
+        Stores strings as utf-8 blob plus offsets, see StringTable
+        """
+        offsets, blob = array("q", [0]), bytearray()
+        for s in strings:
+            blob += s.encode("utf-8")
+            offsets.append(len(blob))
+
+        self.add(f"{name}.offsets", offsets)
+        self.add(f"{name}.blob", bytes(blob))
+
+    def write(self, path: Path):
+        columns, offset = {}, 0
+        for name, column in self._columns.items():
+            if isinstance(column, array):
+                typecode, nbytes = column.typecode, len(column) * column.itemsize
+            else:
+                typecode, nbytes = "B", len(column)
+
+            columns[name] = [typecode, offset, nbytes]
+            offset += nbytes + _pad(nbytes)
+
+        header = json.dumps(
+            {"byteorder": sys.byteorder, "meta": self.meta, "columns": columns}
+        ).encode("utf-8")
+        header += b" " * _pad(len(MAGIC) + 8 + len(header))
+
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            f.write(len(header).to_bytes(8, "little"))
+            f.write(header)
+            for column in self._columns.values():
+                data = column.tobytes() if isinstance(column, array) else column
+                f.write(data)
+                f.write(b"\0" * _pad(len(data)))
+
+
+class ColumnFile:
+    """
+    Read only view over a file written by ColumnWriter. With use_mmap, columns
+    are memoryviews into a shared read only mapping of the file, so nothing is
+    copied until it is read and processes mapping the same file share the
+    pages through the page cache
+    """
+
+    def __init__(self, path: Path, use_mmap: bool = True):
+        self.path = path
+
+        with open(path, "rb") as f:
+            if use_mmap:
+                self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self._buffer = f.read()
+
+        view = memoryview(self._buffer)
+        if bytes(view[: len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a column file")
+
+        header_len = int.from_bytes(view[len(MAGIC) : len(MAGIC) + 8], "little")
+        data_start = len(MAGIC) + 8 + header_len
+        header = json.loads(bytes(view[len(MAGIC) + 8 : data_start]))
+
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was written on a {header['byteorder']} endian host")
+
+        self.meta: Dict[str, Any] = header["meta"]
+        self._columns: Dict[str, memoryview] = {}
+        for name, (typecode, offset, nbytes) in header["columns"].items():
+            start = data_start + offset
+            self._columns[name] = view[start : start + nbytes].cast(typecode)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._columns
+
+    def column(self, name: str) -> memoryview:
+        return self._columns[name]
+
+    def strings(self, name: str) -> "StringTable":
+        return StringTable(
+            self._columns[f"{name}.offsets"], self._columns[f"{name}.blob"]
+        )
+
+
+class StringTable(Sequence[str]):
+    """
+    Strings stored back to back in a utf-8 blob, string i is
+    blob[offsets[i] : offsets[i + 1]] and is only decoded when accessed
+    """
+
+    def __init__(self, offsets: Sequence[int], blob: Union[bytes, memoryview]):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        if i < 0:
+            raise IndexError(i)
+        # offsets[i + 1] raises IndexError past the end
+        return str(self._blob[self._offsets[i] : self._offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def to_list(self) -> List[str]:
+        return list(self)
+
+
+class JsonTable(Sequence[Any]):
+    """
+    A StringTable of json documents, decoded once on first access
+    """
+
+    def __init__(self, strings: StringTable):
+        self._strings = strings
+        self._decoded: Dict[int, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def __getitem__(self, i: int) -> Any:
+        if i not in self._decoded:
+            self._decoded[i] = json.loads(self._strings[i])
+        return self._decoded[i]
+
+    def to_list(self) -> List[Any]:
+        return [self[i] for i in range(len(self))]
@@ -1,17 +1,17 @@
-from pydantic import BaseModel
-from typing import Optional
+from typing import NamedTuple, Optional
 from enum import Enum
 
 from scope_graph.scope_resolution import Scoping
 
 
-class LocalDefCapture(BaseModel):
+# plain tuples, there is one of these per capture
+class LocalDefCapture(NamedTuple):
     index: int
     symbol: Optional[str]
     scoping: Scoping
 
 
-class LocalRefCapture(BaseModel):
+class LocalRefCapture(NamedTuple):
     index: int
     symbol: Optional[str]
 
@@ -22,6 +22,6 @@ class ImportPartType(str, Enum):
     NAME = "name"
 
 
-class LocalImportPartCapture(BaseModel):
+class LocalImportPartCapture(NamedTuple):
     index: int
     part: str
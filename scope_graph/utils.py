@@ -2,8 +2,11 @@ from pydantic import BaseModel
 from tree_sitter import Point
 
 from dataclasses import dataclass
-from typing import TypeAlias, Tuple, List
+from typing import Dict, FrozenSet, NamedTuple, TypeAlias, Tuple, List, Union
+from functools import lru_cache
+import importlib.metadata
 import json
+import sys
 from scope_graph.config import SYS_MODULES_LIST, THIRD_PARTY_MODULES_LIST
 from pathlib import Path
 
@@ -63,6 +66,71 @@ class TextRange(BaseModel):
         )
 
 
+class RawRange(NamedTuple):
+    """
+    Plain tuple form of a TextRange, cheap enough to build for every capture
+    """
+
+    start_byte: int
+    end_byte: int
+    start_point: Point
+    end_point: Point
+
+    @classmethod
+    def from_node(cls, node) -> "RawRange":
+        return cls(node.start_byte, node.end_byte, node.start_point, node.end_point)
+
+    @classmethod
+    def from_range(cls, range: TextRange) -> "RawRange":
+        return cls(range.start_byte, range.end_byte, range.start_point, range.end_point)
+
+    def line_range(self):
+        return self.start_point.row, self.end_point.row
+
+    def contains(self, range: Union[TextRange, "RawRange"]):
+        return range.start_byte >= self.start_byte and range.end_byte <= self.end_byte
+
+    def to_range(self) -> TextRange:
+        return TextRange(
+            start_byte=self.start_byte,
+            end_byte=self.end_byte,
+            start_point=self.start_point,
+            end_point=self.end_point,
+        )
+
+    def to_dict(self) -> Dict:
+        """
+        Same as TextRange.dict(), without validating a model first
+        """
+        return {
+            "start_byte": self.start_byte,
+            "end_byte": self.end_byte,
+            "start_point": tuple(self.start_point),
+            "end_point": tuple(self.end_point),
+        }
+
+
+class LazyRange:
+    """
+    Keeps the RawRange of a capture and only builds its TextRange when .range
+    is accessed
+    """
+
+    def __init__(self, range: Union[TextRange, RawRange]):
+        if isinstance(range, RawRange):
+            self.raw_range = range
+            self._range = None
+        else:
+            self.raw_range = RawRange.from_range(range)
+            self._range = range
+
+    @property
+    def range(self) -> TextRange:
+        if self._range is None:
+            self._range = self.raw_range.to_range()
+        return self._range
+
+
 def get_shortest_subpath(path: Path, root: Path) -> Path:
     """
     Returns the shortest subpath of the given path that is relative to the root
@@ -70,39 +138,66 @@ def get_shortest_subpath(path: Path, root: Path) -> Path:
     return path.relative_to(root)
 
 
+@lru_cache(maxsize=None)
+def load_module_list(path: str) -> FrozenSet[str]:
+    """
+    Reads a module list json once per process, either a bare list or of the
+    form {"modules": [...]}
+    """
+    try:
+        with open(path, "r") as file:
+            modules = json.loads(file.read())
+    except Exception as e:
+        logger.error(f"Error loading module list {path}: {e}")
+        return frozenset()
+
+    if isinstance(modules, dict):
+        modules = modules.get("modules", [])
+
+    return frozenset(modules)
+
+
+@lru_cache(maxsize=None)
+def installed_top_level_modules() -> FrozenSet[str]:
+    """
+    Top level import names of the distributions installed in this interpreter
+    """
+    return frozenset(importlib.metadata.packages_distributions())
+
+
 class SysModules:
-    def __init__(self, lang):
+    def __init__(self, lang, augment: bool = False):
         """
-        Loads a list of system modules for a given language
+        Loads a list of system modules for a given language. With augment, the
+        stdlib modules of the running interpreter are added as well
         """
-
-        try:
-            sys_mod_file = open(SYS_MODULES_LIST, "r")
-            self.sys_modules = json.loads(sys_mod_file.read())
-        except Exception as e:
-            logger.error(f"Error loading system modules: {e}")
-            self.sys_modules = []
+        self.sys_modules = load_module_list(SYS_MODULES_LIST)
+        if augment:
+            self.sys_modules |= frozenset(sys.stdlib_module_names)
 
     def __iter__(self):
         return iter(self.sys_modules)
 
+    def __contains__(self, module_name):
+        return module_name in self.sys_modules
+
     def check(self, module_name):
         return module_name in self.sys_modules
 
 
 class ThirdPartyModules:
-    def __init__(self, lang):
+    def __init__(self, lang, augment: bool = False):
         """
-        Loads a list of third party modules for a given language
+        Loads a list of third party modules for a given language. With augment,
+        the modules installed in the running interpreter are added as well
         """
         self.lang = lang
+        # bumped whenever update changes the module set
+        self.version = 0
 
-        try:
-            with open(THIRD_PARTY_MODULES_LIST, "r") as file:
-                self.third_party_modules = json.loads(file.read())["modules"]
-        except Exception as e:
-            logger.error(f"Error loading third party modules: {e}")
-            self.third_party_modules = []
+        self.third_party_modules = load_module_list(THIRD_PARTY_MODULES_LIST)
+        if augment:
+            self.third_party_modules |= installed_top_level_modules()
 
     def check(self, module_name):
         return module_name in self.third_party_modules
@@ -110,14 +205,26 @@ class ThirdPartyModules:
     def __iter__(self):
         return iter(self.third_party_modules)
 
+    def __contains__(self, module_name):
+        return module_name in self.third_party_modules
+
     def update(self, new_modules: List[str]):
         """
         Updates the list of third party modules and writes back to the file
         """
-        self.third_party_modules.extend(new_modules)
-
+        updated = self.third_party_modules | frozenset(new_modules)
+        if updated != self.third_party_modules:
+            self.third_party_modules = updated
+            self.version += 1
+
+        # only write back the listed modules, not the ones added by augment
+        modules = sorted(
+            load_module_list(THIRD_PARTY_MODULES_LIST) | frozenset(new_modules)
+        )
         try:
             with open(THIRD_PARTY_MODULES_LIST, "w") as file:
-                json.dump({"modules": self.third_party_modules}, file, indent=4)
+                json.dump({"modules": modules}, file, indent=4)
         except Exception as e:
             logger.error(f"Error writing third party modules: {e}")
+
+        load_module_list.cache_clear()
@@ -95,7 +95,7 @@ def main(repo_path, saved_graph_path, load: bool = False, save: bool = False):
     cg = ingest(repo_path)
     if save:
         print("Saving graph to disk")
-        graph_dict = nx.node_link_data(cg._graph)
+        graph_dict = cg.to_json()
         with open(saved_graph_path, "w") as f:
             f.write(json.dumps(graph_dict))
 
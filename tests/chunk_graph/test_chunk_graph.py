@@ -0,0 +1,105 @@
+from pathlib import Path
+import json
+
+from llama_index.core.schema import TextNode
+
+from scope_graph.chunk_resolution.chunk_graph import ChunkGraph
+from scope_graph.repo_resolution.repo_graph import RepoGraph
+
+REPO = Path("tests/repos/codecov-cli-neuteured")
+
+
+def line_chunks(repo: Path, size: int = 20):
+    """
+    Splits every file of the repo into chunks of size lines, numbered from 1
+    like the chunks of EpicSplitter
+    """
+    chunks = []
+    for path in sorted(repo.resolve().rglob("*.py")):
+        lines = path.read_text().splitlines(keepends=True)
+        for start in range(0, len(lines), size):
+            end = min(start + size, len(lines))
+            chunks.append(
+                TextNode(
+                    text="".join(lines[start:end]),
+                    metadata={
+                        "file_path": str(path),
+                        "file_name": path.name,
+                        "file_type": "text/x-python",
+                        "category": "implementation",
+                        "tokens": 0,
+                        "span_ids": [],
+                        "start_line": start + 1,
+                        "end_line": end,
+                    },
+                )
+            )
+
+    return chunks
+
+
+def test_shared_repo_graph():
+    g = RepoGraph(REPO)
+    chunks = line_chunks(REPO)
+
+    cg = ChunkGraph.from_chunks(REPO, chunks, repo_graph=g)
+    assert cg.repo_graph is g and cg.fs is g.fs
+
+    built = ChunkGraph.from_chunks(REPO, chunks)
+    assert list(cg._graph.edges) == list(built._graph.edges)
+
+
+def test_from_json_does_not_parse():
+    cg = ChunkGraph.from_chunks(REPO, line_chunks(REPO))
+
+    loaded = ChunkGraph.from_json(REPO, json.loads(json.dumps(cg.to_json())))
+    assert loaded._repo_graph is None
+    assert list(loaded._graph.edges) == list(cg._graph.edges)
+    assert loaded.get_all_nodes() == cg.get_all_nodes()
+
+
+def test_nodes_are_cached():
+    cg = ChunkGraph.from_chunks(REPO, line_chunks(REPO))
+
+    for node_id in cg._graph.nodes:
+        node = cg.get_node(node_id)
+        assert cg.get_node(node_id) is node
+        # the graph only holds ids
+        assert cg._graph.nodes[node_id] == {}
+
+
+def test_chunk_refs_by_lines():
+    g = RepoGraph(REPO)
+    cg = ChunkGraph.from_chunks(REPO, line_chunks(REPO), repo_graph=g)
+
+    for file_id, chunks in cg._chunkmap.items():
+        scope_graph = g.get_scope_graph(file_id)
+        all_refs = {ref for refs in scope_graph._scope_refs.values() for ref in refs}
+
+        # chunks tile the file, so every ref lands in exactly one of them
+        sliced = []
+        for chunk in chunks:
+            start, end = chunk.range.start_point.row, chunk.range.end_point.row
+            for ref, scope in scope_graph.references_by_lines(start, end):
+                assert start <= scope_graph.get_node(ref).range.start_point.row <= end
+                assert ref in scope_graph._scope_refs[scope]
+                sliced.append(ref)
+
+        assert sorted(sliced) == sorted(all_refs)
+
+    # edges point into the chunks of the files that are imported
+    for u, v in cg._graph.edges:
+        src = cg._file_id(cg.get_node(u).metadata.file_path)
+        dst = cg._file_id(cg.get_node(v).metadata.file_path)
+        assert dst in g._imported[src]
+
+
+def test_parallel_matches_serial():
+    g = RepoGraph(REPO)
+    chunks = line_chunks(REPO)
+
+    serial = ChunkGraph.from_chunks(REPO, chunks, repo_graph=g)
+    parallel = ChunkGraph.from_chunks(REPO, chunks, repo_graph=g, workers=2)
+
+    assert list(parallel._graph.nodes) == list(serial._graph.nodes)
+    assert list(parallel._graph.edges) == list(serial._graph.edges)
@@ -0,0 +1,59 @@
+import random
+
+from scope_graph.chunk_resolution.chunk_index import ChunkIndex
+from scope_graph.chunk_resolution.graph import ChunkMetadata, ChunkNode
+
+
+def chunk(i: int, start_line: int, end_line: int) -> ChunkNode:
+    return ChunkNode(
+        id=f"chunk#{i}",
+        metadata=ChunkMetadata(
+            file_path="a.py",
+            file_name="a.py",
+            file_type="text/x-python",
+            category="implementation",
+            tokens=0,
+            span_ids=[],
+            start_line=start_line,
+            end_line=end_line,
+        ),
+        content="",
+    )
+
+
+def last_containing(chunks, start_row, end_row):
+    containing = [
+        c
+        for c in chunks
+        if c.line_range[0] <= start_row and end_row <= c.line_range[1]
+    ]
+    if not containing:
+        return None
+    # ties go to the chunk added last
+    return max(
+        reversed(containing), key=lambda c: (c.line_range[0], -c.line_range[1])
+    )
+
+
+def test_find_matches_brute_force():
+    rng = random.Random(0)
+
+    # back to back chunks, as produced by the splitters, and overlapping ones
+    tiled = [chunk(i, 10 * i + 1, 10 * i + 10) for i in range(20)]
+    overlapping = [
+        chunk(i, start, start + rng.randint(0, 40))
+        for i, start in enumerate(rng.randint(1, 200) for _ in range(30))
+    ]
+
+    for chunks in (tiled, overlapping):
+        index = ChunkIndex(chunks)
+
+        queries = []
+        for _ in range(500):
+            start = rng.randint(-5, 220)
+            queries.append((start, start + rng.randint(0, 15)))
+
+        found = index.find_many(queries)
+        for (start, end), chunk_node in zip(queries, found):
+            assert index.find(start, end) == chunk_node
+            assert chunk_node == last_containing(chunks, start, end)
@@ -0,0 +1,39 @@
+"""
+The linear module lookup that RepoFs.match_file replaced, shared by
+test_match_file and benchmarks.match_file
+"""
+
+from pathlib import Path
+
+from scope_graph.fs import RepoFs, SRC_EXT
+
+
+def linear_match_file(fs: RepoFs, ns_path: Path) -> Path:
+    """
+    Scans every path of the repo for ns_path
+    """
+    for path in fs._all_paths:
+        path_name = path.name.replace(SRC_EXT, "")
+        match_path = list(path.parts[-len(ns_path.parts) : -1]) + [path_name]
+
+        if match_path == list(ns_path.parts):
+            if path.suffix == SRC_EXT:
+                return path.resolve()
+            elif path.is_dir():
+                return (path / "__init__.py").resolve()
+
+    return None
+
+
+def module_paths(fs: RepoFs):
+    """
+    Every dotted module path in the repo, plus some that do not exist
+    """
+    paths = []
+    for path in fs._all_paths:
+        parts = path.relative_to(fs.path).parts
+        parts = parts[:-1] + (path.name.replace(SRC_EXT, ""),)
+        paths.append(Path(*parts))
+        paths.append(Path(*parts[1:], "missing") if len(parts) > 1 else Path("missing"))
+
+    return paths
@@ -0,0 +1,50 @@
+from pathlib import Path
+import shutil
+
+from scope_graph.file_table import FileTable
+from scope_graph.repo_resolution.repo_graph import RepoGraph
+
+
+def test_file_table():
+    files = FileTable()
+
+    a, b = Path("/repo/a.py"), Path("/repo/b.py")
+    assert files.intern(a) == 0
+    assert files.intern(str(b)) == 1
+    assert files.intern(a) == 0
+
+    assert files.get_id("/repo/b.py") == 1
+    assert files.get_id(Path("/repo/c.py")) is None
+    assert files.path(1) == b and files.path_str(1) == "/repo/b.py"
+    assert a in files and len(files) == 2
+
+
+def test_file_ids_stable(tmp_path):
+    repo = tmp_path / "codecov-cli"
+    shutil.copytree("tests/repos/codecov-cli-neuteured", repo)
+
+    g = RepoGraph(repo)
+    ids = {g.files.path(f): f for f in g._scopes}
+    n_files = len(g.files)
+    assert g.files is g.fs.files
+    for node in g.nodes():
+        assert node.file_id == g.files.get_id(node.file_path)
+
+    g.save(tmp_path / "repo.bin")
+    loaded = RepoGraph.load(tmp_path / "repo.bin")
+    assert {loaded.files.path(f): f for f in loaded._scopes} == ids
+
+    deleted = repo / "codecov_cli" / "helpers" / "request.py"
+    added = repo / "codecov_cli" / "helpers" / "added.py"
+    deleted.unlink()
+    added.write_text("def added():\n    pass\n")
+    loaded.update([added], [deleted])
+
+    # surviving files keep their ids, new files get fresh ones
+    resolved = deleted.resolve()
+    assert resolved not in loaded.scopes_map
+    assert loaded.files.get_id(resolved) == ids[resolved]
+    assert loaded.files.get_id(added.resolve()) == n_files
+    for path, f in ids.items():
+        if path != resolved:
+            assert loaded.files.get_id(path) == f
@@ -0,0 +1,64 @@
+from pathlib import Path
+import shutil
+import subprocess
+
+from scope_graph.repo_resolution.repo_graph import RepoGraph
+from scope_graph.git_changes import changes_since
+
+
+def git(repo: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-C", str(repo), *args], capture_output=True, check=True, text=True
+    ).stdout.strip()
+
+
+def git_repo(tmp_path: Path) -> Path:
+    repo = tmp_path / "codecov-cli"
+    shutil.copytree("tests/repos/codecov-cli-neuteured", repo)
+
+    git(repo, "init", "-q")
+    git(repo, "-c", "user.name=a", "-c", "user.email=a@a", "add", "-A")
+    git(repo, "-c", "user.name=a", "-c", "user.email=a@a", "commit", "-qm", "base")
+    return repo
+
+
+def edit(repo: Path):
+    helpers = repo / "codecov_cli" / "helpers"
+    (helpers / "request.py").write_text("def send_post_request(url):\n    pass\n")
+    (helpers / "git.py").unlink()
+    (helpers / "brand_new.py").write_text(
+        "from codecov_cli.helpers.request import send_post_request\n"
+    )
+    (helpers / "notes.txt").write_text("not a source file")
+
+
+def test_changes_since_base(tmp_path):
+    repo = git_repo(tmp_path)
+    edit(repo)
+
+    changes = changes_since(repo, base="HEAD")
+
+    assert changes.added == [
+        "codecov_cli/helpers/brand_new.py",
+        "codecov_cli/helpers/notes.txt",
+    ]
+    assert changes.modified == ["codecov_cli/helpers/request.py"]
+    assert changes.deleted == ["codecov_cli/helpers/git.py"]
+
+
+def test_update_from_git_matches_rebuild(tmp_path):
+    repo = git_repo(tmp_path)
+    base = git(repo, "rev-parse", "HEAD")
+
+    g = RepoGraph(repo)
+    manifest = g.fs.manifest()
+    from_manifest = RepoGraph(repo)
+
+    edit(repo)
+    g.update_from_git(base=base)
+    from_manifest.update_from_git(manifest=manifest)
+    rebuilt = RepoGraph(repo)
+
+    for updated in [g, from_manifest]:
+        assert set(updated.edges()) == set(rebuilt.edges())
+        assert set(updated.scopes_map) == set(rebuilt.scopes_map)
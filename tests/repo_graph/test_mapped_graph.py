@@ -0,0 +1,67 @@
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from scope_graph.repo_resolution.repo_graph import RepoGraph
+from scope_graph.repo_resolution.mapped_graph import MappedRepoGraph
+
+REPO = Path("tests/repos/codecov-cli-neuteured")
+
+
+def test_mapped_matches_repo_graph(tmp_path):
+    g = RepoGraph(REPO)
+    g.save(tmp_path / "repo.bin")
+    mapped = MappedRepoGraph(tmp_path / "repo.bin")
+
+    assert len(mapped) == len(g._graph)
+    assert mapped.to_str() == g.to_str()
+    for node in g.nodes():
+        assert mapped.get_node(node.repo_id) == node
+        assert mapped.import_to_export_scope(
+            node.repo_id
+        ) == g.import_to_export_scope(node.idx)
+        assert mapped.scope_exports(
+            Path(node.file_path), node.scope
+        ) == g.scope_exports(Path(node.file_path), node.scope)
+
+    assert list(mapped.scopes_map) == list(g.scopes_map)
+    for path, scope_graph in g.scopes_map.items():
+        assert path in mapped.scopes_map
+        # str keys are looked up like paths, as in RepoGraph.scopes_map
+        assert str(path) in mapped.scopes_map
+        assert str(path) in g.scopes_map
+        mapped_graph = mapped.scopes_map[path]
+        for scope in scope_graph.scopes():
+            scope_range = scope_graph.range_by_scope(scope)
+            assert mapped_graph.range_by_scope(scope) == scope_range
+            assert mapped_graph.scope_by_range(
+                scope_range
+            ) == scope_graph.scope_by_range(scope_range)
+
+    missing = REPO.resolve() / "missing.py"
+    assert missing not in mapped.scopes_map
+    assert str(missing) not in mapped.scopes_map
+    assert mapped.get_node(f"{missing}::0") is None
+    assert mapped.import_to_export_scope(f"{missing}::0") == []
+
+
+def _exports(args):
+    path, node_ids = args
+    mapped = MappedRepoGraph(path)
+    return [
+        [n.repo_id for n in mapped.import_to_export_scope(node_id)]
+        for node_id in node_ids
+    ]
+
+
+def test_mapped_across_processes(tmp_path):
+    g = RepoGraph(REPO)
+    g.save(tmp_path / "repo.bin")
+    node_ids = [node.repo_id for node in g.nodes()]
+
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        results = list(pool.map(_exports, [(tmp_path / "repo.bin", node_ids)] * 2))
+
+    expected = [
+        [n.repo_id for n in g.import_to_export_scope(node_id)] for node_id in node_ids
+    ]
+    assert results == [expected, expected]
@@ -0,0 +1,31 @@
+from pathlib import Path
+
+from scope_graph.fs import RepoFs
+
+from tests.repo_graph.match_file_oracle import linear_match_file, module_paths
+
+
+def test_match_file_matches_linear_scan():
+    fs = RepoFs(Path("tests/repos/codecov-cli-neuteured"))
+
+    for ns_path in module_paths(fs):
+        assert fs.match_file(ns_path) == linear_match_file(fs, ns_path)
+
+
+def test_match_file_after_remove(tmp_path):
+    repo = tmp_path / "repo"
+    (repo / "a").mkdir(parents=True)
+    (repo / "b").mkdir()
+    (repo / "a" / "utils.py").write_text("")
+    (repo / "b" / "utils.py").write_text("")
+
+    fs = RepoFs(repo)
+    first = fs.match_file(Path("utils"))
+    fs.remove_paths([first])
+
+    assert fs.match_file(Path("utils")) != first
+    assert fs.match_file(Path("utils")) == linear_match_file(fs, Path("utils"))
+    assert fs.match_file(Path(first.parent.name, "utils")) is None
+
+    fs.add_paths([first])
+    assert fs.match_file(Path(first.parent.name, "utils")) == first
@@ -0,0 +1,68 @@
+from pathlib import Path
+import sys
+
+from scope_graph.repo_resolution.imports import ModuleClassifier, ModuleType
+from scope_graph.repo_resolution.repo_graph import RepoGraph
+from scope_graph.utils import SysModules, ThirdPartyModules
+
+
+def test_module_lists():
+    sys_modules = SysModules("python")
+
+    assert "os" in sys_modules
+    assert "networkx" not in sys_modules
+    # loaded once per process
+    assert SysModules("python").sys_modules is sys_modules.sys_modules
+
+
+def test_augmented_module_lists():
+    assert set(sys.stdlib_module_names) <= SysModules("python", augment=True).sys_modules
+    assert "networkx" in ThirdPartyModules("python", augment=True)
+
+
+def test_classify():
+    modules = ModuleClassifier()
+
+    assert modules.classify("os") == ModuleType.SYS
+    assert modules.classify("pytest") == ModuleType.THIRD_PARTY
+    assert modules.classify("scope_graph") is None
+    assert modules._cache == {
+        "os": ModuleType.SYS,
+        "pytest": ModuleType.THIRD_PARTY,
+        "scope_graph": None,
+    }
+
+
+def test_classify_after_update(tmp_path, monkeypatch):
+    module_list = tmp_path / "third_party.json"
+    module_list.write_text('{"modules": []}')
+    monkeypatch.setattr("scope_graph.utils.THIRD_PARTY_MODULES_LIST", str(module_list))
+
+    third_party = ThirdPartyModules("python")
+    modules = ModuleClassifier(third_party_modules=third_party)
+    assert modules.classify("somelib") is None
+
+    third_party.update(["somelib"])
+
+    assert modules.classify("somelib") == ModuleType.THIRD_PARTY
+
+
+def test_repo_graph_classifier(tmp_path, monkeypatch):
+    module_list = tmp_path / "third_party.json"
+    module_list.write_text('{"modules": ["codecov_cli"]}')
+    monkeypatch.setattr("scope_graph.utils.THIRD_PARTY_MODULES_LIST", str(module_list))
+
+    repo = Path("tests/repos/codecov-cli-neuteured")
+    modules = ModuleClassifier(third_party_modules=ThirdPartyModules("python"))
+
+    for workers in (1, 2):
+        g = RepoGraph(repo, workers=workers, modules=modules)
+        roots = {
+            imp.namespace.root.split(".")[0]: imp.module_type
+            for imports in g._imports.values()
+            for imp in imports
+        }
+        assert roots["codecov_cli"] == ModuleType.THIRD_PARTY
+
+    g.save(tmp_path / "repo.bin")
+    assert RepoGraph.load(tmp_path / "repo.bin", modules=modules)._modules is modules
@@ -0,0 +1,29 @@
+from pathlib import Path
+import pickle
+
+from scope_graph.build_scopes import build_scope_graph
+from scope_graph.repo_resolution.repo_graph import RepoGraph
+
+
+def test_scope_graph_pickle():
+    code = Path("tests/repos/small_repo/a.py").read_bytes()
+    g = build_scope_graph(code)
+
+    loaded = pickle.loads(pickle.dumps(g))
+
+    assert loaded.to_str() == g.to_str()
+    assert loaded.scopes() == g.scopes()
+    assert loaded.scope_by_range(g.get_node(10).range) == 4
+
+
+def test_parallel_matches_serial():
+    repo = Path("tests/repos/codecov-cli-neuteured")
+
+    serial = RepoGraph(repo)
+    parallel = RepoGraph(repo, workers=2)
+
+    assert list(serial.scopes_map.keys()) == list(parallel.scopes_map.keys())
+    for path, g in serial.scopes_map.items():
+        assert g.to_str() == parallel.scopes_map[path].to_str()
+
+    assert list(serial.edges()) == list(parallel.edges())
@@ -0,0 +1,24 @@
+from pathlib import Path
+
+from scope_graph.repo_resolution.repo_graph import RepoGraph
+
+
+def test_node_lookups():
+    g = RepoGraph(Path("tests/repos/codecov-cli-neuteured"))
+
+    # both ends of every import edge are counted
+    assert g.total_scopes == set(g._graph.nodes)
+    for node in g.nodes():
+        assert g.get_node(node.idx) is node
+        assert g.get_node(node.repo_id) is node
+        assert g.find_node(Path(node.file_path), node.scope) == node.idx
+
+        pydantic_node = node.to_node()
+        assert pydantic_node.file_path == node.file_path
+        assert pydantic_node.scope == node.scope
+        assert str(pydantic_node) == str(node)
+
+    missing = Path("tests/repos/codecov-cli-neuteured/missing.py").resolve()
+    assert g.get_node(f"{missing}::0") is None
+    assert g.find_node(missing, 0) is None
+    assert g.import_to_export_scope(f"{missing}::0") == []
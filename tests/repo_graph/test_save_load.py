@@ -0,0 +1,83 @@
+from pathlib import Path
+import shutil
+
+from scope_graph.repo_resolution.repo_graph import RepoGraph
+
+
+def import_tuples(g: RepoGraph):
+    return {
+        path: [
+            (
+                str(imp.namespace),
+                imp.module_type,
+                imp.filepath,
+                imp.import_path,
+                imp.alias,
+                imp.ref_scopes,
+            )
+            for imp in imports
+        ]
+        for path, imports in g._imports.items()
+    }
+
+
+def test_save_load_round_trip(tmp_path):
+    repo = Path("tests/repos/codecov-cli-neuteured")
+
+    g = RepoGraph(repo)
+    g.save(tmp_path / "repo.bin")
+    loaded = RepoGraph.load(tmp_path / "repo.bin")
+
+    assert list(loaded.nodes()) == list(g.nodes())
+    assert list(loaded.edges()) == list(g.edges())
+    assert list(loaded.scopes_map) == list(g.scopes_map)
+    for path, scope_graph in g.scopes_map.items():
+        assert loaded.scopes_map[path].to_str() == scope_graph.to_str()
+
+    assert import_tuples(loaded) == import_tuples(g)
+    assert loaded.fs._all_paths == g.fs._all_paths
+
+    for node in g.nodes():
+        assert loaded.import_to_export_scope(
+            node.repo_id
+        ) == g.import_to_export_scope(node.idx)
+
+
+def test_load_moved_repo_then_update(tmp_path):
+    repo = tmp_path / "codecov-cli"
+    shutil.copytree("tests/repos/codecov-cli-neuteured", repo)
+
+    RepoGraph(repo).save(tmp_path / "repo.bin")
+
+    moved = tmp_path / "moved"
+    repo.rename(moved)
+    loaded = RepoGraph.load(tmp_path / "repo.bin", repo_path=moved)
+
+    changed = moved / "codecov_cli" / "helpers" / "request.py"
+    changed.write_text("def send_post_request(url):\n    pass\n")
+    loaded.update([changed])
+
+    rebuilt = RepoGraph(moved)
+    assert set(loaded.edges()) == set(rebuilt.edges())
+    assert set(loaded.scopes_map) == set(rebuilt.scopes_map)
+
+
+def test_load_then_update_debug_state(tmp_path):
+    repo = Path("tests/repos/codecov-cli-neuteured")
+
+    g = RepoGraph(repo)
+    g.save(tmp_path / "repo.bin")
+    loaded = RepoGraph.load(tmp_path / "repo.bin")
+
+    assert not loaded._missing_import_refs
+    assert not loaded._resolved_import_refs
+
+    changed = (repo / "codecov_cli" / "helpers" / "config.py").resolve()
+    g.update([changed])
+    loaded.update([changed])
+
+    # the changed file and its importers are resolved again
+    assert g.files.get_id(changed) in loaded._missing_import_refs
+    for file_id, missing in loaded._missing_import_refs.items():
+        assert missing == g._missing_import_refs[file_id]
+        assert loaded._resolved_import_refs[file_id] == g._resolved_import_refs[file_id]
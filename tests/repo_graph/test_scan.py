@@ -0,0 +1,107 @@
+from pathlib import Path
+
+from scope_graph.fs import RepoFs, SRC_EXT
+from scope_graph.ignore import IgnoreRules
+
+
+def write(path: Path, content: str = ""):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+
+def test_scan_matches_rglob():
+    repo = Path("tests/repos/codecov-cli-neuteured")
+    fs = RepoFs(repo)
+
+    assert sorted(fs._all_paths) == sorted(
+        p for p in repo.rglob("*") if p.suffix == SRC_EXT or p.is_dir()
+    )
+    # a directory is listed before anything inside of it
+    seen = {repo}
+    for path in fs._all_paths:
+        assert path.parent in seen
+        seen.add(path)
+    assert [entry.path for entry in fs.scan()] == list(fs.get_files())
+
+
+def test_scan_prunes_ignored(tmp_path):
+    write(tmp_path / ".gitignore", "build/\n*_pb2.py\n/top.py\n!keep_pb2.py\n")
+    write(tmp_path / "main.py", "a = 1")
+    write(tmp_path / "top.py")
+    write(tmp_path / "msg_pb2.py")
+    write(tmp_path / "keep_pb2.py")
+    write(tmp_path / "build" / "out.py")
+    write(tmp_path / "node_modules" / "dep.py")
+    write(tmp_path / ".git" / "hook.py")
+    write(tmp_path / "pkg" / ".gitignore", "local.py\n")
+    write(tmp_path / "pkg" / "local.py")
+    write(tmp_path / "pkg" / "top.py")
+    write(tmp_path / "pkg" / "sub" / "local.py")
+    write(tmp_path / "other" / "local.py")
+
+    fs = RepoFs(tmp_path)
+    files = {p.relative_to(tmp_path).as_posix() for p in fs.get_files()}
+
+    assert files == {"main.py", "keep_pb2.py", "pkg/top.py", "other/local.py"}
+    assert (tmp_path / "build") not in fs._all_paths
+    assert (tmp_path / "pkg" / "sub") in fs._all_paths
+
+    # the same rules, checked for a single path
+    for path in fs._all_paths:
+        assert not fs._ignored(path.relative_to(tmp_path).as_posix())
+    ignored = ["build/out.py", "msg_pb2.py", "node_modules/dep.py", "pkg/sub/local.py"]
+    for path in ignored:
+        assert fs._ignored(path)
+
+    entries = {entry.path: entry for entry in fs.scan()}
+    assert entries[tmp_path / "main.py"].size == 5
+
+    fs = RepoFs(tmp_path, exclude=[], gitignore=False)
+    assert len(list(fs.get_files())) == 11
+
+
+def test_read_pool_keeps_order():
+    fs = RepoFs(Path("tests/repos/codecov-cli-neuteured"))
+
+    serial = list(fs.get_files_content(workers=1))
+    pooled = list(fs.get_files_content(workers=4))
+
+    assert serial == pooled
+    assert [path for path, _ in serial] == list(fs.get_files())
+
+
+def test_scan_skips_broken_symlink(tmp_path):
+    write(tmp_path / "main.py", "a = 1")
+    (tmp_path / "gone.py").symlink_to(tmp_path / "missing.py")
+
+    fs = RepoFs(tmp_path)
+    assert list(fs.get_files()) == [tmp_path / "main.py"]
+
+    (tmp_path / "also_gone.py").symlink_to(tmp_path / "missing.py")
+    fs.add_paths([tmp_path / "also_gone.py"])
+    assert [entry.path for entry in fs.scan()] == [tmp_path / "main.py"]
+
+
+def test_ignored_reads_each_gitignore_once(tmp_path, monkeypatch):
+    write(tmp_path / ".gitignore", "build/\n")
+    write(tmp_path / "pkg" / ".gitignore", "local.py\n")
+    write(tmp_path / "build" / ".gitignore", "!out.py\n")
+    paths = ["main.py", "build/out.py", "pkg/local.py", "pkg/sub/local.py"]
+    paths += [f"pkg/sub/mod_{i}.py" for i in range(20)]
+    fs = RepoFs(tmp_path)
+    expected = [fs._ignored(path) for path in paths]
+
+    reads = []
+    from_file = IgnoreRules.from_file.__func__
+
+    def counting_from_file(cls, gitignore, *args):
+        reads.append(gitignore)
+        return from_file(cls, gitignore, *args)
+
+    monkeypatch.setattr(IgnoreRules, "from_file", classmethod(counting_from_file))
+
+    dirs = {}
+    assert [fs._ignored(path, dirs) for path in paths] == expected
+    assert expected[:4] == [False, True, True, True]
+    # the .gitignore of an ignored dir is never read
+    assert sorted(reads) == [tmp_path / ".gitignore", tmp_path / "pkg" / ".gitignore"]
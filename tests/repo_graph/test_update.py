@@ -0,0 +1,73 @@
+from pathlib import Path
+import shutil
+
+from scope_graph.repo_resolution.repo_graph import RepoGraph
+
+
+def edges(g: RepoGraph):
+    return set(g.edges())
+
+
+def test_update_matches_rebuild(tmp_path):
+    repo = tmp_path / "codecov-cli"
+    shutil.copytree("tests/repos/codecov-cli-neuteured", repo)
+
+    g = RepoGraph(repo)
+
+    helpers = repo / "codecov_cli" / "helpers"
+    changed = helpers / "request.py"
+    changed.write_text("def send_post_request(url):\n    pass\n")
+
+    deleted = helpers / "git.py"
+    deleted.unlink()
+
+    added = helpers / "brand_new.py"
+    added.write_text("from codecov_cli.helpers.request import send_post_request\n")
+
+    g.update([changed, added], deleted=[deleted])
+    rebuilt = RepoGraph(repo)
+
+    assert edges(g) == edges(rebuilt)
+    assert set(g.nodes()) == set(rebuilt.nodes())
+    assert set(g.scopes_map) == set(rebuilt.scopes_map)
+
+
+def test_update_unchanged_file(tmp_path):
+    repo = tmp_path / "codecov-cli"
+    shutil.copytree("tests/repos/codecov-cli-neuteured", repo)
+
+    g = RepoGraph(repo)
+    before = edges(g)
+
+    g.update([repo / "codecov_cli" / "helpers" / "request.py"])
+
+    assert edges(g) == before
+
+
+def test_added_file_reimports_only_its_importers(tmp_path, monkeypatch):
+    repo = tmp_path / "codecov-cli"
+    shutil.copytree("tests/repos/codecov-cli-neuteured", repo)
+
+    helpers = repo / "codecov_cli" / "helpers"
+    importer = helpers / "importer.py"
+    importer.write_text(
+        "from codecov_cli.helpers.later import later_func\n\n"
+        "def use():\n    later_func()\n"
+    )
+
+    g = RepoGraph(repo)
+
+    reimported = []
+    construct_import = g._construct_import
+    monkeypatch.setattr(
+        g,
+        "_construct_import",
+        lambda sg, file, fs: reimported.append(file) or construct_import(sg, file, fs),
+    )
+
+    added = helpers / "later.py"
+    added.write_text("def later_func():\n    pass\n")
+    g.update([added])
+
+    assert sorted(reimported) == sorted([added.resolve(), importer.resolve()])
+    assert edges(g) == edges(RepoGraph(repo))
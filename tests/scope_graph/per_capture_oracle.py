@@ -0,0 +1,48 @@
+"""
+The per-capture insert loop that ScopeGraph.insert_batch replaced, shared by
+test_batch_insert and benchmarks.build_scope_graph
+"""
+
+from contextlib import contextmanager
+from typing import List, Tuple
+
+from scope_graph.build_scopes import build_scope_graph
+from scope_graph.scope_resolution import LocalDef, Reference, Scoping
+from scope_graph.scope_resolution.graph import ScopeGraph
+
+
+def insert_per_capture(
+    g: ScopeGraph, defs: List[Tuple[LocalDef, Scoping]], refs: List[Reference]
+):
+    """
+    Inserts defs and refs one by one, each locating its own scope
+    """
+    for local_def, scoping in defs:
+        match scoping:
+            case Scoping.GLOBAL:
+                g.insert_global_def(local_def)
+            case Scoping.HOISTED:
+                g.insert_hoisted_def(local_def)
+            case Scoping.LOCAL:
+                g.insert_local_def(local_def)
+
+    for ref in refs:
+        g.insert_ref(ref)
+
+
+@contextmanager
+def per_capture():
+    """
+    Makes build_scope_graph insert through insert_per_capture
+    """
+    insert_batch = ScopeGraph.insert_batch
+    ScopeGraph.insert_batch = insert_per_capture
+    try:
+        yield
+    finally:
+        ScopeGraph.insert_batch = insert_batch
+
+
+def build_scope_graph_per_capture(src_bytes: bytearray) -> ScopeGraph:
+    with per_capture():
+        return build_scope_graph(src_bytes)
@@ -0,0 +1,79 @@
+from pathlib import Path
+
+from scope_graph.build_scopes import build_scope_graph
+
+from tests.scope_graph.per_capture_oracle import build_scope_graph_per_capture
+
+
+def test_batch_matches_per_capture():
+    files = list(Path("tests/repos").rglob("*.py"))
+    assert files
+
+    for file in files:
+        src = bytearray(file.read_bytes())
+        batched = build_scope_graph(src)
+        per_capture = build_scope_graph_per_capture(src)
+
+        assert batched.to_str() == per_capture.to_str(), file
+
+
+def test_batch_single_line_scopes():
+    src = b"""
+def f(a): return a
+x = lambda y: y
+def g():
+    z = 1
+    return z
+"""
+    expected = """
+1: --EdgeKind.ScopeToScope-> 0:
+2: --EdgeKind.ScopeToScope-> 0:
+3: --EdgeKind.ScopeToScope-> 0:
+4:f --EdgeKind.DefToScope-> 1:
+5:a --EdgeKind.DefToScope-> 1:
+6:x --EdgeKind.DefToScope-> 0:
+7:y --EdgeKind.DefToScope-> 2:
+8:g --EdgeKind.DefToScope-> 3:
+9:z --EdgeKind.DefToScope-> 3:
+10:a --EdgeKind.RefToDef-> 5:a
+10:a --EdgeKind.RefToOrigin-> 1:
+11:z --EdgeKind.RefToDef-> 9:z
+11:z --EdgeKind.RefToOrigin-> 3:
+"""
+    assert build_scope_graph(bytearray(src)).to_str() == expected
+
+
+def test_batch_imports_and_nested_scopes():
+    src = b"""
+import os
+from a import b as c
+def f():
+    global n
+    n = os.sep
+    return c(n)
+class K:
+    def m(self):
+        return self
+"""
+    expected = """
+1: --EdgeKind.ScopeToScope-> 0:
+2: --EdgeKind.ScopeToScope-> 0:
+3: --EdgeKind.ScopeToScope-> 2:
+4: --EdgeKind.ImportToScope-> 0:
+5: --EdgeKind.ImportToScope-> 0:
+6:f --EdgeKind.DefToScope-> 1:
+7:n --EdgeKind.DefToScope-> 1:
+8:n --EdgeKind.DefToScope-> 1:
+9:K --EdgeKind.DefToScope-> 2:
+10:m --EdgeKind.DefToScope-> 3:
+11:self --EdgeKind.DefToScope-> 3:
+12:os --EdgeKind.RefToImport-> 4:
+12:os --EdgeKind.RefToOrigin-> 1:
+13:c --EdgeKind.RefToImport-> 5:
+13:c --EdgeKind.RefToOrigin-> 1:
+14:n --EdgeKind.RefToDef-> 7:n
+14:n --EdgeKind.RefToOrigin-> 1:
+15:self --EdgeKind.RefToDef-> 11:self
+15:self --EdgeKind.RefToOrigin-> 3:
+"""
+    assert build_scope_graph(bytearray(src)).to_str() == expected
@@ -0,0 +1,70 @@
+from pathlib import Path
+import time
+
+from scope_graph.build_scopes import build_scope_graph
+from scope_graph.cache import ScopeGraphCache
+from scope_graph.config import SCOPE_GRAPH_FORMAT
+from scope_graph.repo_resolution.repo_graph import RepoGraph
+
+
+def test_cache_hit(tmp_path):
+    code = Path("tests/repos/small_repo/a.py").read_bytes()
+    cache = ScopeGraphCache(tmp_path / "scopes.db")
+
+    g1 = cache.get_or_build(code, build_scope_graph)
+    g2 = cache.get_or_build(code, build_scope_graph)
+
+    assert cache.misses == 1
+    assert cache.hits == 1
+    assert g1.to_str() == g2.to_str()
+
+    # different content gets a different key
+    assert cache.key(code) != cache.key(code + b"\n")
+
+
+def test_cache_eviction(tmp_path):
+    cache = ScopeGraphCache(tmp_path / "scopes.db")
+    for i in range(5):
+        code = f"a{i} = {i}\n".encode()
+        cache.get_or_build(code, build_scope_graph)
+    cache.evict()
+
+    entry_size = cache.size() // 5
+    cache.max_bytes = entry_size * 2
+    cache.evict()
+    assert cache.size() <= entry_size * 2
+
+    cache.max_age = 0
+    time.sleep(0.01)
+    cache.evict()
+    assert cache.size() == 0
+
+
+def test_repo_graph_warm_cache(tmp_path):
+    repo = Path("tests/repos/test-confirm-imports")
+
+    cold = RepoGraph(repo, cache=ScopeGraphCache(tmp_path / "scopes.db"))
+    warm_cache = ScopeGraphCache(tmp_path / "scopes.db")
+    warm = RepoGraph(repo, cache=warm_cache)
+
+    assert warm_cache.misses == 0
+    assert warm_cache.hits == len(cold.scopes_map)
+    assert list(cold.edges()) == list(warm.edges())
+
+
+def test_format_change_misses(tmp_path):
+    code = Path("tests/repos/small_repo/a.py").read_bytes()
+    cold = ScopeGraphCache(tmp_path / "scopes.db")
+    cold.get_or_build(code, build_scope_graph)
+    cold.close()
+
+    same = ScopeGraphCache(tmp_path / "scopes.db")
+    same.get_or_build(code, build_scope_graph)
+    assert same.hits == 1
+    same.close()
+
+    bumped = ScopeGraphCache(
+        tmp_path / "scopes.db", graph_format=SCOPE_GRAPH_FORMAT + 1
+    )
+    bumped.get_or_build(code, build_scope_graph)
+    assert bumped.hits == 0 and bumped.misses == 1
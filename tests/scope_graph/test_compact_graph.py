@@ -0,0 +1,38 @@
+from pathlib import Path
+import pickle
+
+from scope_graph.build_scopes import build_scope_graph
+from scope_graph.repo_resolution.repo_graph import RepoGraph
+
+
+def test_compact_matches_scope_graph():
+    code = Path("tests/repos/test-import-ref/parser.py").read_bytes()
+    g = build_scope_graph(code)
+    compact = pickle.loads(pickle.dumps(g.compact()))
+
+    assert compact.to_str() == g.to_str()
+    assert compact.scopes() == g.scopes()
+    for scope in g.scopes():
+        assert compact.child_scopes(scope) == g.child_scopes(scope)
+        assert compact.parent_scope(scope) == g.parent_scope(scope)
+        assert compact.imports(scope) == g.imports(scope)
+        assert compact.definitions(scope) == g.definitions(scope)
+        assert compact.references_by_origin(scope) == g.references_by_origin(scope)
+        assert compact.range_by_scope(scope) == g.range_by_scope(scope)
+
+    for name in {compact.name(idx) for idx in range(len(compact))}:
+        assert compact.refs_by_name(name) == g.refs_by_name(name)
+
+    for idx in range(len(compact)):
+        node = g.get_node(idx)
+        assert compact.get_node(idx) == node
+        assert compact.scope_by_range(node.range) == g.scope_by_range(node.range)
+
+
+def test_compact_repo_graph():
+    repo = Path("tests/repos/codecov-cli-neuteured")
+
+    g = RepoGraph(repo)
+    compact = RepoGraph(repo, compact=True)
+
+    assert list(g.edges()) == list(compact.edges())
@@ -0,0 +1,41 @@
+from scope_graph.build_scopes import build_scope_graph
+
+
+def import_data(g):
+    return [g.get_node(i).data for i in g.imports(g.root_idx)]
+
+
+def test_import_parts():
+    src = b"""
+from m import a, b
+from m.n import (c,
+    d)
+import x, y.z
+import p as q
+from m import r as s, t
+"""
+    g = build_scope_graph(bytearray(src))
+
+    assert import_data(g) == [
+        {"from_name": "m", "names": ["a", "b"], "aliases": [None, None]},
+        {"from_name": "m.n", "names": ["c", "d"], "aliases": [None, None]},
+        {"from_name": "", "names": ["x", "y.z"], "aliases": [None, None]},
+        {"from_name": "", "names": ["p"], "aliases": ["q"]},
+        {"from_name": "m", "names": ["r", "t"], "aliases": ["s", None]},
+    ]
+
+
+def test_refs_resolve_to_aliases():
+    src = b"""
+import p as q
+from m import r as s, t
+import y.z
+
+print(p, q, r, s, t, y)
+"""
+    g = build_scope_graph(bytearray(src))
+    resolved = [
+        g.get_node(ref).name for ref in g.references_by_origin(g.root_idx)
+    ]
+
+    assert resolved == ["q", "s", "t", "y"]
@@ -59,3 +59,35 @@ def debug_log(self, message: str):
     g = build_scope_graph(bytearray(test, encoding="utf-8"), language="python")
 
     print([g.get_node(r).name for r in g.references_by_origin(1)])
+
+
+def test_resolve_nearest_def():
+    test = """
+from mod import a
+import b
+
+c = 1
+c = 2
+
+def func1():
+    a = 3
+    print(a, b, c)
+    pass
+"""
+
+    g = build_scope_graph(bytearray(test, encoding="utf-8"), language="python")
+
+    resolved = {}
+    for u, v, attrs in g._graph.edges(data=True):
+        if attrs["type"] in ("RefToDef", "RefToImport"):
+            resolved.setdefault(g.get_node(u).name, []).append((attrs["type"], v))
+
+    a_import, b_import = g.imports(0)
+    a_def = g._def_symbols[1]["a"][0]
+    c_defs = g._def_symbols[0]["c"]
+
+    # the nearest def and the first def in a scope win, imports are always candidates
+    assert resolved["a"] == [("RefToDef", a_def), ("RefToImport", a_import)]
+    assert resolved["b"] == [("RefToImport", b_import)]
+    assert resolved["c"] == [("RefToDef", c_defs[0])]
+    assert len(c_defs) == 2
@@ -0,0 +1,40 @@
+from scope_graph.build_scopes import build_scope_graph
+from scope_graph.scope_resolution import LocalDef, Reference
+from scope_graph.utils import RawRange, TextRange
+
+
+def test_raw_range_matches_text_range():
+    range = TextRange(start_byte=4, end_byte=9, start_point=(1, 0), end_point=(1, 5))
+    raw = RawRange.from_range(range)
+
+    assert raw.to_dict() == range.dict()
+    assert raw.to_range() == range
+    assert raw.line_range() == range.line_range()
+
+
+def test_lazy_range():
+    raw = RawRange(0, 3, (0, 0), (0, 3))
+    ref = Reference(raw, bytearray(b"foo = 1"))
+
+    assert ref.name == "foo"
+    assert ref._range is None
+    assert ref.range == raw.to_range()
+
+
+def test_capture_equality_uses_range():
+    src = bytearray(b"foo = foo")
+    first = RawRange(0, 3, (0, 0), (0, 3))
+    second = RawRange(6, 9, (0, 6), (0, 9))
+
+    assert Reference(first, src) == Reference(first.to_range(), src)
+    assert Reference(first, src) != Reference(second, src)
+    assert LocalDef(first, src, None) != LocalDef(second, src, None)
+    assert "start_byte=6" in repr(Reference(second, src))
+
+
+def test_node_ranges():
+    g = build_scope_graph(bytearray(b"def f(a):\n    return a\n"))
+
+    for node in g._graph.nodes:
+        range = g.get_node(node).range
+        assert g._graph.nodes[node]["range"] == range.dict()
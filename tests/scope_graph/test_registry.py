@@ -0,0 +1,75 @@
+import threading
+
+from scope_graph.build_scopes import build_scope_graph
+from scope_graph.scope_resolution.capture_refs import capture_refs
+from scope_graph.languages import LANG_REGISTRY
+from scope_graph.languages.registry import LanguageRegistry
+from scope_graph.config import PYTHON_SCM
+
+
+def test_query_compiled_once():
+    LANG_REGISTRY.clear()
+    code = bytearray(
+        """
+import os
+
+def func1():
+    os.path.join("a", "b")
+""",
+        encoding="utf-8",
+    )
+
+    for _ in range(3):
+        build_scope_graph(code)
+    capture_refs(code)
+    capture_refs(code)
+
+    stats = LANG_REGISTRY.stats()
+    # one compile each for PYTHON_SCM and PYTHON_REFS
+    assert stats["query_misses"] == 2
+    assert stats["query_hits"] == 3
+    assert stats["parser_misses"] == 1
+    assert stats["parser_hits"] == 4
+
+
+def test_parser_per_thread():
+    parsers = []
+
+    def get_parser():
+        parsers.append(LANG_REGISTRY.parser("python"))
+
+    threads = [threading.Thread(target=get_parser) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert parsers[0] is not parsers[1]
+    assert LANG_REGISTRY.parser("python") is LANG_REGISTRY.parser("python")
+
+
+def test_query_on_cold_registry():
+    registry = LanguageRegistry()
+    registry._loaders = LANG_REGISTRY._loaders
+
+    assert registry.query("python", PYTHON_SCM) is registry.query("python", PYTHON_SCM)
+    assert registry.stats()["query_misses"] == 1
+
+
+def test_stats_under_threads():
+    LANG_REGISTRY.clear()
+    LANG_REGISTRY.query("python", PYTHON_SCM)
+
+    def lookups():
+        for _ in range(1000):
+            LANG_REGISTRY.query("python", PYTHON_SCM)
+
+    threads = [threading.Thread(target=lookups) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = LANG_REGISTRY.stats()
+    assert stats["query_misses"] == 1
+    assert stats["query_hits"] == 8000
@@ -0,0 +1,84 @@
+from pathlib import Path
+
+from scope_graph.build_scopes import build_scope_graph
+from scope_graph.scope_resolution.scope_index import ScopeIndex
+from scope_graph.utils import TextRange
+
+
+def byte_range(start, end):
+    return TextRange(
+        start_byte=start, end_byte=end, start_point=(0, start), end_point=(0, end)
+    )
+
+
+def smallest_enclosing(g, range):
+    enclosing = []
+    for s in g.scopes():
+        scope_range = g.range_by_scope(s)
+        if (
+            scope_range.start_byte <= range.start_byte
+            and range.end_byte <= scope_range.end_byte
+        ):
+            size = scope_range.end_byte - scope_range.start_byte
+            # latest inserted wins ties
+            enclosing.append((size, -s))
+
+    return -min(enclosing)[1]
+
+
+def test_locate_matches_brute_force():
+    src = Path("tests/repos/test-import-ref/parser.py").read_bytes()
+    g = build_scope_graph(src)
+
+    ranges = [g.get_node(n).range for n in g._graph.nodes]
+    located = g._index.locate_many(ranges)
+
+    for range, scope in zip(ranges, located):
+        assert scope == smallest_enclosing(g, range)
+        assert g._index.locate(range) == scope
+
+
+def test_ref_on_last_line_of_function():
+    src = b"""
+def f():
+    x = 1
+    return x
+"""
+    g = build_scope_graph(bytearray(src))
+    ref = g.references_by_origin(1)
+
+    assert [g.get_node(r).name for r in ref] == ["x"]
+
+
+def test_out_of_order_scopes():
+    index = ScopeIndex(byte_range(0, 100), 0)
+    index.add_scope(byte_range(20, 30), 1)
+    index.add_scope(byte_range(40, 50), 2)
+    index.add_scope(byte_range(10, 60), 3)
+
+    assert index.parent(1) == 3
+    assert index.parent(2) == 3
+    assert index.parent(3) == 0
+    assert index.locate(byte_range(35, 36)) == 3
+    assert index.locate_many([byte_range(25, 26), byte_range(55, 70)]) == [1, 0]
+
+
+def test_references_by_lines():
+    src = Path("tests/repos/test-import-ref/parser.py").read_bytes()
+    g = build_scope_graph(src)
+    compact = g.compact()
+
+    refs = [(ref, scope) for scope, refs in g._scope_refs.items() for ref in refs]
+    num_rows = g.range_by_scope(g.root_idx).end_point.row + 1
+    for start in range(0, num_rows, 7):
+        end = start + 9
+        expected = sorted(
+            (ref, scope)
+            for ref, scope in refs
+            if start <= g.get_node(ref).range.start_point.row <= end
+        )
+
+        assert sorted(g.references_by_lines(start, end)) == expected
+        assert compact.references_by_lines(start, end) == g.references_by_lines(
+            start, end
+        )
@@ -0,0 +1,28 @@
+from pathlib import Path
+import pickle
+
+from scope_graph.build_scopes import build_scope_graph
+
+
+def test_scope_indexes():
+    # same file as test_interval_scopes:
+    # 0 -> 1 (main) -> 2 (func2)
+    #   -> 3 (A) -> 4 (func1)
+    g = build_scope_graph(Path("tests/repos/small_repo/a.py").read_bytes())
+
+    for graph in [g, pickle.loads(pickle.dumps(g))]:
+        assert graph.scopes() == [0, 1, 2, 3, 4]
+        assert graph.child_scopes(0) == [1, 3]
+        assert graph.child_scope_stack(0) == [1, 3, 2, 4]
+        assert graph.parent_scope(4) == 3
+        assert graph.parent_scope(0) is None
+        assert list(graph.parent_scope_stack(2)) == [2, 1, 0]
+
+        assert graph.imports(0) == [5]
+        assert [d.name for d in graph.definitions(1)] == ["main", "a"]
+        assert graph.references_by_origin(1) == [11]
+        # C resolves to the import, now that every imported name is captured
+        assert graph.references_by_origin(3) == [12]
+        assert graph.references_by_origin(4) == [13]
+        assert graph.refs_by_name("main2") == [1, 4]
+        assert graph.refs_by_name("missing") == []
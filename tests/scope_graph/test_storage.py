@@ -0,0 +1,44 @@
+from pathlib import Path
+import pickle
+
+from scope_graph.build_scopes import build_scope_graph
+from scope_graph.scope_resolution.graph import ScopeGraph
+from scope_graph.scope_resolution.compact_graph import CompactScopeGraph
+
+
+def test_scope_graph_save_load(tmp_path):
+    code = Path("tests/repos/test-import-ref/parser.py").read_bytes()
+    g = build_scope_graph(code)
+    g.save(tmp_path / "g.bin")
+
+    loaded = ScopeGraph.load(tmp_path / "g.bin")
+
+    assert loaded.to_str() == g.to_str()
+    assert loaded.scopes() == g.scopes()
+    for scope in g.scopes():
+        assert loaded.definitions(scope) == g.definitions(scope)
+        assert loaded.imports(scope) == g.imports(scope)
+        assert loaded.references_by_origin(scope) == g.references_by_origin(scope)
+
+    for idx in range(len(g._graph)):
+        node = g.get_node(idx)
+        assert loaded.get_node(idx) == node
+        assert loaded.scope_by_range(node.range) == g.scope_by_range(node.range)
+
+
+def test_compact_load_is_mapped(tmp_path):
+    code = Path("tests/repos/test-import-ref/parser.py").read_bytes()
+    g = build_scope_graph(code)
+    g.save(tmp_path / "g.bin")
+
+    for use_mmap in (True, False):
+        compact = CompactScopeGraph.load(tmp_path / "g.bin", use_mmap=use_mmap)
+
+        assert compact.to_str() == g.to_str()
+        for idx in range(len(compact)):
+            node = g.get_node(idx)
+            assert compact.get_node(idx) == node
+            assert compact.scope_by_range(node.range) == g.scope_by_range(node.range)
+
+        # mapped columns are copied out when pickled
+        assert pickle.loads(pickle.dumps(compact)).to_str() == g.to_str()